@@ -78,6 +78,24 @@ public class Hello {
                 .block();
     }
 
+    // Full Route (approval + strategy in one ML call)
+    @SuppressWarnings("unchecked")
+    @PostMapping(
+            value = "/full",
+            consumes = MediaType.APPLICATION_JSON_VALUE,
+            produces = MediaType.APPLICATION_JSON_VALUE
+    )
+    public Map<String, Object> full(@RequestBody Map<String, Object> applicant) {
+        return (Map<String, Object>) webClient.post()
+                .uri("/predict/full")
+                .contentType(MediaType.APPLICATION_JSON)
+                .accept(MediaType.APPLICATION_JSON)
+                .bodyValue(applicant)
+                .retrieve()
+                .bodyToMono(Map.class)
+                .block();
+    }
+
     // Strategy Route 
     @SuppressWarnings("unchecked")
     @PostMapping(
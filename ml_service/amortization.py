@@ -0,0 +1,132 @@
+from __future__ import annotations
+import numpy as np
+
+
+# Level-payment mortgage math, compounded monthly (as synthetic.monthly_payment).
+# Every function broadcasts over NumPy arrays, so one call covers a grid of
+# balances, rates and amortizations.
+def monthly_rate(annual_rate_pct):
+    return np.asarray(annual_rate_pct, dtype=float) / 100.0 / 12.0
+
+
+def annuity_factor(annual_rate_pct, years):
+    """
+    Monthly payment per dollar of principal.
+    """
+    r = monthly_rate(annual_rate_pct)
+    n = np.maximum(np.asarray(years, dtype=float), 1.0 / 12.0) * 12.0
+    safe_r = np.where(r > 0, r, 1.0)
+    return np.where(r > 0, safe_r / (1.0 - (1.0 + safe_r) ** -n), 1.0 / n)
+
+
+def payment(principal, annual_rate_pct, years):
+    return np.asarray(principal, dtype=float) * annuity_factor(annual_rate_pct, years)
+
+
+def principal_for_payment(monthly_payment, annual_rate_pct, years):
+    """
+    Largest principal a monthly payment amortizes over `years` (inverse of payment()).
+    """
+    return np.asarray(monthly_payment, dtype=float) / annuity_factor(annual_rate_pct, years)
+
+
+def balance_after(principal, annual_rate_pct, years, months):
+    """
+    Balance left after `months` level payments (0 once the loan is paid off).
+    """
+    principal = np.asarray(principal, dtype=float)
+    r = monthly_rate(annual_rate_pct)
+    n = np.maximum(np.asarray(years, dtype=float), 1.0 / 12.0) * 12.0
+    k = np.minimum(np.asarray(months, dtype=float), n)
+    level = payment(principal, annual_rate_pct, years)
+    growth = (1.0 + r) ** k
+    safe_r = np.where(r > 0, r, 1.0)
+    remaining = np.where(r > 0, principal * growth - level * (growth - 1.0) / safe_r, principal - level * k)
+    return np.where(k >= n, 0.0, np.maximum(remaining, 0.0))
+
+
+def schedule(principal, annual_rate_pct, years, months: int | None = None) -> dict:
+    """
+    Month-by-month schedule as (..., months) arrays: payment, interest,
+    principal and balance after each payment. Months past payoff are zero.
+    Computed in closed form for all months at once, with no loop over months.
+    """
+    principal = np.asarray(principal, dtype=float)[..., None]
+    rate = np.asarray(annual_rate_pct, dtype=float)[..., None]
+    term = np.asarray(years, dtype=float)[..., None]
+    if months is None:
+        months = int(np.ceil(np.max(term) * 12))
+    k = np.arange(1, months + 1)
+    balance = balance_after(principal, rate, term, k)
+    previous = balance_after(principal, rate, term, k - 1)
+    paid_principal = previous - balance
+    active = k <= np.maximum(term, 1.0 / 12.0) * 12.0
+    interest = np.where(active, previous * monthly_rate(rate), 0.0)
+    return {
+        "payment": paid_principal + interest,
+        "interest": interest,
+        "principal": paid_principal,
+        "balance": balance,
+    }
+
+
+def loan_costs(principal, annual_rate_pct, years, horizon_years: float = 5.0) -> dict:
+    """
+    Payment, lifetime interest, and interest paid / balance left at the horizon.
+    """
+    principal = np.asarray(principal, dtype=float)
+    n = np.maximum(np.asarray(years, dtype=float), 1.0 / 12.0) * 12.0
+    level = payment(principal, annual_rate_pct, years)
+    horizon = np.minimum(horizon_years * 12.0, n)
+    balance = balance_after(principal, annual_rate_pct, years, horizon)
+    return {
+        "monthly_payment": level,
+        "total_interest": np.maximum(level * n - principal, 0.0),
+        "interest_to_horizon": np.maximum(level * horizon - (principal - balance), 0.0),
+        "balance_at_horizon": balance,
+    }
+
+
+# Renewal Strategies
+# How each strategy in strategy.STRATEGIES changes the loan. One-time costs can
+# be overridden per call (e.g. a quoted prepayment penalty or realtor fees).
+EXTEND_YEARS = 5
+MAX_AMORTIZATION_YEARS = 30
+LUMP_SUM_MAX_SHARE = 0.15      # typical annual prepayment privilege
+DOWNSIZE_VALUE_SHARE = 0.7     # next home as a share of the current one
+DOWNSIZE_COST_SHARE = 0.05     # selling and moving costs, share of property value
+
+
+def strategy_costs(balance, annual_rate_pct, years, savings=0.0, property_value=0.0,
+                   horizon_years: float = 5.0, costs: dict | None = None) -> dict:
+    """
+    strategy -> loan_costs() plus principal, years, one_time_cost and total_cost
+    (lifetime interest + one-time cost). Inputs broadcast, so one call covers a
+    single applicant or a batch of thousands.
+    """
+    balance, rate, years, savings, value = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (balance, annual_rate_pct, years, savings, property_value))
+    )
+    years = np.maximum(years, 1.0)
+    lump = np.clip(np.minimum(savings, LUMP_SUM_MAX_SHARE * balance), 0.0, None)
+    released = np.clip((1.0 - DOWNSIZE_VALUE_SHARE) * value, 0.0, None)
+    loans = {
+        "baseline": (balance, years, 0.0),
+        "extend": (balance, np.minimum(years + EXTEND_YEARS, np.maximum(years, MAX_AMORTIZATION_YEARS)), 0.0),
+        "lump_sum": (balance - lump, years, 0.0),
+        "downsize": (np.maximum(balance - released, 0.0), years, DOWNSIZE_COST_SHARE * value),
+    }
+    out = {}
+    for name, (principal, term, default_cost) in loans.items():
+        one_time = np.broadcast_to(
+            np.asarray(costs[name] if costs and name in costs else default_cost, dtype=float), balance.shape
+        )
+        result = loan_costs(principal, rate, term, horizon_years)
+        result.update(
+            principal=principal,
+            years=term,
+            one_time_cost=one_time,
+            total_cost=result["total_interest"] + one_time,
+        )
+        out[name] = result
+    return out
@@ -1,24 +1,111 @@
+import json
+import math
 import os
-import traceback
+import time
+from contextlib import ExitStack, asynccontextmanager, contextmanager
+from typing import Any, Dict, List, Optional
 
-import joblib
-from fastapi import FastAPI
+_import_started = time.perf_counter()
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel, ValidationError
+from starlette.background import BackgroundTask
+from starlette.requests import ClientDisconnect
 
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-approval_pipeline = joblib.load(os.path.join(BASE_DIR, "approval_pipeline.pkl"))
-strategy_pipeline = joblib.load(os.path.join(BASE_DIR, "strategy_pipeline.pkl"))
+APPROVAL_PATH = os.path.join(BASE_DIR, "approval_pipeline.pkl")
+STRATEGY_PATH = os.path.join(BASE_DIR, "strategy_pipeline.pkl")
 
 try:
-    from .approval import predict_applicant
-    from .strategy import StrategyPipelineWrapper
+    from .batching import BatcherClosedError, QueueFullError
+    from .cache import PredictionCache, canonical_key
+    from .jobs import JobError, JobRunner, JobStore
+    from .logs import (RequestLoggingMiddleware, configure_logging, log_failure, log_payload,
+                       note_model_version, request_timer)
+    from .metrics import BATCH_SIZE, CONTENT_TYPE, observe_request, registry
+    from .models import ModelBundle
+    from .registry import CurrentBundle, ModelRegistry
+    from .tenants import TenantRouter, UnknownTenantError
+    from .sweep import SweepError, axis_values, run_sweep
+    from .streaming import NDJSONResponse, StreamError, ndjson_chunks
 except ImportError:
     # Support running from either the repo root or the ml_service directory.
-    from approval import predict_applicant
-    from strategy import StrategyPipelineWrapper
+    from batching import BatcherClosedError, QueueFullError
+    from cache import PredictionCache, canonical_key
+    from jobs import JobError, JobRunner, JobStore
+    from logs import (RequestLoggingMiddleware, configure_logging, log_failure, log_payload,
+                      note_model_version, request_timer)
+    from metrics import BATCH_SIZE, CONTENT_TYPE, observe_request, registry
+    from models import ModelBundle
+    from registry import CurrentBundle, ModelRegistry
+    from tenants import TenantRouter, UnknownTenantError
+    from sweep import SweepError, axis_values, run_sweep
+    from streaming import NDJSONResponse, StreamError, ndjson_chunks
+
+# Structured JSON logs on a background thread (ML_LOG_LEVEL, ML_LOG_SAMPLE_RATE,
+# ML_LOG_SLOW_MS); full payloads are only logged at DEBUG.
+configure_logging()
+
+# Pipelines load on first use, or in the background at startup
+# (ML_MODEL_LOADING=background|eager|lazy); /ready reports when they're warm.
+MODEL_LOADING = os.getenv("ML_MODEL_LOADING", "background")
+WARMUP_APPLICANTS = int(os.getenv("ML_WARMUP_APPLICANTS", "64"))
+
+# ML_MODEL_DIR=<directory of versioned artifacts> serves the newest version and
+# hot-swaps to newer ones (checked every ML_MODEL_POLL_SECONDS) without a restart;
+# see registry.py. Without it the two artifacts next to this file are served.
+MODEL_DIR = os.getenv("ML_MODEL_DIR")
+if MODEL_DIR:
+    model_registry = ModelRegistry(
+        root=MODEL_DIR,
+        warmup=WARMUP_APPLICANTS,
+        poll_seconds=float(os.getenv("ML_MODEL_POLL_SECONDS", "10")),
+        on_swap=lambda: prediction_cache.invalidate(),
+    )
+else:
+    model_registry = ModelRegistry(ModelBundle(APPROVAL_PATH, STRATEGY_PATH, warmup=WARMUP_APPLICANTS))
+# Whichever bundle is current; request handlers lease one instead (leased_models).
+models = CurrentBundle(model_registry)
+
+# ML_TENANT_DIR=<directory with one subdirectory per variant> lets a request pick a
+# variant with the X-Model-Key header or the model_key query field. Variants load on
+# demand and are evicted least recently used beyond ML_TENANT_MEMORY_MB, measured
+# from artifact size or RSS growth (ML_TENANT_MEMORY_MEASURE=artifact|rss).
+TENANT_DIR = os.getenv("ML_TENANT_DIR")
+tenant_router = TenantRouter(
+    TENANT_DIR,
+    budget_bytes=int(float(os.getenv("ML_TENANT_MEMORY_MB", "2048")) * 2**20),
+    measure=os.getenv("ML_TENANT_MEMORY_MEASURE", "artifact"),
+    warmup=int(os.getenv("ML_TENANT_WARMUP_APPLICANTS", "8")),
+) if TENANT_DIR else None
+
+# Identical applicants (retries, back-navigation) are served from memory.
+# ML_CACHE_MAX_ENTRIES=0 turns the cache off.
+prediction_cache = PredictionCache(
+    max_entries=int(os.getenv("ML_CACHE_MAX_ENTRIES", "4096")),
+    ttl_seconds=float(os.getenv("ML_CACHE_TTL_SECONDS", "300")),
+)
+
+_LAZY_ATTRIBUTES = {
+    "approval_pipeline": "approval_pipeline",
+    "strategy_pipeline": "strategy_pipeline",
+    "wrapper": "wrapper",
+    "MODEL_VERSION": "version",
+    "approval_batcher": "approval_batcher",
+    "strategy_batcher": "strategy_batcher",
+}
+
+
+def __getattr__(name):
+    # Module-level names from before lazy loading; touching one loads the models.
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(models.load(), _LAZY_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class Applicant(BaseModel):
@@ -42,26 +129,97 @@ class Applicant(BaseModel):
     pref_equity_growth: float
     pref_risk_tolerance: float
     steady_payment: int = 1
-
-
-def _safe_classes_from_pipeline(pipeline):
-    try:
-        for _, step in reversed(pipeline.named_steps.items()):
-            if hasattr(step, "classes_"):
-                return list(step.classes_)
-    except Exception:
-        pass
-    return getattr(pipeline, "classes_", None)
-
-
-def _safe_feature_names_from_pipeline(pipeline):
-    names = getattr(pipeline, "feature_names_in_", None)
-    if names is not None:
-        return list(names)
-    try:
-        return list(pipeline.named_steps["preprocess"].get_feature_names_out())
-    except Exception:
-        return None
+    # Liquid savings that could go to a lump-sum prepayment.
+    savings_available: float = 0.0
+
+
+class ApplicantBatch(BaseModel):
+    # Items are validated one by one so a bad row (even one that isn't an
+    # object) doesn't reject the batch.
+    applicants: List[Any]
+
+
+class SweepAxis(BaseModel):
+    # Either explicit values, or start..stop inclusive in steps of step.
+    values: Optional[List[float]] = None
+    start: Optional[float] = None
+    stop: Optional[float] = None
+    step: Optional[float] = None
+
+
+class SweepRequest(BaseModel):
+    applicant: Applicant
+    # Field name -> axis; the grid is their cross product, in this order.
+    sweep: Dict[str, SweepAxis]
+
+
+class MaxMortgageRequest(BaseModel):
+    # mortgage_balance, monthly_payment_current, interest_rate_current and
+    # amortization_remaining are replaced by the solver for each cell.
+    applicant: Applicant
+    rates: SweepAxis
+    amortizations: SweepAxis
+    probability_cutoff: float = 0.5
+    tolerance: float = 100.0
+
+
+class RateRiskRequest(BaseModel):
+    # The variable rate starts at applicant.interest_rate_current. Unset model
+    # parameters use the defaults in rates.py.
+    applicant: Applicant
+    fixed_rate: Optional[float] = None
+    term_years: int = 5
+    paths: int = 10_000
+    seed: int = 0
+    kappa: Optional[float] = None
+    theta: Optional[float] = None
+    sigma: Optional[float] = None
+    stress_payment: Optional[float] = None
+
+
+class JobRequest(BaseModel):
+    # Either applicants inline or a CSV / Parquet file under ML_JOB_FILE_ROOT.
+    applicants: Optional[List[Dict[str, Any]]] = None
+    file: Optional[str] = None
+    priority: int = 0
+    chunk_size: Optional[int] = None
+
+
+RATE_RISK_MAX_PATHS = int(os.getenv("ML_RATE_RISK_MAX_PATHS", "100000"))
+RATE_RISK_MAX_TERM_YEARS = 40
+# paths x simulated months; the default is max paths over a 5-year term.
+RATE_RISK_MAX_STEPS = int(os.getenv("ML_RATE_RISK_MAX_STEPS", "6000000"))
+BULK_MAX_ROWS = int(os.getenv("ML_BULK_MAX_ROWS", "1000000"))
+BULK_MAX_BYTES = int(os.getenv("ML_BULK_MAX_BYTES", str(512 << 20)))
+JOB_RESULTS_MAX_LIMIT = 10_000
+STREAM_CHUNK_SIZE = int(os.getenv("ML_STREAM_CHUNK_SIZE", "1000"))
+STREAM_FIRST_CHUNK = int(os.getenv("ML_STREAM_FIRST_CHUNK", "32"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("ML_STREAM_MAX_LINE_BYTES", str(1 << 20)))
+
+
+# ML_JOB_DB=<sqlite file> enables the /jobs endpoints (see jobs.py). Jobs run in a
+# pool of ML_JOB_WORKERS niced processes, at most ML_JOB_MAX_RUNNING at a time.
+# Under ml_service.serve every worker starts the runner, but only one of them
+# (whichever holds the database's dispatch lock) runs jobs.
+JOB_DB = os.getenv("ML_JOB_DB")
+job_runner = JobRunner(
+    JobStore(JOB_DB),
+    lambda: model_registry.current,
+    Applicant,
+    workers=int(os.getenv("ML_JOB_WORKERS", "1")),
+    max_running=int(os.getenv("ML_JOB_MAX_RUNNING", "1")),
+    chunk_size=int(os.getenv("ML_JOB_CHUNK_SIZE", "1000")),
+    nice=int(os.getenv("ML_JOB_NICE", "10")),
+    file_root=os.getenv("ML_JOB_FILE_ROOT"),
+) if JOB_DB else None
+
+
+SWEEP_FIELDS = {
+    name: field.annotation is int
+    for name, field in Applicant.model_fields.items()
+    if field.annotation in (int, float)
+}
+SWEEP_MAX_POINTS = int(os.getenv("ML_SWEEP_MAX_POINTS", "2500"))
 
 
 def _reasons_text(reasons):
@@ -70,32 +228,99 @@ def _reasons_text(reasons):
     return f" Reasons: {', '.join(reasons)}"
 
 
-_strategy_classes = _safe_classes_from_pipeline(strategy_pipeline)
-_strategy_feature_names = _safe_feature_names_from_pipeline(strategy_pipeline)
+def _approval_response(result):
+    if result["decision"] == "PASS":
+        message = (
+            f"Approved mortgage. Chosen rate: {result['rate_type']}."
+            + _reasons_text(result.get("approval_reasons", []))
+        )
+    else:
+        message = "Not approved for a mortgage." + _reasons_text(
+            result.get("approval_reasons", [])
+        )
+
+    return {
+        "message": message,
+        "decision": result["decision"],
+        "approval_probability": result["approval_probability"],
+        "rate_type": result["rate_type"],
+        "approval_reasons": result["approval_reasons"],
+        "rate_reasons": result["rate_reasons"],
+    }
+
 
-if _strategy_classes is None:
-    raise RuntimeError(
-        "Could not infer strategy classes from the pipeline. "
-        "Ensure the final estimator has .classes_ or pass classes explicitly."
-    )
-if _strategy_feature_names is None:
-    raise RuntimeError(
-        "Could not infer feature names for the strategy pipeline. "
-        "Ensure there is a 'preprocess' step with get_feature_names_out() "
-        "or the pipeline exposes feature_names_in_."
+def _strategy_response(result):
+    message = f"Best strategy: {result['strategy']}." + _reasons_text(
+        result.get("reasons", [])
     )
 
-
-wrapper = StrategyPipelineWrapper(
-    pipeline=strategy_pipeline,
-    classes=_strategy_classes,
-    X_train_columns=_strategy_feature_names,
-    encoders=None,
-    label_encoder=None,
-)
+    return {
+        "message": message,
+        "strategy": result["strategy"],
+        "rate_type": result["rate_type"],
+        "adjusted_probabilities": result["adjusted_probabilities"],
+        "feasibility": result["feasibility"],
+        "preferences": result["preferences"],
+        "rate_reasons": result["rate_reasons"],
+        "reasons": result["reasons"],
+        "costs": result["costs"],
+    }
 
 
-app = FastAPI(title="Mortgage Copilot API", version="1.0.0")
+@contextmanager
+def model_lease(key: Optional[str] = None):
+    """
+    The bundle for a model key (a tenant variant), or the default bundle without
+    one, held until the block exits. Unknown keys are a 404.
+    """
+    if key is None:
+        with model_registry.lease() as bundle:
+            yield bundle
+        return
+    if tenant_router is None:
+        raise HTTPException(status_code=404, detail="model keys are not enabled (ML_TENANT_DIR)")
+    try:
+        tenant_router.paths(key)
+    except UnknownTenantError:
+        raise HTTPException(status_code=404, detail=f"unknown model key: {key}")
+    with tenant_router.lease(key) as bundle:
+        yield bundle
+
+
+def leased_models(x_model_key: Optional[str] = Header(None), model_key: Optional[str] = None):
+    """
+    The bundle this request runs on, held until the handler returns, so a hot
+    swap or an eviction never changes models mid-request. A model key (header
+    or query field) selects a tenant variant; without one the default is used.
+    """
+    with model_lease(x_model_key or model_key) as bundle:
+        yield bundle
+
+
+def _model_version(m, timer):
+    if not m.loaded:
+        m.load()
+        timer.lap("load_models")
+    note_model_version(m.version)
+    return m.version
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if MODEL_LOADING == "background":
+        models.load_in_background()
+    elif MODEL_LOADING == "eager":
+        models.warm_up()
+    model_registry.start()
+    if job_runner is not None:
+        job_runner.start()
+    yield
+    if job_runner is not None:
+        job_runner.stop()
+    model_registry.stop()
+
+
+app = FastAPI(title="Mortgage Copilot API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -104,6 +329,39 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    RequestLoggingMiddleware,
+    model_version=lambda: models.version if models.loaded else None,
+    observers=[observe_request],
+)
+
+
+def _service_metrics():
+    cache = prediction_cache.stats()
+    yield ("ml_model_ready", "gauge", "1 once models are loaded and warmed up.",
+           [({"model_version": models.version if models.loaded else ""}, int(models.ready))])
+    yield ("ml_cache_entries", "gauge", "Entries in the prediction cache.", [({}, cache["size"])])
+    for key in ("hits", "misses", "shared", "evictions", "expirations"):
+        yield (f"ml_cache_{key}_total", "counter", f"Prediction cache {key}.", [({}, cache[key])])
+    if tenant_router is not None:
+        tenants = tenant_router.status()
+        yield ("ml_tenant_models_resident", "gauge", "Model variants held in memory.",
+               [({}, len(tenants["resident"]))])
+        yield ("ml_tenant_memory_bytes", "gauge", "Measured memory of resident model variants.",
+               [({"measure": tenants["measure"]}, tenants["resident_bytes"])])
+    if job_runner is not None:
+        counts = job_runner.store.counts()
+        yield ("ml_jobs", "gauge", "Batch jobs by status.",
+               [({"status": status}, n) for status, n in counts.items()])
+    if models.loaded and models.approval_batcher is not None:
+        batchers = [models.approval_batcher, models.strategy_batcher]
+        yield ("ml_microbatch_queue_depth", "gauge", "Requests waiting for a micro-batch.",
+               [({"batcher": b.name}, b.stats()["queue_depth"]) for b in batchers])
+        yield ("ml_microbatch_rejected_total", "counter", "Requests rejected with a full queue.",
+               [({"batcher": b.name}, b.stats()["rejected"]) for b in batchers])
+
+
+registry.add_collector(_service_metrics)
 
 
 @app.get("/")
@@ -111,72 +369,491 @@ def home():
     return {"status": "FastAPI is running"}
 
 
+@app.get("/ready")
+def ready():
+    status = models.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/models")
+def model_versions():
+    return {**model_registry.status(), "tenants": tenant_router.status() if tenant_router else None}
+
+
+@app.get("/jobs")
+def jobs_status():
+    return _jobs().status()
+
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {"model_version": models.load().version, **prediction_cache.stats()}
+
+
+@app.get("/batching/stats")
+def batching_stats():
+    m = models.load()
+    return {
+        "enabled": m.approval_batcher is not None,
+        "approval": m.approval_batcher.stats() if m.approval_batcher else None,
+        "strategy": m.strategy_batcher.stats() if m.strategy_batcher else None,
+    }
+
+
+EXPLAIN_MAX_TOP_K = 50
+
+
+def _check_top_k(top_k: int):
+    if not 1 <= top_k <= EXPLAIN_MAX_TOP_K:
+        raise HTTPException(status_code=422, detail=f"top_k must be between 1 and {EXPLAIN_MAX_TOP_K}")
+
+
 @app.post("/predict/approval")
-def approval(applicant: Applicant):
+def approval(applicant: Applicant, explain: bool = False, top_k: int = 5,
+             m: ModelBundle = Depends(leased_models)):
+    """
+    explain=true adds the model's top_k feature attributions (TreeSHAP, log-odds).
+    """
+    timer = request_timer()
     data = applicant.dict()
-    print("DEBUG /predict/approval - Incoming data:", data)
+    _check_top_k(top_k)
+    timer.lap("validate")
 
     try:
-        result = predict_applicant(data, approval_pipeline)
-        print("DEBUG /predict/approval - Prediction result:", result)
+        key = canonical_key("approval", _model_version(m, timer), data)
+        timer.lap("cache_key")
+        result = prediction_cache.get_or_compute(key, lambda: m.predict_approval(data, timer))
+        timer.lap("cache")
+        log_payload("/predict/approval", data, result)
+        if explain:
+            explanation = m.explain_approvals([data], top_k)[0]
+            timer.lap("explain")
+    except (QueueFullError, BatcherClosedError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        print("ERROR in /predict/approval:", str(e))
-        traceback.print_exc()
+        log_failure("approval prediction failed", route="/predict/approval")
         return {
             "error": "Prediction failed",
             "details": str(e),
         }
 
-    if result["decision"] == "PASS":
-        message = (
-            f"Approved mortgage. Chosen rate: {result['rate_type']}."
-            + _reasons_text(result.get("approval_reasons", []))
-        )
-    else:
-        message = "Not approved for a mortgage." + _reasons_text(
-            result.get("approval_reasons", [])
-        )
+    response = _approval_response(result)
+    if explain:
+        response["explanation"] = explanation
+    return response
+
+
+@app.post("/predict/approval/batch")
+def approval_batch(batch: ApplicantBatch, explain: bool = False, top_k: int = 5,
+                   m: ModelBundle = Depends(leased_models)):
+    _check_top_k(top_k)
+    results = [None] * len(batch.applicants)
+    valid_index, valid_data = [], []
+    for i, item in enumerate(batch.applicants):
+        try:
+            valid_data.append(Applicant.model_validate(item).dict())
+            valid_index.append(i)
+        except ValidationError as e:
+            results[i] = {
+                "error": "Invalid applicant",
+                "details": e.errors(include_url=False),
+            }
 
-    return {
-        "message": message,
-        "decision": result["decision"],
-        "approval_probability": result["approval_probability"],
-        "rate_type": result["rate_type"],
-        "approval_reasons": result["approval_reasons"],
-        "rate_reasons": result["rate_reasons"],
-    }
+    try:
+        _model_version(m, request_timer())
+        if valid_data:
+            BATCH_SIZE.observe(len(valid_data), "approval-batch-endpoint")
+        predictions = m.predict_approvals(valid_data)
+        # One native attribution call for the whole batch.
+        explanations = m.explain_approvals(valid_data, top_k) if explain else [None] * len(valid_data)
+    except Exception as e:
+        log_failure("approval batch prediction failed", route="/predict/approval/batch")
+        predictions = explanations = [e] * len(valid_data)
+
+    for i, result, explanation in zip(valid_index, predictions, explanations):
+        if isinstance(result, Exception):
+            results[i] = {"error": "Prediction failed", "details": str(result)}
+        else:
+            results[i] = _approval_response(result)
+            if explain:
+                results[i]["explanation"] = explanation
+
+    return {"results": results}
 
 
 @app.post("/predict/strategy")
-def strategy(applicant: Applicant):
+def strategy(applicant: Applicant, explain: bool = False, top_k: int = 5,
+             m: ModelBundle = Depends(leased_models)):
+    """
+    explain=true adds the top_k feature attributions for the model's top class,
+    which the rule-based decision in "strategy" can override.
+    """
+    timer = request_timer()
     data = applicant.dict()
-    print("DEBUG /predict/strategy - Incoming data:", data)
+    _check_top_k(top_k)
+    timer.lap("validate")
 
     try:
-        result = wrapper.predict_with_rules(data)
-        print("DEBUG /predict/strategy - Prediction result:", result)
+        key = canonical_key("strategy", _model_version(m, timer), data)
+        timer.lap("cache_key")
+        result = prediction_cache.get_or_compute(key, lambda: m.predict_strategy(data, timer))
+        timer.lap("cache")
+        log_payload("/predict/strategy", data, result)
+        if explain:
+            explanation = m.explain_strategies([data], top_k)[0]
+            timer.lap("explain")
+    except (QueueFullError, BatcherClosedError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        print("ERROR in /predict/strategy:", str(e))
-        traceback.print_exc()
+        log_failure("strategy prediction failed", route="/predict/strategy")
         return {
             "error": "Prediction failed",
             "details": str(e),
         }
 
-    message = f"Best strategy: {result['strategy']}." + _reasons_text(
-        result.get("reasons", [])
-    )
+    response = _strategy_response(result)
+    if explain:
+        response["explanation"] = explanation
+    return response
+
+
+@app.post("/predict/full")
+def full(applicant: Applicant, m: ModelBundle = Depends(leased_models)):
+    """
+    Approval and strategy for one applicant: one validation, one cache lookup
+    and one round trip instead of two.
+    """
+    timer = request_timer()
+    data = applicant.dict()
+    timer.lap("validate")
+
+    try:
+        key = canonical_key("full", _model_version(m, timer), data)
+        timer.lap("cache_key")
+        approval_result, strategy_result = prediction_cache.get_or_compute(
+            key, lambda: m.predict_full(data, timer)
+        )
+        timer.lap("cache")
+        log_payload("/predict/full", data, {"approval": approval_result, "strategy": strategy_result})
+    except (QueueFullError, BatcherClosedError) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        log_failure("full prediction failed", route="/predict/full")
+        return {
+            "error": "Prediction failed",
+            "details": str(e),
+        }
 
     return {
-        "message": message,
-        "strategy": result["strategy"],
-        "rate_type": result["rate_type"],
-        "adjusted_probabilities": result["adjusted_probabilities"],
-        "feasibility": result["feasibility"],
-        "preferences": result["preferences"],
-        "rate_reasons": result["rate_reasons"],
-        "reasons": result["reasons"],
+        "approval": _approval_response(approval_result),
+        "strategy": _strategy_response(strategy_result),
+    }
+
+
+@app.post("/predict/sweep")
+def sweep(request: SweepRequest, m: ModelBundle = Depends(leased_models)):
+    """
+    What-if grid for one applicant: every combination of the swept fields is
+    scored with one batched call per model. Strategy decisions skip the reason
+    text; use /predict/strategy for the explanation of a chosen point.
+    """
+    timer = request_timer()
+    base = request.applicant.dict()
+    axes = {field: axis.dict() for field, axis in request.sweep.items()}
+    timer.lap("validate")
+    _model_version(m, timer)
+
+    try:
+        result = run_sweep(m, base, axes, SWEEP_FIELDS, SWEEP_MAX_POINTS, timer)
+    except SweepError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        log_failure("sweep prediction failed", route="/predict/sweep")
+        return {
+            "error": "Prediction failed",
+            "details": str(e),
+        }
+
+    BATCH_SIZE.observe(result["points"], "sweep-endpoint")
+    return result
+
+
+@app.post("/predict/max-mortgage")
+def max_mortgage_surface(request: MaxMortgageRequest, m: ModelBundle = Depends(leased_models)):
+    """
+    Largest approvable mortgage_balance for each (rate, amortization) cell,
+    with the monthly payment there and the rule (or model cutoff) that binds.
+    """
+    try:
+        from .solver import max_mortgage  # imports pandas via approval; keep app import light
+    except ImportError:
+        from solver import max_mortgage
+
+    timer = request_timer()
+    applicant = request.applicant.dict()
+    try:
+        rates = axis_values("rates", request.rates.dict(), max_values=SWEEP_MAX_POINTS)
+        years = axis_values("amortizations", request.amortizations.dict(), integer=True,
+                            max_values=SWEEP_MAX_POINTS)
+        if len(rates) * len(years) > SWEEP_MAX_POINTS:
+            raise SweepError(f"{len(rates) * len(years)} cells; the limit is {SWEEP_MAX_POINTS}")
+        if min(rates) < 0:
+            raise SweepError("rates: must not be negative")
+        if min(years) < 1:
+            raise SweepError("amortizations: must be at least 1 year")
+        if not 0 <= request.probability_cutoff <= 1:
+            raise SweepError("probability_cutoff must be between 0 and 1")
+        if request.tolerance <= 0:
+            raise SweepError("tolerance must be positive")
+    except SweepError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    timer.lap("validate")
+    _model_version(m, timer)
+
+    try:
+        return max_mortgage(
+            m.load(), applicant, rates, years,
+            probability_cutoff=request.probability_cutoff, tolerance=request.tolerance, timer=timer,
+        )
+    except Exception as e:
+        log_failure("max mortgage solve failed", route="/predict/max-mortgage")
+        return {
+            "error": "Prediction failed",
+            "details": str(e),
+        }
+
+
+@app.post("/predict/rate-risk")
+def rate_risk(request: RateRiskRequest):
+    """
+    Monte Carlo comparison of a variable rate against a fixed one over the term:
+    percentiles of the variable payment and interest, and how often the
+    variable payment breaks the stress threshold.
+    """
+    try:
+        from . import rates  # imports numpy; keep app import light
+    except ImportError:
+        import rates
+
+    timer = request_timer()
+    if not 1 <= request.paths <= RATE_RISK_MAX_PATHS:
+        raise HTTPException(status_code=422, detail=f"paths must be between 1 and {RATE_RISK_MAX_PATHS}")
+    if not 1 <= request.term_years <= RATE_RISK_MAX_TERM_YEARS:
+        raise HTTPException(status_code=422, detail=f"term_years must be between 1 and {RATE_RISK_MAX_TERM_YEARS}")
+    steps = request.paths * rates.term_months(request.applicant.dict(), request.term_years)
+    if steps > RATE_RISK_MAX_STEPS:
+        raise HTTPException(status_code=422, detail=f"paths x term months is {steps}; the limit is {RATE_RISK_MAX_STEPS}")
+    for name in ("fixed_rate", "kappa", "theta", "sigma", "stress_payment"):
+        value = getattr(request, name)
+        if value is not None and not (value >= 0 and math.isfinite(value)):
+            raise HTTPException(status_code=422, detail=f"{name} must be a non-negative number")
+    model = {
+        name: getattr(rates, name.upper()) if getattr(request, name) is None else getattr(request, name)
+        for name in ("kappa", "theta", "sigma")
     }
+    timer.lap("validate")
+
+    try:
+        return rates.rate_risk(
+            request.applicant.dict(), fixed_rate=request.fixed_rate, term_years=request.term_years,
+            n_paths=request.paths, seed=request.seed, stress_payment=request.stress_payment, timer=timer,
+            **model,
+        )
+    except Exception as e:
+        log_failure("rate risk simulation failed", route="/predict/rate-risk")
+        return {
+            "error": "Simulation failed",
+            "details": str(e),
+        }
+
+
+async def _read_body(request: Request, limit: int) -> bytes:
+    # 413 for a body over limit bytes: from Content-Length before reading, or while reading a chunked upload.
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > limit:
+        raise HTTPException(status_code=413, detail=f"{length} bytes; the limit is {limit}")
+    pieces, size = [], 0
+    async for piece in request.stream():
+        size += len(piece)
+        if size > limit:
+            raise HTTPException(status_code=413, detail=f"body over the limit of {limit} bytes")
+        pieces.append(piece)
+    return b"".join(pieces)
+
+
+@app.post("/predict/bulk")
+async def bulk(request: Request, m: ModelBundle = Depends(leased_models)):
+    """
+    Columnar batch scoring: post an Arrow IPC stream or a Parquet file with the
+    Applicant columns and get the results back in the same format. See bulk.py.
+    """
+    try:
+        from . import bulk as columnar  # imports pyarrow and pandas; keep app import light
+    except ImportError:
+        import bulk as columnar
+
+    body = await _read_body(request, BULK_MAX_BYTES)
+    try:
+        fmt = columnar.detect_format(request.headers.get("content-type"), body)
+    except columnar.BulkError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+    def score():
+        timer = request_timer()
+        table = columnar.read_table(body, fmt)
+        if table.num_rows > BULK_MAX_ROWS:
+            raise HTTPException(status_code=413, detail=f"{table.num_rows} rows; the limit is {BULK_MAX_ROWS}")
+        timer.lap("read")
+        _model_version(m, timer)
+        scored = columnar.score_table(table, m, Applicant)
+        timer.lap("score")
+        BATCH_SIZE.observe(table.num_rows, "bulk-endpoint")
+        return columnar.write_table(scored, fmt)
+
+    try:
+        content = await run_in_threadpool(score)
+    except columnar.BulkError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return Response(content, media_type=columnar.RESPONSE_TYPES[fmt])
+
+
+def _score_lines(lines: list, m) -> bytes:
+    # One NDJSON result per input line: {"approval", "strategy"} like /predict/full, or an error.
+    results = [None] * len(lines)
+    valid_index, valid_data = [], []
+    for i, line in enumerate(lines):
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            results[i] = {"error": "Invalid JSON", "details": str(e)}
+            continue
+        if not isinstance(item, dict):
+            results[i] = {"error": "Invalid applicant", "details": "expected a JSON object"}
+            continue
+        try:
+            valid_data.append(Applicant.model_validate(item).dict())
+            valid_index.append(i)
+        except ValidationError as e:
+            results[i] = {"error": "Invalid applicant", "details": e.errors(include_url=False)}
+
+    try:
+        approvals = m.predict_approvals(valid_data)
+        strategies = m.predict_strategies(valid_data)
+    except Exception as e:
+        log_failure("stream chunk prediction failed", route="/predict/stream")
+        approvals = strategies = [e] * len(valid_data)
+
+    for i, approval_result, strategy_result in zip(valid_index, approvals, strategies):
+        if isinstance(approval_result, Exception):
+            results[i] = {"error": "Prediction failed", "details": str(approval_result)}
+        else:
+            results[i] = {
+                "approval": _approval_response(approval_result),
+                "strategy": _strategy_response(strategy_result),
+            }
+    return "".join(json.dumps(r, default=str) + "\n" for r in results).encode()
+
+
+@app.post("/predict/stream")
+async def stream(request: Request, x_model_key: Optional[str] = Header(None), model_key: Optional[str] = None):
+    """
+    NDJSON in, NDJSON out: one applicant per line, one result per non-blank line
+    in the same order. Lines are scored in chunks as they arrive (see streaming.py).
+    The model bundle is leased until the last result is sent.
+    """
+    lease = ExitStack()
+    # Entering a lease can load a tenant variant; keep that off the event loop.
+    m = await run_in_threadpool(lease.enter_context, model_lease(x_model_key or model_key))
+    try:
+        await run_in_threadpool(_model_version, m, request_timer())
+    except BaseException:
+        lease.close()
+        raise
+
+    async def results():
+        try:
+            chunks = ndjson_chunks(request.stream(), STREAM_CHUNK_SIZE, STREAM_FIRST_CHUNK, STREAM_MAX_LINE_BYTES)
+            async for lines in chunks:
+                BATCH_SIZE.observe(len(lines), "stream-endpoint")
+                yield await run_in_threadpool(_score_lines, lines, m)
+        except StreamError as e:
+            yield (json.dumps({"error": "Invalid stream", "details": str(e)}) + "\n").encode()
+        except ClientDisconnect:
+            pass  # nobody left to send the rest to
+        finally:
+            lease.close()
+
+    # The background task releases the lease if the body is never iterated.
+    return NDJSONResponse(results(), background=BackgroundTask(lease.close))
+
+
+def _jobs() -> JobRunner:
+    if job_runner is None:
+        raise HTTPException(status_code=404, detail="jobs are not enabled (ML_JOB_DB)")
+    return job_runner
+
+
+def _job(job_id: str) -> dict:
+    job = _jobs().store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"unknown job: {job_id}")
+    return job
+
+
+@app.post("/jobs")
+def submit_job(request: JobRequest):
+    """
+    Queue a batch for background scoring; poll GET /jobs/{id} for progress.
+    Higher priority jobs start first.
+    """
+    try:
+        job = _jobs().submit(request.applicants, request.file, request.priority, request.chunk_size)
+    except JobError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return JSONResponse(job, status_code=202)
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    return _job(job_id)
+
+
+@app.get("/jobs/{job_id}/results")
+def job_results(job_id: str, offset: int = 0, limit: int = 1000):
+    """
+    Result rows (like portfolio part files, with "row" = input position) for
+    the chunks finished so far.
+    """
+    job = _job(job_id)
+    if offset < 0 or not 1 <= limit <= JOB_RESULTS_MAX_LIMIT:
+        raise HTTPException(status_code=422, detail=f"offset must be >= 0 and limit between 1 and {JOB_RESULTS_MAX_LIMIT}")
+    rows = _jobs().store.results(job_id, offset, limit)
+    return {"id": job_id, "status": job["status"], "done": job["done"], "total": job["total"],
+            "offset": offset, "rows": rows}
+
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    _job(job_id)
+    if not _jobs().cancel(job_id):
+        raise HTTPException(status_code=409, detail="job already finished")
+    return _job(job_id)
+
+
+@app.delete("/jobs/{job_id}")
+def delete_job(job_id: str):
+    _job(job_id)
+    if not _jobs().store.delete(job_id):
+        raise HTTPException(status_code=409, detail="cancel the job before deleting it")
+    return {"id": job_id, "deleted": True}
+
+
+models.timings["import_app"] = round(time.perf_counter() - _import_started, 4)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,22 @@
+import weakref
 
+import numpy as np
 import pandas as pd
 
+try:
+    from .rows import RowLayout
+    from .timing import NULL_TIMER
+except ImportError:
+    from rows import RowLayout
+    from timing import NULL_TIMER
+
+# Hard-fail thresholds (also used by the max-mortgage solver)
+MIN_CREDIT_SCORE = 600
+MAX_LOAN_TO_VALUE = 0.95
+MAX_AGE_PLUS_AMORT = 80
+MAX_GDS_RATIO = 0.5
+MAX_TDS_RATIO = 0.65
+
 # Rules engine: approval + rate recommendation 
 def rule_based_predict(case):
     """
@@ -8,15 +24,15 @@ def rule_based_predict(case):
     Preferences can override if feasible.
     """
     # Hard Fails
-    if case["credit_score"] < 600:
+    if case["credit_score"] < MIN_CREDIT_SCORE:
         return "FAIL", 0.0, ["Credit score below 600"], "N/A", []
-    if case["loan_to_value"] > 0.95:
+    if case["loan_to_value"] > MAX_LOAN_TO_VALUE:
         return "FAIL", 0.0, ["Loan-to-Value exceeds 95%"], "N/A", []
-    if case["age_plus_amort"] > 80:
+    if case["age_plus_amort"] > MAX_AGE_PLUS_AMORT:
         return "FAIL", 0.0, ["Age plus amortization exceeds 80"], "N/A", []
-    if case["gds_ratio"] > 0.5:
+    if case["gds_ratio"] > MAX_GDS_RATIO:
         return "FAIL", 0.0, ["GDS ratio above 50%"], "N/A", []
-    if case["tds_ratio"] > 0.65:
+    if case["tds_ratio"] > MAX_TDS_RATIO:
         return "FAIL", 0.0, ["TDS ratio above 65%"], "N/A", []
     if case["income_monthly"] <= 0:
         return "FAIL", 0.0, ["No income reported"], "N/A", []
@@ -144,18 +160,224 @@ def inspect_applicant_row(applicant_raw, pipeline=None):
 
 
 # Main Entry 
-def predict_applicant(applicant_raw, pipeline=None):
+def predict_applicant(applicant_raw, pipeline=None, timer=NULL_TIMER):
     applicant = enrich_features(applicant_raw)
+    timer.lap("enrich_features")
+    return predict_enriched(applicant, pipeline, timer)
 
-   
+
+def predict_enriched(applicant, pipeline=None, timer=NULL_TIMER):
+    """
+    predict_applicant for an applicant that already went through enrich_features.
+    """
     model_prob = None
     if pipeline is not None:
+        layout = _layout_for(pipeline)
+        if layout is not None and hasattr(pipeline, "predict_proba_buffers"):
+            row = layout.fill(applicant)
+        else:
+            row = layout.frame(applicant) if layout is not None else pd.DataFrame([applicant])
+        timer.lap("build_row")
+        model_prob = _model_probability(row, pipeline)
+        timer.lap("predict_proba")
+
+    result = _build_result(applicant, model_prob)
+    timer.lap("rules")
+    return result
+
+
+# Batch Entry 
+def enrich_features_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Column-wise version of enrich_features: one row per applicant. Also takes
+    a dict of (N,) arrays and returns a new dict, which is what small batches
+    use: building a DataFrame costs more than the arithmetic at that size.
+    """
+    out = frame.copy()
+    income = np.maximum(out["income_monthly"], 1)
+
+    out["loan_to_value"] = out["mortgage_balance"] / np.maximum(out["property_value"], 1)
+    out["equity"] = out["property_value"] - out["mortgage_balance"]
+    out["gds_ratio"] = out["monthly_payment_current"] / income
+    out["tds_ratio"] = (out["monthly_payment_current"] + out["debt_payments_monthly"]) / income
+    out["age_plus_amort"] = out["age"] + out["amortization_remaining"]
+
+    surplus = out["income_monthly"] - (
+        out["monthly_payment_current"]
+        + out["expenses_monthly"]
+        + out["debt_payments_monthly"]
+    )
+    out["surplus_share"] = surplus / income
+
+    return out
+
+
+def predict_applicants(applicants_raw, pipeline=None):
+    """
+    Batch predict_applicant: one enrichment pass and one predict_proba call.
+    Results come back in input order and match the single-item path.
+    """
+    if not applicants_raw:
+        return []
+
+    n = len(applicants_raw)
+    layout = _layout_for(pipeline) if pipeline is not None else None
+    buffers = None
+    if layout is not None and hasattr(pipeline, "predict_proba_buffers"):
+        # Compiled pipelines take plain arrays; skip the DataFrame round trip.
+        columns = enrich_features_frame(
+            {key: np.asarray([a[key] for a in applicants_raw]) for key in applicants_raw[0]}
+        )
+        buffers = layout.fill_columns(columns, n)
+        applicants = [dict(zip(columns, row)) for row in zip(*(c.tolist() for c in columns.values()))]
+    else:
+        frame = enrich_features_frame(pd.DataFrame(list(applicants_raw)))
+        applicants = frame.to_dict("records")
+
+    model_probs = [None] * n
+    if pipeline is not None:
+        try:
+            if buffers is not None:
+                model_probs = pipeline.predict_proba_buffers(*buffers)[:, 1].tolist()
+            else:
+                model_probs = pipeline.predict_proba(frame)[:, 1].tolist()
+        except Exception:
+            # Isolate the failing rows the same way the single path would.
+            rows = (
+                tuple(b[i:i + 1] for b in buffers) if buffers is not None else frame.iloc[[i]]
+                for i in range(n)
+            )
+            model_probs = [_model_probability(r, pipeline) for r in rows]
+
+    return [_build_result(a, p) for a, p in zip(applicants, model_probs)]
+
+
+def _column(frame: pd.DataFrame, name: str, default: float = 0.0) -> np.ndarray:
+    if name in frame.columns:
+        return frame[name].to_numpy(dtype=float)
+    return np.full(len(frame), default, dtype=float)
+
+
+def rule_based_predict_frame(frame: pd.DataFrame) -> dict:
+    """
+    Array form of rule_based_predict for an enriched frame, without the reason
+    text: (N,) "decision", "probability" and "rate_type".
+    """
+    n = len(frame)
+    credit = _column(frame, "credit_score")
+    ltv = _column(frame, "loan_to_value")
+    age_plus_amort = _column(frame, "age_plus_amort")
+    gds = _column(frame, "gds_ratio")
+    tds = _column(frame, "tds_ratio")
+    surplus_share = _column(frame, "surplus_share")
+    equity = _column(frame, "equity")
+    stability = _column(frame, "pref_stability")
+    flex_risk = np.maximum(_column(frame, "pref_flexibility"), _column(frame, "pref_risk_tolerance"))
+    steady = _column(frame, "steady_payment") == 1
+    if "employment_type" in frame.columns:
+        stable_job = frame["employment_type"].astype(str).str.lower().isin(["full_time", "permanent"]).to_numpy()
+    else:
+        stable_job = np.zeros(n, dtype=bool)
+
+    # Hard Fails
+    fail = (
+        (credit < MIN_CREDIT_SCORE) | (ltv > MAX_LOAN_TO_VALUE) | (age_plus_amort > MAX_AGE_PLUS_AMORT)
+        | (gds > MAX_GDS_RATIO) | (tds > MAX_TDS_RATIO) | (_column(frame, "income_monthly") <= 0)
+    )
+
+    # Strong preferences
+    prefer_fixed = stability >= 0.7
+    prefer_variable = ~prefer_fixed & (flex_risk >= 0.7) & (surplus_share > 0.1) & steady
+
+    # Weighted Scoring, added up in the same order as the dict version
+    fixed_score = stability * 15
+    fixed_score = fixed_score + np.where(surplus_share > 0.2, 0, 8)
+    fixed_score = fixed_score + np.where((gds > 0.4) | (tds > 0.55), 7, 0)
+    fixed_score = fixed_score + np.where(stable_job & steady, 0, 5)
+    fixed_score = fixed_score + np.where(age_plus_amort > 65, 6, 0)
+    variable_score = (_column(frame, "pref_flexibility") + _column(frame, "pref_risk_tolerance")) * 12
+    variable_score = variable_score + np.where(surplus_share > 0.2, 10, 0)
+    variable_score = variable_score + np.where(stable_job & steady, 6, 0)
+    variable_score = variable_score + np.where(equity > 150000, 5, 0)
+    fixed = fixed_score >= variable_score
+
+    # Dynamic Approval
+    diff = np.abs(fixed_score - variable_score)
+    conf = np.where(diff >= 15, 0.9, np.where(diff >= 8, 0.8, 0.7))
+    conf = conf + np.where(fixed & prefer_fixed, 0.05, np.where(~fixed & (flex_risk >= 0.7), 0.05, 0))
+    conf = conf - np.where(fixed & (flex_risk >= 0.7), 0.1, np.where(~fixed & prefer_fixed, 0.1, 0))
+    conf = np.minimum(0.99, np.maximum(0.6, conf))
+
+    strong = prefer_fixed | prefer_variable
+    conf = np.where(strong, 0.95, conf)
+    rate_type = np.where(prefer_fixed | (~prefer_variable & fixed), "Fixed", "Variable").astype(object)
+
+    rate_type[fail] = "N/A"
+    return {
+        "decision": np.where(fail, "FAIL", "PASS").astype(object),
+        "probability": np.where(fail, 0.0, conf),
+        "rate_type": rate_type,
+    }
+
+
+def predict_frame(frame: pd.DataFrame, pipeline=None) -> dict:
+    """
+    predict_applicants for column-oriented input, without the reason text:
+    (N,) "decision", "approval_probability" and "rate_type".
+    """
+    frame = enrich_features_frame(frame)
+    rules = rule_based_predict_frame(frame)
+    n = len(frame)
+    model_probs = np.full(n, np.nan)
+    if pipeline is not None and n:
+        layout = _layout_for(pipeline)
+        buffers = None
+        if layout is not None and hasattr(pipeline, "predict_proba_buffers"):
+            buffers = layout.fill_columns(frame, n)
         try:
-            row = pd.DataFrame([applicant])
-            model_prob = float(pipeline.predict_proba(row)[:, 1][0])
+            if buffers is not None:
+                model_probs = np.asarray(pipeline.predict_proba_buffers(*buffers)[:, 1], dtype=float)
+            else:
+                model_probs = np.asarray(pipeline.predict_proba(frame)[:, 1], dtype=float)
         except Exception:
-            model_prob = None
+            # Isolate the failing rows the same way the single path would.
+            for i in range(n):
+                rows = tuple(b[i:i + 1] for b in buffers) if buffers is not None else frame.iloc[[i]]
+                p = _model_probability(rows, pipeline)
+                model_probs[i] = np.nan if p is None else p
+
+    prob = np.where(np.isnan(model_probs), rules["probability"], model_probs)
+    prob = np.where(rules["decision"] == "FAIL", 0.0, prob)
+    return {
+        "decision": rules["decision"],
+        "approval_probability": np.round(prob, 3),
+        "rate_type": rules["rate_type"],
+    }
+
+
+_layouts = weakref.WeakKeyDictionary()
+
+
+def _layout_for(pipeline):
+    try:
+        return _layouts[pipeline]
+    except KeyError:
+        layout = _layouts[pipeline] = RowLayout.from_pipeline(pipeline)
+        return layout
+    except TypeError:
+        return None
+
+
+def _model_probability(rows, pipeline):
+    try:
+        if isinstance(rows, tuple):
+            return float(pipeline.predict_proba_buffers(*rows)[:, 1][0])
+        return float(pipeline.predict_proba(rows)[:, 1][0])
+    except Exception:
+        return None
+
 
+def _build_result(applicant, model_prob):
     # Apply rules
     decision, rules_prob, reasons, rate_type, rate_reasons = rule_based_predict(applicant)
 
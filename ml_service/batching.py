@@ -0,0 +1,193 @@
+from __future__ import annotations
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+HISTOGRAM_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class QueueFullError(RuntimeError):
+    """Raised by submit() when the batcher already holds max_queue pending items."""
+
+
+class BatcherClosedError(RuntimeError):
+    """Raised for items submitted to a closed batcher, or still queued when it closed."""
+
+
+# Micro Batcher
+class MicroBatcher:
+    """
+    Collects single-item requests from many threads and runs them through
+    batch_fn(items) -> results (same order) as one call. A batch closes after
+    window_ms from its first item or at max_batch items, whichever comes first.
+
+    The worker thread starts on first use, so a batcher created before a fork
+    starts fresh in each child. on_batch(size) is called for every batch run.
+    """
+
+    def __init__(self, batch_fn, window_ms: float = 2.0, max_batch: int = 32,
+                 max_queue: int = 1024, name: str = "batcher", on_batch=None):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.batch_fn = batch_fn
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_queue = max_queue
+        self.name = name
+        self.on_batch = on_batch
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+        self.failures = 0
+        self._histogram = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+
+    def submit_async(self, item) -> Future:
+        self._ensure_started()
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise BatcherClosedError(f"{self.name} is closed")
+            try:
+                self._queue.put_nowait((item, future))
+            except queue.Full:
+                self.rejected += 1
+                raise QueueFullError(f"{self.name}: {self.max_queue} requests already queued")
+        return future
+
+    def submit(self, item, timeout: float | None = None):
+        """
+        Blocking submit for sync handlers; raises whatever batch_fn raised for this item.
+        """
+        return self.submit_async(item).result(timeout)
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if not self._closed and (self._thread is None or not self._thread.is_alive()):
+                self._stopping = False
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def close(self, timeout: float = 5.0):
+        """
+        Stop the worker once the items already queued have run. Later submits
+        raise BatcherClosedError, as do queued items that no worker is left to
+        run (a batcher inherited across a fork).
+        """
+        with self._lock:
+            self._closed = True
+            self._stopping = True
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            self._fail_pending()
+            return
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass  # the worker stops when it finds the queue empty
+        thread.join(timeout)
+
+    def _fail_pending(self):
+        while True:
+            try:
+                entry = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if entry is not None:
+                entry[1].set_exception(BatcherClosedError(f"{self.name} closed before this item ran"))
+
+    def _run(self):
+        while True:
+            try:
+                # Once closing, run whatever is still queued, then stop.
+                first = self._queue.get_nowait() if self._stopping else self._queue.get()
+            except queue.Empty:
+                return
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    pending = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if pending is None:
+                    self._stopping = True
+                    break
+                batch.append(pending)
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            results = self.batch_fn(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"{self.name}: batch_fn returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            if len(batch) == 1:
+                self._record(1, failed=True)
+                batch[0][1].set_exception(e)
+                return
+            # Re-run one by one so a single bad item doesn't fail its neighbours.
+            for entry in batch:
+                self._dispatch([entry])
+            return
+
+        self._record(len(batch))
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _record(self, size: int, failed: bool = False):
+        if self.on_batch is not None:
+            self.on_batch(size)
+        bucket = next((i for i, le in enumerate(HISTOGRAM_BUCKETS) if size <= le), len(HISTOGRAM_BUCKETS))
+        with self._lock:
+            self.batches += 1
+            self.items += size
+            self.failures += failed
+            self._histogram[bucket] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            labels = [str(le) for le in HISTOGRAM_BUCKETS] + ["+Inf"]
+            return {
+                "window_ms": self.window * 1000.0,
+                "max_batch": self.max_batch,
+                "max_queue": self.max_queue,
+                "queue_depth": self._queue.qsize(),
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+                "rejected": self.rejected,
+                "failures": self.failures,
+                # Non-cumulative: batches whose size falls in (previous bucket, le].
+                "batch_size_histogram": dict(zip(labels, self._histogram)),
+            }
+
+
+def batcher_from_env(batch_fn, name: str, on_batch=None):
+    """
+    MicroBatcher configured from ML_MICROBATCH_* variables, or None unless
+    ML_MICROBATCH=1.
+    """
+    if os.getenv("ML_MICROBATCH", "0").lower() not in ("1", "true", "yes"):
+        return None
+    return MicroBatcher(
+        batch_fn,
+        window_ms=float(os.getenv("ML_MICROBATCH_WINDOW_MS", "2")),
+        max_batch=int(os.getenv("ML_MICROBATCH_MAX_BATCH", "32")),
+        max_queue=int(os.getenv("ML_MICROBATCH_MAX_QUEUE", "1024")),
+        name=name,
+        on_batch=on_batch,
+    )
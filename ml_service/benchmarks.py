@@ -0,0 +1,273 @@
+"""
+Hot-path benchmarks for the ML service.
+
+    python -m ml_service.benchmarks                      # run, compare with the stored baseline
+    python -m ml_service.benchmarks --save-baseline      # record a new baseline
+    python -m ml_service.benchmarks --sizes 1,100 --only approval --max-slowdown 0.5
+
+Every benchmark runs at each batch size on the same seeded synthetic applicants.
+Results are written as JSON, and the exit status is 1 if any benchmark's time per
+item is more than --max-slowdown slower than the baseline.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BASE_DIR, "benchmark_baseline.json")
+DEFAULT_SIZES = (1, 100, 10_000)
+HTTP_MAX_SIZE = 1_000  # one request per applicant; 10k requests adds little
+
+try:
+    from .synthetic import generate_applicants
+except ImportError:
+    from synthetic import generate_applicants
+
+
+class BenchmarkContext:
+    """
+    Lazily imported modules and loaded models, shared by every benchmark.
+    """
+
+    def __init__(self):
+        try:
+            from . import app as app_module
+            from . import approval, strategy
+            from .logs import RequestLoggingMiddleware
+        except ImportError:
+            import app as app_module
+            import approval
+            import strategy
+            from logs import RequestLoggingMiddleware
+        self.app_module = app_module
+        self.approval = approval
+        self.strategy = strategy
+        self.models = app_module.models.load()
+        self._client = None
+
+        # Measure the model path, not the prediction cache or log I/O. The app is
+        # already configured by now, so switch those off on its objects; close()
+        # puts them back.
+        cache = app_module.prediction_cache
+        self._cache_entries = cache.max_entries
+        cache.max_entries = 0
+        self._logging = [m for m in app_module.app.user_middleware if m.cls is RequestLoggingMiddleware]
+        self._logging_kwargs = [dict(m.kwargs) for m in self._logging]
+        for middleware in self._logging:
+            middleware.kwargs.update(sample_rate=0.0, slow_ms=float("inf"))
+        app_module.app.middleware_stack = None  # rebuilt with these settings on the next request
+
+    def close(self):
+        self.app_module.prediction_cache.max_entries = self._cache_entries
+        for middleware, kwargs in zip(self._logging, self._logging_kwargs):
+            middleware.kwargs.clear()
+            middleware.kwargs.update(kwargs)
+        self.app_module.app.middleware_stack = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from fastapi.testclient import TestClient
+
+            self._client = TestClient(self.app_module.app)
+        return self._client
+
+
+# Benchmarks: name -> (make(ctx, applicants) -> run(), max batch size)
+def _approval_enrich(ctx, applicants):
+    enrich = ctx.approval.enrich_features
+    return lambda: [enrich(a) for a in applicants]
+
+
+def _approval_rules(ctx, applicants):
+    enriched = [ctx.approval.enrich_features(a) for a in applicants]
+    rules = ctx.approval.rule_based_predict
+    return lambda: [rules(a) for a in enriched]
+
+
+def _approval_predict(ctx, applicants):
+    predict, pipeline = ctx.approval.predict_applicant, ctx.models.approval_pipeline
+    return lambda: [predict(a, pipeline) for a in applicants]
+
+
+def _approval_predict_batch(ctx, applicants):
+    predict, pipeline = ctx.approval.predict_applicants, ctx.models.approval_pipeline
+    return lambda: predict(applicants, pipeline)
+
+
+def _strategy_enrich(ctx, applicants):
+    enrich = ctx.strategy.enrich_features
+    return lambda: [enrich(a) for a in applicants]
+
+
+def _strategy_prepare_row(ctx, applicants):
+    enriched = [ctx.strategy.enrich_features(a) for a in applicants]
+    prepare = ctx.models.wrapper.prepare_row
+    return lambda: [prepare(a) for a in enriched]
+
+
+def _strategy_predict(ctx, applicants):
+    predict = ctx.models.wrapper.predict_with_rules
+    return lambda: [predict(a) for a in applicants]
+
+
+def _strategy_predict_batch(ctx, applicants):
+    predict = ctx.models.wrapper.predict_many_with_rules
+    return lambda: predict(applicants)
+
+
+def _http(path):
+    def make(ctx, applicants):
+        post = ctx.client.post
+        return lambda: [post(path, json=a) for a in applicants]
+    return make
+
+
+def _http_approval_batch(ctx, applicants):
+    post = ctx.client.post
+    return lambda: post("/predict/approval/batch", json={"applicants": applicants})
+
+
+BENCHMARKS = {
+    "approval.enrich_features": (_approval_enrich, None),
+    "approval.rule_based_predict": (_approval_rules, None),
+    "approval.predict_applicant": (_approval_predict, None),
+    "approval.predict_applicants": (_approval_predict_batch, None),
+    "strategy.enrich_features": (_strategy_enrich, None),
+    "strategy.prepare_row": (_strategy_prepare_row, None),
+    "strategy.predict_with_rules": (_strategy_predict, None),
+    "strategy.predict_many_with_rules": (_strategy_predict_batch, None),
+    "http.predict_approval": (_http("/predict/approval"), HTTP_MAX_SIZE),
+    "http.predict_strategy": (_http("/predict/strategy"), HTTP_MAX_SIZE),
+    "http.predict_approval_batch": (_http_approval_batch, None),
+}
+
+
+def _time(run, repeats: int, min_time: float):
+    run()  # warm-up
+    samples = []
+    started = time.perf_counter()
+    while len(samples) < repeats or (time.perf_counter() - started < min_time and len(samples) < 50):
+        t0 = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def run_suite(sizes=DEFAULT_SIZES, only=None, repeats: int = 3, min_time: float = 0.2,
+              seed: int = 0, progress=None) -> dict:
+    ctx = BenchmarkContext()
+    pool = generate_applicants(max(sizes), seed=seed)
+    results = {}
+    try:
+        for name, (make, max_size) in BENCHMARKS.items():
+            if only and not any(part in name for part in only):
+                continue
+            for size in sizes:
+                if max_size is not None and size > max_size:
+                    continue
+                samples = _time(make(ctx, pool[:size]), repeats, min_time)
+                median = statistics.median(samples)
+                results[f"{name}@{size}"] = {
+                    "benchmark": name,
+                    "size": size,
+                    "repeats": len(samples),
+                    "median_s": median,
+                    "min_s": min(samples),
+                    "per_item_us": median / size * 1e6,
+                    "items_per_s": size / median,
+                }
+                if progress:
+                    progress(results[f"{name}@{size}"])
+    finally:
+        ctx.close()
+    return {"meta": _environment(seed), "results": results}
+
+
+def _environment(seed) -> dict:
+    import numpy
+    import pandas
+    import sklearn
+    import xgboost
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "scikit-learn": sklearn.__version__,
+        "xgboost": xgboost.__version__,
+        "seed": seed,
+    }
+
+
+def compare(current: dict, baseline: dict, max_slowdown: float) -> list:
+    """
+    Rows of (key, baseline us/item, current us/item, ratio, regressed) for
+    benchmarks present in both runs.
+    """
+    rows = []
+    for key, result in current["results"].items():
+        base = baseline.get("results", {}).get(key)
+        if base is None:
+            continue
+        ratio = result["per_item_us"] / base["per_item_us"]
+        rows.append((key, base["per_item_us"], result["per_item_us"], ratio, ratio > 1.0 + max_slowdown))
+    return rows
+
+
+def _print_result(result):
+    print(f"{result['benchmark'] + '@' + str(result['size']):45s} "
+          f"{result['per_item_us']:12.2f} us/item {result['items_per_s']:14.0f} items/s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the ML service hot paths.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--only", action="append", help="substring filter on benchmark names (repeatable)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds to keep repeating small cases")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--max-slowdown", type=float, default=0.25, help="allowed fractional slowdown per item")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results to --baseline")
+    args = parser.parse_args(argv)
+
+    sizes = tuple(int(s) for s in args.sizes.split(","))
+    report = run_suite(sizes, args.only, args.repeats, args.min_time, args.seed, progress=_print_result)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.out}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"saved baseline {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(report, baseline, args.max_slowdown)
+    print(f"\n{'benchmark':45s} {'baseline':>12s} {'current':>12s} {'ratio':>7s}")
+    for key, base, cur, ratio, regressed in rows:
+        print(f"{key:45s} {base:12.2f} {cur:12.2f} {ratio:7.2f}{'  REGRESSION' if regressed else ''}")
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {args.max_slowdown:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
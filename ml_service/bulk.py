@@ -0,0 +1,205 @@
+"""
+Columnar bulk scoring: an Arrow IPC stream or a Parquet file in, the same format out.
+
+    curl -X POST localhost:8000/predict/bulk \
+         -H 'Content-Type: application/vnd.apache.arrow.stream' --data-binary @book.arrows
+
+The upload is checked against the Applicant schema once per column (presence
+and type) instead of once per row, and the columns go straight into the
+vectorized enrichment, rules and model calls. Numeric columns that are already
+float64 without nulls are read from the upload's buffer without a copy.
+
+A null in a required column only fails that row: it gets an "error" value and
+no scores, like an invalid item in /predict/approval/batch. Columns that are not
+Applicant fields (a loan id, say) are passed through to the output unchanged.
+Reason text is left out; use /predict/full for one applicant's explanation.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+try:
+    from .approval import predict_frame
+except ImportError:
+    from approval import predict_frame
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+PARQUET = "application/vnd.apache.parquet"
+MEDIA_TYPES = {
+    ARROW_STREAM: "arrow",
+    "application/vnd.apache.arrow.file": "arrow",
+    PARQUET: "parquet",
+    "application/x-parquet": "parquet",
+}
+RESPONSE_TYPES = {"arrow": ARROW_STREAM, "parquet": PARQUET}
+
+
+class BulkError(ValueError):
+    """Raised for an upload that can't be scored at all (unreadable, wrong column types)."""
+
+
+def detect_format(content_type: str | None, body: bytes) -> str:
+    """
+    "arrow" or "parquet", from the Content-Type or else the file's magic bytes.
+    """
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in MEDIA_TYPES:
+        return MEDIA_TYPES[media_type]
+    if body[:4] == b"PAR1":
+        return "parquet"
+    if body[:6] == b"ARROW1" or body[:4] == b"\xff\xff\xff\xff":
+        return "arrow"
+    raise BulkError(f"send an Arrow IPC stream ({ARROW_STREAM}) or a Parquet file ({PARQUET})")
+
+
+# Input
+def read_table(body: bytes, fmt: str):
+    import pyarrow as pa
+
+    source = pa.py_buffer(body)  # wraps the request bytes, no copy
+    try:
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+
+            return pq.read_table(pa.BufferReader(source))
+        if body[:6] == b"ARROW1":
+            return pa.ipc.open_file(source).read_all()
+        return pa.ipc.open_stream(source).read_all()
+    except (pa.ArrowInvalid, OSError) as e:
+        raise BulkError(f"can't read {fmt} upload: {e}")
+
+
+def _column_type(field) -> str:
+    return {int: "integer", float: "number", str: "string"}.get(field.annotation, "any")
+
+
+def validate_columns(table, schema) -> tuple:
+    """
+    (columns, invalid) for the schema's fields. columns maps each field to an
+    (N,) array: float64 for numbers, object for strings. invalid maps row index
+    -> missing field names, for rows with nulls. Raises BulkError for missing
+    required columns and columns of the wrong type.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    n = table.num_rows
+    problems, columns = [], {}
+    null_rows = {}
+    for name, field in schema.model_fields.items():
+        kind = _column_type(field)
+        if name not in table.column_names:
+            if field.is_required():
+                problems.append(f"{name}: missing column")
+            elif kind == "string":
+                columns[name] = np.full(n, field.default, dtype=object)
+            else:
+                columns[name] = np.full(n, field.default, dtype=float)
+            continue
+
+        column = table.column(name)
+        dtype = column.type
+        if pa.types.is_dictionary(dtype):
+            column, dtype = column.cast(dtype.value_type), dtype.value_type
+        if kind == "string":
+            if not (pa.types.is_string(dtype) or pa.types.is_large_string(dtype)):
+                problems.append(f"{name}: expected string, got {dtype}")
+                continue
+        elif pa.types.is_integer(dtype) or (kind == "number" and pa.types.is_floating(dtype)):
+            pass
+        elif kind == "integer" and pa.types.is_floating(dtype):
+            # Like pydantic: 3.0 is an integer, 3.5 is not.
+            whole = pc.equal(column, pc.floor(column))
+            if not pc.all(whole, skip_nulls=True).as_py():
+                problems.append(f"{name}: expected integer, got fractional values")
+                continue
+        else:
+            problems.append(f"{name}: expected {kind}, got {dtype}")
+            continue
+
+        if column.null_count:
+            for i in np.flatnonzero(column.is_null().to_numpy(zero_copy_only=False)):
+                null_rows.setdefault(int(i), []).append(name)
+            if not field.is_required():
+                column = pc.fill_null(column, field.default)
+        # One contiguous array per column; a single-chunk column is used as is.
+        column = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+        if kind == "string":
+            columns[name] = column.to_numpy(zero_copy_only=False)
+        else:
+            columns[name] = column.cast(pa.float64()).to_numpy(zero_copy_only=False)
+
+    if problems:
+        raise BulkError("; ".join(problems))
+    invalid = {i: names for i, names in null_rows.items()
+               if any(schema.model_fields[name].is_required() for name in names)}
+    return columns, invalid
+
+
+# Scoring
+def score_columns(columns: dict, models) -> dict:
+    """
+    Approval and strategy outputs as (N,) arrays, the columns of
+    portfolio.score_records without the reason text.
+    """
+    import pandas as pd
+
+    models.load()
+    frame = pd.DataFrame(columns, copy=False)
+    approvals = predict_frame(frame, models.approval_pipeline)
+    strategies, probs = models.wrapper.decide_frame(frame)
+    out = {
+        "approval_decision": approvals["decision"],
+        "approval_probability": approvals["approval_probability"],
+        "rate_type": approvals["rate_type"],
+        "strategy": strategies,
+    }
+    for j, cls in enumerate(models.wrapper.classes):
+        out[f"strategy_prob_{cls}"] = np.round(np.asarray(probs[:, j], dtype=float), 6)
+    return out
+
+
+def score_table(table, models, schema):
+    """
+    Output table: pass-through columns, scores, and an "error" column (null
+    for rows that were scored).
+    """
+    import pyarrow as pa
+
+    columns, invalid = validate_columns(table, schema)
+    n = table.num_rows
+    keep = np.ones(n, dtype=bool)
+    keep[list(invalid)] = False
+    if not keep.all():
+        columns = {name: values[keep] for name, values in columns.items()}
+    scores = score_columns(columns, models)
+
+    out = {name: table.column(name) for name in table.column_names if name not in schema.model_fields}
+    for name, values in scores.items():
+        dtype = pa.string() if values.dtype == object else pa.float64()
+        if keep.all():
+            out[name] = pa.array(values, type=dtype)
+            continue
+        full = np.empty(n, dtype=values.dtype)
+        full[keep] = values
+        out[name] = pa.array(full, mask=~keep, type=dtype)
+    errors = np.full(n, None, dtype=object)
+    for i, names in invalid.items():
+        errors[i] = f"invalid applicant: {', '.join(sorted(names))}"
+    out["error"] = pa.array(errors, type=pa.string())
+    return pa.table(out)
+
+
+# Output
+def write_table(table, fmt: str) -> bytes:
+    import pyarrow as pa
+
+    sink = pa.BufferOutputStream()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,230 @@
+from __future__ import annotations
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .logs import logger
+    from .rows import RowLayout
+    from .trees import FlatTreeEnsemble
+except ImportError:
+    from logs import logger
+    from rows import RowLayout
+    from trees import FlatTreeEnsemble
+
+
+PREPROCESS_MODES = ("compiled", "sklearn", "verify")
+
+
+class CompilationError(ValueError):
+    """Raised when a fitted preprocess step can't be replayed as a flat plan."""
+
+
+# Compiled Pipeline
+class CompiledPipeline:
+    """
+    Replays a fitted 'preprocess' ColumnTransformer as one vectorized NumPy pass
+    (index map + scale/shift vectors + one-hot lookup) and feeds the result to
+    the XGBoost booster directly. Batches of up to flat_max_batch rows go through
+    a FlatTreeEnsemble instead of native XGBoost (0 disables it).
+
+    mode="sklearn" runs the original pipeline, mode="verify" runs both and falls
+    back to the sklearn output (with a RuntimeWarning) if they differ by more
+    than atol.
+    """
+
+    def __init__(self, pipeline, mode: str = "compiled", atol: float = 1e-6, flat_max_batch: int = 4):
+        if mode not in PREPROCESS_MODES:
+            raise ValueError(f"mode must be one of {PREPROCESS_MODES}, got {mode!r}")
+        self.pipeline = pipeline
+        self.mode = mode
+        self.atol = atol
+        self.mismatches = 0
+
+        try:
+            preprocess = pipeline.named_steps["preprocess"]
+        except (AttributeError, KeyError):
+            raise CompilationError("pipeline has no 'preprocess' step")
+        self.model = pipeline.steps[-1][1]
+        if not hasattr(self.model, "get_booster"):
+            raise CompilationError("final estimator is not an XGBoost model")
+        if getattr(preprocess, "sparse_output_", False):
+            # XGBoost reads implicit zeros of a sparse matrix as missing.
+            raise CompilationError("sparse ColumnTransformer output is not supported")
+
+        self.layout = RowLayout.from_pipeline(pipeline)
+        if self.layout is None:
+            raise CompilationError("preprocess columns can't be resolved by name")
+        self._compile(preprocess)
+
+        self.booster = self.model.get_booster()
+        best_iteration = getattr(self.model, "best_iteration", None)
+        self._iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+        self.classes_ = self.model.classes_
+
+        self.flat_max_batch = flat_max_batch
+        self.flat = None
+        if flat_max_batch > 0:
+            try:
+                self.flat = FlatTreeEnsemble.from_booster(self.booster, self._iteration_range)
+            except ValueError as e:
+                logger.warning("flat tree predictor disabled", extra={"fields": {"reason": str(e)}})
+
+    # Pipeline look-alike attributes, so callers can treat this as the pipeline.
+    @property
+    def named_steps(self):
+        return self.pipeline.named_steps
+
+    @property
+    def steps(self):
+        return self.pipeline.steps
+
+    @property
+    def feature_names_in_(self):
+        return self.pipeline.feature_names_in_
+
+    def _compile(self, preprocess):
+        numeric_index = {c: i for i, c in enumerate(self.layout.numeric_columns)}
+        categorical_index = {c: i for i, c in enumerate(self.layout.categorical_columns)}
+        num_in, num_out, shift, scale = [], [], [], []
+        onehot = []
+        out = 0
+
+        for name, transformer, cols in preprocess.transformers_:
+            if name == "remainder" or transformer == "drop":
+                continue
+            cols = [cols] if isinstance(cols, str) else list(cols)
+
+            if hasattr(transformer, "categories_"):
+                if transformer.drop_idx_ is not None or getattr(transformer, "_infrequent_enabled", False):
+                    raise CompilationError(f"{name}: dropped/infrequent categories are not supported")
+                for col, categories in zip(cols, transformer.categories_):
+                    lookup = {c: out + k for k, c in enumerate(categories)}
+                    ignore = transformer.handle_unknown != "error"
+                    onehot.append((categorical_index[col], categories, lookup, out, ignore))
+                    out += len(categories)
+                continue
+
+            if hasattr(transformer, "mean_") and hasattr(transformer, "scale_"):
+                col_shift = transformer.mean_ if transformer.with_mean else np.zeros(len(cols))
+                col_scale = transformer.scale_ if transformer.with_std else np.ones(len(cols))
+            elif transformer == "passthrough" or (
+                hasattr(transformer, "func") and transformer.func is None
+            ):
+                col_shift, col_scale = np.zeros(len(cols)), np.ones(len(cols))
+            else:
+                raise CompilationError(f"{name}: unsupported transformer {transformer!r}")
+
+            for j, col in enumerate(cols):
+                num_in.append(numeric_index[col])
+                num_out.append(out)
+                shift.append(col_shift[j])
+                scale.append(col_scale[j])
+                out += 1
+
+        expected = len(preprocess.get_feature_names_out())
+        if out != expected:
+            raise CompilationError(f"compiled {out} output columns, preprocess produces {expected}")
+
+        self.n_features_out = out
+        self._num_in = np.asarray(num_in, dtype=np.intp)
+        self._num_out = np.asarray(num_out, dtype=np.intp)
+        self._shift = np.asarray(shift, dtype=float)
+        self._scale = np.asarray(scale, dtype=float)
+        self._onehot = onehot
+
+    def transform_buffers(self, numeric, categorical) -> np.ndarray:
+        """
+        Apply the compiled plan to (N, n_numeric) floats and (N, n_categorical) objects.
+        """
+        n = numeric.shape[0]
+        X = np.zeros((n, self.n_features_out), dtype=float)
+        X[:, self._num_out] = (numeric[:, self._num_in] - self._shift) / self._scale
+
+        for col, categories, lookup, offset, ignore in self._onehot:
+            values = categorical[:, col]
+            if n == 1:
+                codes = np.array([lookup.get(values[0], -1)])
+            else:
+                codes = pd.Index(categories).get_indexer(values)
+                codes = np.where(codes >= 0, codes + offset, -1)
+            known = codes >= 0
+            if not ignore and not known.all():
+                raise ValueError(f"Found unknown categories {set(values[~known])} during transform")
+            X[np.flatnonzero(known), codes[known]] = 1.0
+        return X
+
+    def transform(self, frame: pd.DataFrame) -> np.ndarray:
+        return self.transform_buffers(*self._frame_buffers(frame))
+
+    def _frame_buffers(self, frame):
+        numeric = frame[self.layout.numeric_columns].to_numpy(dtype=float)
+        categorical = frame[self.layout.categorical_columns].to_numpy(dtype=object)
+        return numeric, categorical
+
+    def _booster_proba(self, X: np.ndarray) -> np.ndarray:
+        # Small batches are dominated by XGBoost's per-call overhead.
+        if self.flat is not None and X.shape[0] <= self.flat_max_batch:
+            preds = self.flat.predict(X)
+        else:
+            preds = self.booster.inplace_predict(
+                X, iteration_range=self._iteration_range, validate_features=False
+            )
+        if preds.ndim == 1:
+            # Same float32 arithmetic as XGBClassifier.predict_proba for binary.
+            return np.vstack((1.0 - preds, preds)).transpose()
+        return preds
+
+    def predict_proba_buffers(self, numeric, categorical) -> np.ndarray:
+        if self.mode == "sklearn":
+            return self.pipeline.predict_proba(self._buffers_frame(numeric, categorical))
+        probs = self._booster_proba(self.transform_buffers(numeric, categorical))
+        if self.mode == "verify":
+            return self._verified(probs, self.pipeline.predict_proba(self._buffers_frame(numeric, categorical)))
+        return probs
+
+    def predict_proba(self, frame: pd.DataFrame) -> np.ndarray:
+        if self.mode == "sklearn":
+            return self.pipeline.predict_proba(frame)
+        probs = self._booster_proba(self.transform(frame))
+        if self.mode == "verify":
+            return self._verified(probs, self.pipeline.predict_proba(frame))
+        return probs
+
+    def predict(self, frame: pd.DataFrame) -> np.ndarray:
+        return np.asarray(self.classes_)[self.predict_proba(frame).argmax(axis=1)]
+
+    def _buffers_frame(self, numeric, categorical) -> pd.DataFrame:
+        row = pd.DataFrame(numeric, columns=self.layout.numeric_columns)
+        for j, col in enumerate(self.layout.categorical_columns):
+            row[col] = categorical[:, j]
+        return row
+
+    def _verified(self, compiled, reference):
+        if not np.allclose(compiled, reference, rtol=0.0, atol=self.atol):
+            self.mismatches += 1
+            diff = float(np.max(np.abs(compiled - reference)))
+            warnings.warn(
+                f"Compiled preprocess differs from sklearn by {diff:.3g}; using sklearn output.",
+                RuntimeWarning,
+            )
+            return reference
+        return compiled
+
+
+def compile_pipeline(pipeline, mode: str | None = None, flat_max_batch: int | None = None):
+    """
+    Loader step: wrap a fitted pipeline in CompiledPipeline, or return it
+    unchanged if its preprocess step can't be compiled.
+    Defaults come from ML_PREPROCESS_MODE and ML_FLAT_MAX_BATCH.
+    """
+    mode = mode or os.getenv("ML_PREPROCESS_MODE", "compiled")
+    if flat_max_batch is None:
+        flat_max_batch = int(os.getenv("ML_FLAT_MAX_BATCH", "4"))
+    try:
+        return CompiledPipeline(pipeline, mode=mode, flat_max_batch=flat_max_batch)
+    except CompilationError as e:
+        logger.warning("using sklearn preprocess path", extra={"fields": {"reason": str(e)}})
+        return pipeline
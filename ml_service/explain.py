@@ -0,0 +1,153 @@
+from __future__ import annotations
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .rows import RowLayout
+except ImportError:
+    from rows import RowLayout
+
+
+def feature_groups(preprocess) -> tuple:
+    """
+    (input column names, output column -> input column index) for a fitted
+    ColumnTransformer, checked against get_feature_names_out(). One-hot columns
+    map back to the categorical column they came from.
+    """
+    names_out = list(preprocess.get_feature_names_out())
+    inputs, index = [], []
+    for name, transformer, cols in preprocess.transformers_:
+        if name == "remainder" or transformer == "drop":
+            continue
+        cols = [cols] if isinstance(cols, str) else list(cols)
+        categories = getattr(transformer, "categories_", None)
+        for j, col in enumerate(cols):
+            width = len(categories[j]) if categories is not None else 1
+            for k in range(width):
+                expected = f"{name}__{col}" if categories is None else f"{name}__{col}_{categories[j][k]}"
+                if len(index) >= len(names_out) or names_out[len(index)] != expected:
+                    raise ValueError(f"can't map {expected!r} onto get_feature_names_out()")
+                index.append(len(inputs))
+            inputs.append(col)
+    if len(index) != len(names_out):
+        raise ValueError(f"mapped {len(index)} of {len(names_out)} output columns")
+    return inputs, np.asarray(index, dtype=np.intp)
+
+
+# Tree Explainer
+class TreeExplainer:
+    """
+    Exact TreeSHAP attributions from XGBoost's native pred_contribs, summed back
+    onto the pipeline's input columns. Values are in margin (log-odds) units and
+    add up to the model's margin with base_value. For multi-class models the
+    explained class is the model's top class for that row.
+
+    Attributions are cached per transformed row, so identical inputs are only
+    explained once; a batch costs one native call for its uncached rows.
+    """
+
+    def __init__(self, pipeline, cache_entries: int | None = None):
+        self.pipeline = pipeline
+        self.preprocess = pipeline.named_steps["preprocess"]
+        model = pipeline.steps[-1][1]
+        self.booster = model.get_booster()
+        best_iteration = getattr(model, "best_iteration", None)
+        self._iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+        self.classes = [str(c) for c in model.classes_]
+        self.features, self._group = feature_groups(self.preprocess)
+        self._grouping = np.zeros((len(self._group), len(self.features)))
+        self._grouping[np.arange(len(self._group)), self._group] = 1.0
+        self.layout = getattr(pipeline, "layout", None) or RowLayout.from_pipeline(pipeline)
+
+        if cache_entries is None:
+            cache_entries = int(os.getenv("ML_EXPLAIN_CACHE_ENTRIES", "2048"))
+        self.cache_entries = cache_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def matrix(self, applicants: list) -> np.ndarray:
+        """
+        The transformed (N, n_features_out) matrix the booster sees.
+        """
+        if self.layout is not None and hasattr(self.pipeline, "transform_buffers"):
+            return self.pipeline.transform_buffers(*self.layout.fill_many(applicants))
+        frame = pd.DataFrame(list(applicants))
+        columns = getattr(self.pipeline, "feature_names_in_", None)
+        if columns is not None:
+            frame = frame.reindex(columns=list(columns), fill_value=0)
+        return np.asarray(self.preprocess.transform(frame), dtype=float)
+
+    def _native(self, X: np.ndarray) -> list:
+        import xgboost
+
+        contribs = self.booster.predict(
+            xgboost.DMatrix(X), pred_contribs=True, iteration_range=self._iteration_range,
+            validate_features=False,
+        )
+        if contribs.ndim == 2:
+            # Binary: a single margin, for the positive class.
+            rows, labels = contribs, [self.classes[-1]] * len(X)
+        else:
+            top = contribs.sum(axis=2).argmax(axis=1)
+            rows, labels = contribs[np.arange(len(X)), top], [self.classes[t] for t in top]
+        grouped = rows[:, :-1] @ self._grouping
+        return [(label, float(r[-1]), float(r.sum()), g) for label, r, g in zip(labels, rows, grouped)]
+
+    def attributions(self, applicants: list) -> list:
+        """
+        (class, base_value, margin, per-feature contributions) per applicant.
+        """
+        X = self.matrix(applicants)
+        keys = [hashlib.blake2b(row.tobytes(), digest_size=16).digest() for row in X]
+        out = [None] * len(keys)
+        with self._lock:
+            for i, key in enumerate(keys):
+                hit = self._cache.get(key)
+                if hit is not None:
+                    self._cache.move_to_end(key)
+                    out[i] = hit
+        missing = [i for i, value in enumerate(out) if value is None]
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        if missing:
+            computed = self._native(X[missing])
+            with self._lock:
+                for i, value in zip(missing, computed):
+                    out[i] = value
+                    if self.cache_entries > 0:
+                        self._cache[keys[i]] = value
+                        self._cache.move_to_end(keys[i])
+                while len(self._cache) > self.cache_entries:
+                    self._cache.popitem(last=False)
+        return out
+
+    def explain_many(self, applicants: list, top_k: int = 5) -> list:
+        """
+        Top-k drivers per applicant, largest absolute contribution first.
+        """
+        results = []
+        for cls, base, margin, contributions in self.attributions(applicants):
+            order = np.argsort(-np.abs(contributions), kind="stable")[:top_k]
+            results.append({
+                "class": cls,
+                "base_value": round(base, 6),
+                "margin": round(margin, 6),
+                "top_features": [
+                    {"feature": self.features[j], "contribution": round(float(contributions[j]), 6)}
+                    for j in order
+                ],
+            })
+        return results
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._cache), "max_entries": self.cache_entries,
+                    "hits": self.hits, "misses": self.misses}
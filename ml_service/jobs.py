@@ -0,0 +1,551 @@
+"""
+Asynchronous batch jobs, with job state and results in a local SQLite file.
+
+    POST /jobs                  {"applicants": [...]} or {"file": "book.parquet"}, optional "priority"
+    GET  /jobs/{id}             status and progress
+    GET  /jobs/{id}/results     scored rows so far (offset / limit)
+    POST /jobs/{id}/cancel
+
+Inline batches are split into chunks and stored with the job. File references
+(CSV or Parquet under the file root) are read chunk by chunk while the job runs.
+A dispatcher thread starts queued jobs highest priority first, then oldest
+first, with at most max_running jobs at a time. Chunks are scored with
+portfolio.score_records in a pool of single-threaded worker processes that run
+at a lower CPU priority (nice). Bulk work then yields to /predict/* instead of
+competing with it. workers=0 scores in-process instead (tests, small installs).
+
+Each chunk's results are committed as soon as it finishes. A job interrupted by
+a restart goes back to the queue and resumes after its last committed chunk.
+Cancelling stops a job between chunks and keeps the results so far.
+
+Several processes can share one job database (the pre-fork server starts a
+runner in every worker). Each opens its own SQLite connection on first use, and
+only the process holding an exclusive lock on <db>.dispatch runs jobs; the
+others accept and report them, and one of them takes over if it exits. Jobs
+submitted elsewhere start within the dispatcher's poll interval.
+"""
+from __future__ import annotations
+import json
+import math
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # no flock on Windows: every runner dispatches
+    fcntl = None
+
+try:
+    from . import portfolio
+    from .logs import logger
+except ImportError:
+    import portfolio
+    from logs import logger
+
+STATUSES = ("queued", "running", "done", "failed", "cancelled")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    source TEXT NOT NULL,
+    chunk_size INTEGER NOT NULL,
+    total INTEGER,
+    done INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    model_version TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, created);
+CREATE TABLE IF NOT EXISTS job_inputs (
+    job_id TEXT NOT NULL,
+    chunk INTEGER NOT NULL,
+    records TEXT NOT NULL,
+    PRIMARY KEY (job_id, chunk)
+);
+CREATE TABLE IF NOT EXISTS job_results (
+    job_id TEXT NOT NULL,
+    chunk INTEGER NOT NULL,
+    rows TEXT NOT NULL,
+    PRIMARY KEY (job_id, chunk)
+);
+"""
+INLINE = "inline"
+
+
+class JobError(ValueError):
+    """Raised for a job that can't be submitted (empty batch, bad file reference)."""
+
+
+# Job Store
+class JobStore:
+    """
+    Jobs, their inline input chunks and their result chunks. One connection per
+    process, shared by the API and runner threads behind a lock, and opened on
+    first use: a store created before fork() never shares its connection.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._inherited = []
+        if hasattr(os, "register_at_fork"):
+            ref = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: ref() is not None and ref()._after_fork())
+
+    @property
+    def _db(self) -> sqlite3.Connection:
+        # Callers hold self._lock.
+        if self._conn is None:
+            db = sqlite3.connect(self.path, check_same_thread=False, timeout=30.0)
+            db.row_factory = sqlite3.Row
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+            self._conn = db
+        return self._conn
+
+    def _after_fork(self):
+        # The child opens its own connection. The inherited one is kept, not closed:
+        # closing it could checkpoint and remove the WAL the parent still uses.
+        self._lock = threading.Lock()
+        if self._conn is not None:
+            self._inherited.append(self._conn)
+            self._conn = None
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def _update(self, sql: str, params=()) -> int:
+        with self._lock, self._db:
+            return self._db.execute(sql, params).rowcount
+
+    def create(self, source: str, chunk_size: int, priority: int = 0, total: int | None = None,
+               chunks=()) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO jobs (id, status, priority, source, chunk_size, total, created) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, priority, source, chunk_size, total, time.time()),
+            )
+            self._db.executemany(
+                "INSERT INTO job_inputs (job_id, chunk, records) VALUES (?, ?, ?)",
+                ((job_id, i, json.dumps(records)) for i, records in enumerate(chunks)),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> dict | None:
+        rows = self._query("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+        job = dict(rows[0])
+        job["progress"] = round(job["done"] / job["total"], 4) if job["total"] else None
+        return job
+
+    def status(self, job_id: str) -> str | None:
+        rows = self._query("SELECT status FROM jobs WHERE id = ?", (job_id,))
+        return rows[0]["status"] if rows else None
+
+    def claim_next(self) -> dict | None:
+        """
+        Mark the next queued job (highest priority, then oldest) running and return it.
+        The update only applies to a job that is still queued, so a job is never
+        claimed twice.
+        """
+        while True:
+            with self._lock, self._db:
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' ORDER BY priority DESC, created, rowid LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    return None
+                claimed = self._db.execute(
+                    "UPDATE jobs SET status = 'running', started = COALESCE(started, ?) "
+                    "WHERE id = ? AND status = 'queued'",
+                    (time.time(), row["id"]),
+                ).rowcount
+            if claimed:
+                return self.get(row["id"])
+
+    def requeue_running(self) -> int:
+        # Jobs left running by a dispatcher that exited; they resume after their last
+        # saved chunk. Only the process holding the DispatchLock may call this.
+        return self._update("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+
+    def running(self) -> list:
+        return [row["id"] for row in self._query("SELECT id FROM jobs WHERE status = 'running' ORDER BY started")]
+
+    def set_model_version(self, job_id: str, version: str):
+        self._update("UPDATE jobs SET model_version = ? WHERE id = ?", (version, job_id))
+
+    def input_chunk(self, job_id: str, chunk: int) -> list:
+        rows = self._query("SELECT records FROM job_inputs WHERE job_id = ? AND chunk = ?", (job_id, chunk))
+        # Gone once the job is cancelled; the runner stops at its next status check.
+        return json.loads(rows[0]["records"]) if rows else []
+
+    def saved_chunks(self, job_id: str) -> set:
+        return {row["chunk"] for row in self._query("SELECT chunk FROM job_results WHERE job_id = ?", (job_id,))}
+
+    def save_chunk(self, job_id: str, chunk: int, rows: list):
+        errors = sum(1 for row in rows if row.get("error"))
+        with self._lock, self._db:
+            # A chunk that is already saved is left as it is, and not counted twice.
+            if self._db.execute(
+                "INSERT OR IGNORE INTO job_results (job_id, chunk, rows) VALUES (?, ?, ?)",
+                (job_id, chunk, json.dumps(rows)),
+            ).rowcount:
+                self._db.execute(
+                    "UPDATE jobs SET done = done + ?, errors = errors + ? WHERE id = ?", (len(rows), errors, job_id)
+                )
+
+    def finish(self, job_id: str, status: str, error: str | None = None) -> bool:
+        """
+        Move a running job to done or failed (a cancelled job stays cancelled).
+        """
+        with self._lock, self._db:
+            updated = self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished = ?, total = COALESCE(total, done) "
+                "WHERE id = ? AND status = 'running'",
+                (status, error, time.time(), job_id),
+            ).rowcount
+            self._db.execute("DELETE FROM job_inputs WHERE job_id = ?", (job_id,))
+        return bool(updated)
+
+    def cancel(self, job_id: str) -> bool:
+        with self._lock, self._db:
+            updated = self._db.execute(
+                "UPDATE jobs SET status = 'cancelled', finished = ? WHERE id = ? AND status IN ('queued', 'running')",
+                (time.time(), job_id),
+            ).rowcount
+            self._db.execute("DELETE FROM job_inputs WHERE job_id = ?", (job_id,))
+        return bool(updated)
+
+    def delete(self, job_id: str) -> bool:
+        """
+        Drop a finished job and its results.
+        """
+        with self._lock, self._db:
+            deleted = self._db.execute(
+                "DELETE FROM jobs WHERE id = ? AND status IN ('done', 'failed', 'cancelled')", (job_id,)
+            ).rowcount
+            if deleted:
+                self._db.execute("DELETE FROM job_results WHERE job_id = ?", (job_id,))
+        return bool(deleted)
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 1000) -> list:
+        """
+        Saved result rows offset..offset+limit, in input order. Rows of chunks
+        that haven't finished yet are not included.
+        """
+        job = self.get(job_id)
+        if job is None or limit <= 0:
+            return []
+        size = job["chunk_size"]
+        rows = self._query(
+            "SELECT chunk, rows FROM job_results WHERE job_id = ? AND chunk BETWEEN ? AND ? ORDER BY chunk",
+            (job_id, offset // size, (offset + limit - 1) // size),
+        )
+        out = []
+        for row in rows:
+            out.extend(r for r in json.loads(row["rows"]) if offset <= r["row"] < offset + limit)
+        return out
+
+    def counts(self) -> dict:
+        counts = dict.fromkeys(STATUSES, 0)
+        for row in self._query("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+            counts[row["status"]] = row["n"]
+        return counts
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class DispatchLock:
+    """
+    Exclusive, non-blocking flock on <db>.dispatch: at most one process runs the
+    jobs of a database. The kernel releases it when its holder exits.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.held = False
+        self._file = None
+
+    def acquire(self) -> bool:
+        if self.held:
+            return True
+        if fcntl is not None:
+            f = open(self.path, "a")
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                return False
+            self._file = f
+        self.held = True
+        return True
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.held = False
+
+
+# Worker processes
+def _init_worker(approval_path: str, strategy_path: str, nice: int):
+    if nice:
+        os.nice(nice)
+    # One XGBoost thread per worker; the pool provides the parallelism.
+    portfolio._init_worker(1, approval_path, strategy_path)
+
+
+def _score_chunk(records: list) -> list:
+    return portfolio.score_records(records, portfolio._worker["models"], portfolio._worker["schema"])
+
+
+# Job Runner
+class JobRunner:
+    """
+    Runs queued jobs from a JobStore. current_bundle() returns the ModelBundle
+    a job should start on (the registry's current one); its artifacts are what
+    the worker processes load. Of the runners sharing a database, only the one
+    holding its DispatchLock runs jobs; max_running and workers are therefore
+    limits for the whole database, not per process.
+    """
+
+    def __init__(self, store: JobStore, current_bundle, schema, workers: int = 1, max_running: int = 1,
+                 chunk_size: int = 1000, nice: int = 10, file_root: str | None = None,
+                 poll_seconds: float = 1.0):
+        self.store = store
+        self.current_bundle = current_bundle
+        self.schema = schema
+        self.workers = workers
+        self.max_running = max(1, max_running)
+        self.chunk_size = chunk_size
+        self.nice = nice
+        self.file_root = os.path.realpath(file_root) if file_root else None
+        self.poll_seconds = poll_seconds
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._running = {}
+        self._pools = {}  # artifact paths -> [pool, jobs using it]
+        self._thread = None
+        self._dispatch_lock = DispatchLock(store.path + ".dispatch")
+
+    # Submitting
+    def _resolve_file(self, name: str) -> str:
+        if self.file_root is None:
+            raise JobError("file references are not enabled (ML_JOB_FILE_ROOT)")
+        path = os.path.realpath(os.path.join(self.file_root, name))
+        if os.path.commonpath([path, self.file_root]) != self.file_root:
+            raise JobError(f"{name}: outside the job file root")
+        if not os.path.isfile(path):
+            raise JobError(f"{name}: no such file")
+        return path
+
+    def submit(self, applicants: list | None = None, file: str | None = None, priority: int = 0,
+               chunk_size: int | None = None) -> dict:
+        if (applicants is None) == (file is None):
+            raise JobError("give either applicants or file")
+        chunk_size = chunk_size or self.chunk_size
+        if chunk_size < 1:
+            raise JobError("chunk_size must be positive")
+        if applicants is not None:
+            if not applicants:
+                raise JobError("applicants is empty")
+            chunks = [applicants[i:i + chunk_size] for i in range(0, len(applicants), chunk_size)]
+            job_id = self.store.create(INLINE, chunk_size, priority, len(applicants), chunks)
+        else:
+            path = self._resolve_file(file)
+            total = None
+            if portfolio.detect_format(path) == "parquet":
+                portfolio._require_pyarrow()
+                import pyarrow.parquet as pq
+
+                total = pq.ParquetFile(path).metadata.num_rows
+            job_id = self.store.create(path, chunk_size, priority, total)
+        self.wake()
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        cancelled = self.store.cancel(job_id)
+        self.wake()
+        return cancelled
+
+    # Dispatching
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def start(self) -> threading.Thread:
+        """
+        Start the dispatcher thread. It waits for the DispatchLock, so in every
+        process but one it stays idle until the current holder exits.
+        """
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._lead, name="job-dispatcher", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Stop starting jobs; running ones stop after their current chunk and
+        resume on the next start().
+        """
+        self._stop.set()
+        self.wake()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        for thread in list(self._running.values()):
+            thread.join(timeout)
+        # Waits for chunks already in a worker; a worker left writing a result
+        # nobody reads would outlive the process.
+        for pool, _ in self._pools.values():
+            pool.shutdown(wait=True, cancel_futures=True)
+        self._pools = {}
+        # Last, so the next holder doesn't requeue a job this process is still running.
+        self._dispatch_lock.release()
+
+    def _lead(self):
+        while not self._dispatch_lock.acquire():
+            if self._stop.wait(self.poll_seconds):
+                return
+        # Nothing else runs this database's jobs now: any left running were orphaned.
+        self.store.requeue_running()
+        self._dispatch()
+
+    def _dispatch(self):
+        while not self._stop.is_set():
+            with self._cond:
+                while len(self._running) >= self.max_running and not self._stop.is_set():
+                    self._cond.wait(self.poll_seconds)
+            if self._stop.is_set():
+                break
+            job = self.store.claim_next()
+            if job is None:
+                with self._cond:
+                    self._cond.wait(self.poll_seconds)
+                continue
+            thread = threading.Thread(target=self._run, args=(job,), name=f"job-{job['id'][:8]}", daemon=True)
+            with self._cond:
+                self._running[job["id"]] = thread
+            thread.start()
+
+    def _run(self, job: dict):
+        try:
+            if self._process(job):
+                self.store.finish(job["id"], "done")
+        except Exception as e:
+            logger.exception("job failed", extra={"fields": {"job_id": job["id"]}})
+            self.store.finish(job["id"], "failed", f"{type(e).__name__}: {e}")
+        finally:
+            with self._cond:
+                self._running.pop(job["id"], None)
+                self._cond.notify_all()
+
+    # Running
+    def _chunks(self, job: dict, skip: set):
+        # (chunk index, first row, records), skipping saved chunks without loading them.
+        size = job["chunk_size"]
+        if job["source"] == INLINE:
+            for index in range(math.ceil(job["total"] / size)):
+                if index not in skip:
+                    yield index, index * size, self.store.input_chunk(job["id"], index)
+            return
+        fmt = portfolio.detect_format(job["source"])
+        for index, frame in enumerate(portfolio.iter_chunks(job["source"], size, fmt)):
+            if index not in skip:
+                yield index, index * size, portfolio._records(frame)
+
+    def _process(self, job: dict) -> bool:
+        """
+        Score the job's remaining chunks. False if it was cancelled or the runner stopped.
+        """
+        bundle = self.current_bundle().load()
+        self.store.set_model_version(job["id"], bundle.version)
+        score, release = self._scorer(bundle)
+        pending = deque()
+        try:
+            for index, first_row, records in self._chunks(job, self.store.saved_chunks(job["id"])):
+                if self._stop.is_set() or self.store.status(job["id"]) != "running":
+                    return False
+                pending.append((index, first_row, score(records)))
+                # A few chunks in flight per job, so the pool stays busy without reading far ahead.
+                while len(pending) > max(1, self.workers):
+                    self._save(job, *pending.popleft())
+            while pending:
+                self._save(job, *pending.popleft())
+            return self.store.status(job["id"]) == "running"
+        finally:
+            for _, _, future in pending:
+                future.cancel()
+            release()
+
+    def _save(self, job: dict, index: int, first_row: int, future: Future):
+        rows = future.result()
+        for i, row in enumerate(rows):
+            row["row"] = first_row + i
+        self.store.save_chunk(job["id"], index, rows)
+
+    def _scorer(self, bundle) -> tuple:
+        # (score(records) -> Future of rows, release()) on the bundle's artifacts.
+        if self.workers <= 0:
+            def score(records):
+                future = Future()
+                future.set_result(portfolio.score_records(records, bundle, self.schema))
+                return future
+
+            return score, lambda: None
+
+        key = (bundle.approval_path, bundle.strategy_path)
+        with self._cond:
+            if key not in self._pools:
+                pool = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker, initargs=(*key, self.nice),
+                )
+                self._pools[key] = [pool, 0]
+            entry = self._pools[key]
+            entry[1] += 1
+
+        def release():
+            # Pools for artifacts that are no longer current go once their last job ends.
+            with self._cond:
+                entry[1] -= 1
+                current = self.current_bundle()
+                retire = entry[1] == 0 and key != (current.approval_path, current.strategy_path)
+                if retire:
+                    self._pools.pop(key, None)
+            if retire:
+                entry[0].shutdown(wait=True, cancel_futures=True)
+
+        return lambda records: entry[0].submit(_score_chunk, records), release
+
+    def status(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_running": self.max_running,
+            # Whether this process is the one running jobs.
+            "dispatcher": self._dispatch_lock.held,
+            "running": self.store.running(),
+            "jobs": self.store.counts(),
+        }
@@ -0,0 +1,289 @@
+"""
+Open-loop load test for the ML service.
+
+    python -m ml_service.loadtest --rates 50,100,200,400 --duration 10
+    python -m ml_service.loadtest --workers 4 --rates 200,400,800      # through ml_service.serve
+    python -m ml_service.loadtest --url http://localhost:8001 --rates 100
+
+Unless --url is given, a local server is started on --port and the test waits for
+/ready. Requests go out on a fixed schedule at each rate whether or not earlier ones
+have finished, the way independent callers such as the Spring backend would send them.
+Latency is measured from each request's scheduled send time, so a server that falls
+behind shows up in the percentiles rather than slowing the test down.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+
+try:
+    from .synthetic import generate_applicants
+except ImportError:
+    from synthetic import generate_applicants
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ROUTES = {"approval": "/predict/approval", "strategy": "/predict/strategy"}
+PERCENTILES = (("p50", 0.50), ("p95", 0.95), ("p99", 0.99), ("p99.9", 0.999))
+
+
+# Workload
+def parse_mix(text: str) -> dict:
+    """
+    "approval=0.7,strategy=0.3" -> {"/predict/approval": 0.7, "/predict/strategy": 0.3}
+    """
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ROUTES:
+            raise ValueError(f"unknown route {name!r} in mix; expected one of {sorted(ROUTES)}")
+        mix[ROUTES[name.strip()]] = float(weight or 1)
+    return mix
+
+
+def build_plan(n: int, mix: dict, repeat: float = 0.0, pool_size: int = 5000, seed: int = 0) -> list:
+    """
+    n (path, body) requests. Routes are drawn by weight, and a `repeat` fraction
+    re-sends an applicant already used, as a client retrying or re-checking would.
+    """
+    rng = random.Random(seed)
+    pool = [json.dumps(a).encode() for a in generate_applicants(min(n, pool_size), seed=seed)]
+    paths, weights = list(mix), list(mix.values())
+    plan, sent = [], []
+    for i in range(n):
+        if sent and rng.random() < repeat:
+            body = rng.choice(sent)
+        else:
+            body = pool[i % len(pool)]
+            sent.append(body)
+        plan.append((rng.choices(paths, weights)[0], body))
+    return plan
+
+
+def arrival_offsets(n: int, rate: float, poisson: bool = False, seed: int = 0) -> list:
+    """
+    Send times in seconds from the start: evenly spaced, or exponential gaps for
+    Poisson arrivals at the same mean rate.
+    """
+    if not poisson:
+        return [i / rate for i in range(n)]
+    rng = random.Random(seed)
+    offsets, t = [], 0.0
+    for _ in range(n):
+        offsets.append(t)
+        t += rng.expovariate(rate)
+    return offsets
+
+
+# Driver
+async def _send(client, path, body, scheduled, timeout):
+    try:
+        response = await client.post(path, content=body, headers={"Content-Type": "application/json"},
+                                     timeout=timeout)
+        status = response.status_code
+        # Prediction failures come back as 200 with an "error" field.
+        ok = status == 200 and "error" not in response.json()
+    except Exception as e:
+        status, ok = type(e).__name__, False
+    return path, time.perf_counter() - scheduled, status, ok
+
+
+async def drive(client, plan, offsets, timeout: float = 30.0) -> dict:
+    """
+    Send every planned request at its offset and collect the outcomes.
+    """
+    start = time.perf_counter() + 0.01
+    tasks, max_lag = [], 0.0
+    for (path, body), offset in zip(plan, offsets):
+        scheduled = start + offset
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        else:
+            max_lag = max(max_lag, -delay)
+        tasks.append(asyncio.create_task(_send(client, path, body, scheduled, timeout)))
+    results = await asyncio.gather(*tasks)
+    return {"results": results, "wall_s": time.perf_counter() - start, "max_send_lag_s": max_lag}
+
+
+def percentile(sorted_values, q: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+def _latency_summary(results) -> dict:
+    latencies = sorted(latency for _, latency, _, _ in results)
+    errors = sum(not ok for _, _, _, ok in results)
+    summary = {"requests": len(results), "errors": errors,
+               "error_rate": errors / len(results) if results else 0.0}
+    for label, q in PERCENTILES:
+        summary[f"{label}_ms"] = percentile(latencies, q) * 1000.0
+    summary["max_ms"] = latencies[-1] * 1000.0 if latencies else float("nan")
+    return summary
+
+
+def summarize(rate: float, run: dict) -> dict:
+    results = run["results"]
+    summary = {"rate": rate, **_latency_summary(results)}
+    summary["throughput_rps"] = (len(results) - summary["errors"]) / run["wall_s"]
+    summary["max_send_lag_ms"] = run["max_send_lag_s"] * 1000.0
+    statuses = {}
+    for _, _, status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    summary["statuses"] = statuses
+    summary["routes"] = {
+        path: _latency_summary([r for r in results if r[0] == path])
+        for path in sorted({r[0] for r in results})
+    }
+    return summary
+
+
+async def sweep(base_url, rates, duration, mix, repeat=0.0, poisson=False, seed=0,
+                connections=256, timeout=30.0, pause=1.0, stop_error_rate=0.5,
+                transport=None, progress=None) -> list:
+    import httpx
+
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    summaries = []
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, transport=transport) as client:
+        for i, rate in enumerate(rates):
+            n = max(1, int(rate * duration))
+            plan = build_plan(n, mix, repeat, seed=seed + i)
+            run = await drive(client, plan, arrival_offsets(n, rate, poisson, seed=seed + i), timeout)
+            summary = summarize(rate, run)
+            summaries.append(summary)
+            if progress:
+                progress(summary)
+            if summary["error_rate"] > stop_error_rate:
+                break
+            await asyncio.sleep(pause)
+    return summaries
+
+
+# Local Server
+def start_server(port: int, workers: int | None = None, env: dict | None = None) -> subprocess.Popen:
+    """
+    uvicorn (one process) or ml_service.serve (--workers) on 127.0.0.1:port.
+    """
+    if workers:
+        cmd = [sys.executable, "-m", "ml_service.serve", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning"]
+    else:
+        cmd = [sys.executable, "-m", "uvicorn", "ml_service.app:app", "--host", "127.0.0.1",
+               "--port", str(port), "--log-level", "warning", "--no-access-log"]
+    # Per-request log lines would compete with the server for CPU; --env can turn them back on.
+    env = {**os.environ, "ML_LOG_SAMPLE_RATE": "0", "ML_LOG_SLOW_MS": "inf", **(env or {})}
+    return subprocess.Popen(cmd, cwd=os.path.dirname(BASE_DIR), env=env,
+                            start_new_session=True)
+
+
+def wait_ready(base_url: str, process=None, timeout: float = 120.0):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"server exited with code {process.returncode} before becoming ready")
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=2.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise TimeoutError(f"{base_url}/ready did not return 200 within {timeout:.0f}s")
+
+
+def stop_server(process: subprocess.Popen, timeout: float = 10.0):
+    if process.poll() is not None:
+        return
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+
+
+# Report
+def _print_header():
+    print(f"{'rate':>8s} {'rps':>8s} {'err%':>6s} {'p50':>8s} {'p95':>8s} {'p99':>8s} "
+          f"{'p99.9':>8s} {'max':>8s} {'lag':>7s}   (latencies in ms)")
+
+
+def _print_summary(s):
+    print(f"{s['rate']:8.0f} {s['throughput_rps']:8.1f} {s['error_rate'] * 100:6.2f} "
+          f"{s['p50_ms']:8.1f} {s['p95_ms']:8.1f} {s['p99_ms']:8.1f} {s['p99.9_ms']:8.1f} "
+          f"{s['max_ms']:8.1f} {s['max_send_lag_ms']:7.1f}", flush=True)
+
+
+def max_sustainable_rate(summaries, slo_ms: float, max_error_rate: float = 0.01):
+    """
+    Highest rate whose p99 met the SLO with an acceptable error rate.
+    """
+    passing = [s["rate"] for s in summaries if s["p99_ms"] <= slo_ms and s["error_rate"] <= max_error_rate]
+    return max(passing) if passing else None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Open-loop load test for the ML service.")
+    parser.add_argument("--rates", default="25,50,100,200", help="requests per second, comma separated")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per rate")
+    parser.add_argument("--mix", default="approval=0.5,strategy=0.5")
+    parser.add_argument("--repeat", type=float, default=0.0,
+                        help="fraction of requests re-sending an earlier applicant (exercises the cache)")
+    parser.add_argument("--poisson", action="store_true", help="exponential inter-arrival times")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--connections", type=int, default=256)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--slo-ms", type=float, default=250.0, help="p99 target used for the summary line")
+    parser.add_argument("--stop-error-rate", type=float, default=0.5,
+                        help="skip higher rates once a rate's error rate exceeds this")
+    parser.add_argument("--url", help="test a running server instead of starting one")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, help="start ml_service.serve with this many workers")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="environment for the started server, e.g. ML_MICROBATCH=1 (repeatable)")
+    parser.add_argument("--out", default="loadtest_results.json")
+    args = parser.parse_args(argv)
+
+    rates = [float(r) for r in args.rates.split(",")]
+    mix = parse_mix(args.mix)
+    process = None
+    base_url = args.url.rstrip("/") if args.url else f"http://127.0.0.1:{args.port}"
+    try:
+        if not args.url:
+            process = start_server(args.port, args.workers, dict(kv.split("=", 1) for kv in args.env))
+            wait_ready(base_url, process)
+        _print_header()
+        summaries = asyncio.run(sweep(
+            base_url, rates, args.duration, mix, args.repeat, args.poisson, args.seed,
+            args.connections, args.timeout, stop_error_rate=args.stop_error_rate, progress=_print_summary,
+        ))
+    finally:
+        if process is not None:
+            stop_server(process)
+
+    best = max_sustainable_rate(summaries, args.slo_ms)
+    print(f"max rate with p99 <= {args.slo_ms:.0f} ms and < 1% errors: "
+          f"{'none' if best is None else f'{best:.0f} req/s'}")
+    if any(s["max_send_lag_ms"] > 10 for s in summaries):
+        print("WARNING: the load generator fell behind its schedule; results at those rates "
+              "understate the offered load")
+    with open(args.out, "w") as f:
+        json.dump({"config": vars(args), "summaries": summaries}, f, indent=2)
+    print(f"wrote {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+from __future__ import annotations
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import uuid
+from contextvars import ContextVar
+
+try:
+    from .timing import NULL_TIMER, StageTimer
+except ImportError:
+    from timing import NULL_TIMER, StageTimer
+
+
+LOGGER_NAME = "ml_service"
+logger = logging.getLogger(LOGGER_NAME)
+request_logger = logging.getLogger(LOGGER_NAME + ".requests")
+
+
+# Formatting
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line; structured data goes in `extra={"fields": {...}}`.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def stop(self, timeout: float = 5.0):
+        # Bounded: shutdown must not hang on a full queue or a stuck stream.
+        if self._thread:
+            try:
+                self.queue.put(self._sentinel, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+            self._thread = None
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on a bounded queue drained by a QueueListener thread, so the
+    request thread never formats or writes. When the queue is full records are
+    dropped and counted. The listener starts lazily in each process, so a
+    handler configured before fork() keeps working in the workers.
+    """
+
+    def __init__(self, target: logging.Handler, max_queue: int = 10000):
+        super().__init__(queue.Queue(max_queue))
+        self.target = target
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._pid = None
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Fresh queue: anything the parent left behind has no reader here.
+            self.queue = queue.Queue(self.max_queue)
+            self._listener = _QueueListener(
+                self.queue, self.target, respect_handler_level=True
+            )
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record):
+        # Merge args now (they may be mutated later); leave formatting to the listener.
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+            self._listener = None
+            self._pid = None
+        super().close()
+
+
+_handler = None
+
+
+def configure_logging(level: str | None = None, stream=None) -> NonBlockingQueueHandler:
+    """
+    Route the ml_service loggers through a NonBlockingQueueHandler writing JSON
+    lines to stderr. Level comes from ML_LOG_LEVEL (default INFO). Idempotent.
+    """
+    global _handler
+    if _handler is None:
+        target = logging.StreamHandler(stream or sys.stderr)
+        target.setFormatter(JsonFormatter())
+        _handler = NonBlockingQueueHandler(target)
+        logger.addHandler(_handler)
+        logger.propagate = False
+        atexit.register(_handler.close)
+    logger.setLevel((level or os.getenv("ML_LOG_LEVEL", "INFO")).upper())
+    return _handler
+
+
+# Request Context
+class RequestContext:
+    __slots__ = ("request_id", "timer", "failed", "model_version")
+
+    def __init__(self, request_id: str):
+        self.request_id = request_id
+        self.timer = StageTimer()
+        self.failed = False
+        self.model_version = None
+
+
+_current_request = ContextVar("ml_service_request", default=None)
+
+
+def current_request():
+    return _current_request.get()
+
+
+def request_timer():
+    """
+    The current request's StageTimer, or a no-op timer outside a request.
+    """
+    ctx = _current_request.get()
+    return ctx.timer if ctx is not None else NULL_TIMER
+
+
+def note_model_version(version: str):
+    """
+    Record the model version serving the current request (reported in the
+    X-Model-Version header and the request log line).
+    """
+    ctx = _current_request.get()
+    if ctx is not None:
+        ctx.model_version = version
+
+
+def log_failure(message: str, **fields):
+    """
+    Log the active exception with the request ID; failed requests are always logged.
+    """
+    ctx = _current_request.get()
+    if ctx is not None:
+        ctx.failed = True
+        fields["request_id"] = ctx.request_id
+    logger.exception(message, extra={"fields": fields})
+
+
+def log_payload(route: str, payload, result):
+    """
+    Full request/response bodies, only at DEBUG.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    ctx = _current_request.get()
+    logger.debug(
+        f"{route} payload",
+        extra={"fields": {
+            "request_id": ctx.request_id if ctx else None,
+            "payload": payload,
+            "result": result,
+        }},
+    )
+
+
+class RequestLoggingMiddleware:
+    """
+    ASGI middleware: assigns each request an ID (X-Request-ID is honoured and
+    echoed), starts its StageTimer and logs one structured line when it ends.
+    Responses carry X-Model-Version: the version that served the request, or
+    the current one.
+
+    Successful requests are sampled at ML_LOG_SAMPLE_RATE (default 0.1);
+    failures and requests slower than ML_LOG_SLOW_MS (default 250) are always
+    logged. Every request, sampled or not, is passed to each
+    observer(scope, ctx, status, failed).
+    """
+
+    def __init__(self, app, model_version=lambda: None, sample_rate: float | None = None,
+                 slow_ms: float | None = None, observers=()):
+        self.app = app
+        self.model_version = model_version
+        self.observers = tuple(observers)
+        self.sample_rate = float(os.getenv("ML_LOG_SAMPLE_RATE", "0.1")) if sample_rate is None else sample_rate
+        self.slow_ms = float(os.getenv("ML_LOG_SLOW_MS", "250")) if slow_ms is None else slow_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", ()):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        ctx = RequestContext(request_id or uuid.uuid4().hex)
+        token = _current_request.set(ctx)
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # Uninstrumented routes have no earlier laps; charge it all to the handler.
+                ctx.timer.lap("serialize" if ctx.timer.stages else "handler")
+                headers = [(b"x-request-id", ctx.request_id.encode("latin-1"))]
+                version = ctx.model_version or self.model_version()
+                if version:
+                    headers.append((b"x-model-version", str(version).encode("latin-1")))
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _current_request.reset(token)
+            self._log(scope, ctx, status)
+
+    def _log(self, scope, ctx, status):
+        duration_ms = ctx.timer.elapsed * 1000.0
+        failed = ctx.failed or status >= 500
+        for observe in self.observers:
+            observe(scope, ctx, status, failed)
+        if not (failed or duration_ms >= self.slow_ms or random.random() < self.sample_rate):
+            return
+        if not request_logger.isEnabledFor(logging.INFO):
+            return
+        request_logger.log(
+            logging.WARNING if failed else logging.INFO,
+            "request",
+            extra={"fields": {
+                "request_id": ctx.request_id,
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "status": status,
+                "failed": failed,
+                "model_version": ctx.model_version or self.model_version(),
+                "duration_ms": round(duration_ms, 3),
+                "stages_ms": ctx.timer.as_ms(),
+                "sampled_at": self.sample_rate,
+            }},
+        )
@@ -0,0 +1,176 @@
+from __future__ import annotations
+import threading
+from bisect import bisect_left
+
+
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096, 16384)
+LOAD_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Metric Types
+class Counter:
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram; observe() is a bisect and three increments under a lock.
+    """
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((k, ([*v[0]], v[1], v[2])) for k, v in self._series.items())
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for le, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le_label = f'le="{_number(le)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, [le_label])} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(float(total))}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {count}"
+
+
+class Registry:
+    """
+    Metrics plus collectors: callables returning (name, type, help, [(labels, value)])
+    for values read at scrape time (cache stats, model info).
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def counter(self, *args, **kwargs) -> Counter:
+        metric = Counter(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        self.collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collect in self.collectors:
+            for name, kind, help, samples in collect():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    label_text = _labels(labels.keys(), labels.values())
+                    lines.append(f"{name}{label_text} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Service Metrics
+registry = Registry()
+
+REQUESTS = registry.counter(
+    "ml_requests_total", "HTTP requests by route and status code.", ("route", "status")
+)
+REQUEST_ERRORS = registry.counter(
+    "ml_request_errors_total", "Requests that failed (5xx or a caught prediction error).", ("route",)
+)
+REQUEST_LATENCY = registry.histogram(
+    "ml_request_duration_seconds", "End-to-end request latency, including sending the response.", ("route",)
+)
+STAGE_LATENCY = registry.histogram(
+    "ml_stage_duration_seconds", "Time spent in each stage of a request.", ("route", "stage")
+)
+BATCH_SIZE = registry.histogram(
+    "ml_batch_size", "Rows per model call for batch endpoints and micro-batches.", ("source",),
+    buckets=BATCH_BUCKETS,
+)
+
+MODEL_LOAD_LATENCY = registry.histogram(
+    "ml_model_load_seconds", "Time to load and warm up a model variant on demand.", ("source",),
+    buckets=LOAD_BUCKETS,
+)
+TENANT_LOOKUPS = registry.counter(
+    "ml_tenant_lookups_total", "Model variant lookups by result (hit, miss).", ("result",)
+)
+TENANT_EVICTIONS = registry.counter(
+    "ml_tenant_evictions_total", "Model variants evicted to stay within the memory budget."
+)
+
+
+def observe_request(scope, ctx, status: int, failed: bool):
+    """
+    RequestLoggingMiddleware observer: record one finished request.
+    """
+    route = getattr(scope.get("route"), "path", None) or "unmatched"
+    REQUESTS.inc(route, str(status))
+    if failed:
+        REQUEST_ERRORS.inc(route)
+    REQUEST_LATENCY.observe(ctx.timer.elapsed, route)
+    for stage, seconds in ctx.timer.stages.items():
+        STAGE_LATENCY.observe(seconds, route, stage)
+
+
+def batch_observer(source: str):
+    return lambda size: BATCH_SIZE.observe(size, source)
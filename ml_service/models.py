@@ -0,0 +1,285 @@
+from __future__ import annotations
+import threading
+import time
+from contextlib import contextmanager
+
+
+try:
+    from .batching import batcher_from_env
+    from .cache import artifact_version
+    from .logs import logger
+    from .metrics import batch_observer
+    from .synthetic import generate_applicants
+    from .timing import NULL_TIMER
+except ImportError:
+    from batching import batcher_from_env
+    from cache import artifact_version
+    from logs import logger
+    from metrics import batch_observer
+    from synthetic import generate_applicants
+    from timing import NULL_TIMER
+
+
+# Model Bundle
+class ModelBundle:
+    """
+    Both pipelines, the strategy wrapper and the micro-batchers, loaded on first
+    use (or by load_in_background at startup) instead of at import time.
+    pandas, scikit-learn and xgboost are only imported by load().
+    """
+
+    def __init__(self, approval_path: str, strategy_path: str, warmup: int = 0, version: str | None = None):
+        self.approval_path = approval_path
+        self.strategy_path = strategy_path
+        self.warmup = warmup
+        # Defaults to a content hash of the artifacts, computed by load().
+        self.version = version
+        self.timings = {}
+        self.error = None
+        self.warmed = warmup <= 0
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded.is_set()
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded and self.warmed
+
+    @contextmanager
+    def _stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(time.perf_counter() - started, 4)
+
+    def load(self) -> "ModelBundle":
+        if self._loaded.is_set():
+            return self
+        with self._lock:
+            if self._loaded.is_set():
+                return self
+            try:
+                self._load()
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                raise
+            self.error = None
+            self._loaded.set()
+        return self
+
+    def _load(self):
+        with self._stage("import_ml_libraries"):
+            import joblib
+            import sklearn.pipeline  # noqa: F401  (otherwise paid inside unpickling)
+            import xgboost  # noqa: F401
+            try:
+                from . import approval, strategy
+                from .compiled import compile_pipeline
+                from .strategy import StrategyPipelineWrapper
+            except ImportError:
+                import approval
+                import strategy
+                from compiled import compile_pipeline
+                from strategy import StrategyPipelineWrapper
+
+        with self._stage("load_approval_pipeline"):
+            approval_raw = joblib.load(self.approval_path)
+        with self._stage("load_strategy_pipeline"):
+            strategy_raw = joblib.load(self.strategy_path)
+        # Preprocessing is compiled into a flat NumPy plan at load time
+        # (ML_PREPROCESS_MODE=sklearn|verify to use or check the original path).
+        with self._stage("compile_pipelines"):
+            approval_pipeline = compile_pipeline(approval_raw)
+            strategy_pipeline = compile_pipeline(strategy_raw)
+        with self._stage("artifact_version"):
+            version = self.version or artifact_version(self.approval_path, self.strategy_path)
+
+        with self._stage("build_wrapper"):
+            classes = _safe_classes_from_pipeline(strategy_pipeline)
+            feature_names = _safe_feature_names_from_pipeline(strategy_pipeline)
+            if classes is None:
+                raise RuntimeError(
+                    "Could not infer strategy classes from the pipeline. "
+                    "Ensure the final estimator has .classes_ or pass classes explicitly."
+                )
+            if feature_names is None:
+                raise RuntimeError(
+                    "Could not infer feature names for the strategy pipeline. "
+                    "Ensure there is a 'preprocess' step with get_feature_names_out() "
+                    "or the pipeline exposes feature_names_in_."
+                )
+            wrapper = StrategyPipelineWrapper(
+                pipeline=strategy_pipeline,
+                classes=classes,
+                X_train_columns=feature_names,
+                encoders=None,
+                label_encoder=None,
+            )
+
+        self._approval = approval
+        self._strategy = strategy
+        self.approval_pipeline = approval_pipeline
+        self.strategy_pipeline = strategy_pipeline
+        self.version = version
+        self.wrapper = wrapper
+        self._explainers = {}
+        # Opt-in (ML_MICROBATCH=1): concurrent single requests share one model call.
+        self.approval_batcher = batcher_from_env(
+            lambda items: approval.predict_applicants(items, approval_pipeline),
+            "approval-batcher",
+            on_batch=batch_observer("approval-batcher"),
+        )
+        self.strategy_batcher = batcher_from_env(
+            wrapper.predict_many_with_rules,
+            "strategy-batcher",
+            on_batch=batch_observer("strategy-batcher"),
+        )
+
+    def warm_up(self, n: int | None = None):
+        """
+        Run synthetic applicants through the single and batch paths of both
+        models, so first requests don't pay for lazy allocation.
+        """
+        n = self.warmup if n is None else n
+        self.load()
+        if n > 0:
+            with self._stage("warmup"):
+                applicants = generate_applicants(n)
+                for applicant in applicants[:8]:
+                    self._approval.predict_applicant(applicant, self.approval_pipeline)
+                    self.wrapper.predict_with_rules(applicant)
+                self._approval.predict_applicants(applicants, self.approval_pipeline)
+                self.wrapper.predict_many_with_rules(applicants)
+        self.warmed = True
+
+    def load_in_background(self) -> threading.Thread:
+        def run():
+            try:
+                self.warm_up()
+            except Exception:
+                logger.exception("model load failed", extra={"fields": {
+                    "version": self.version, "approval_path": self.approval_path,
+                    "strategy_path": self.strategy_path,
+                }})
+
+        thread = threading.Thread(target=run, name="model-loader", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self):
+        """
+        Stop the micro-batcher threads, which hold references to the pipelines.
+        Called by the registry once a retired bundle has no requests left.
+        """
+        if not self.loaded:
+            return
+        for batcher in (self.approval_batcher, self.strategy_batcher):
+            if batcher is not None:
+                batcher.close()
+        self._explainers = {}
+
+    # Prediction entry points used by the API.
+    def predict_approval(self, data: dict, timer=NULL_TIMER) -> dict:
+        self.load()
+        if self.approval_batcher is None:
+            return self._approval.predict_applicant(data, self.approval_pipeline, timer)
+        result = self.approval_batcher.submit(data)
+        timer.lap("micro_batch")
+        return result
+
+    def predict_approvals(self, applicants: list) -> list:
+        self.load()
+        return self._approval.predict_applicants(applicants, self.approval_pipeline)
+
+    def predict_strategy(self, data: dict, timer=NULL_TIMER) -> dict:
+        self.load()
+        if self.strategy_batcher is None:
+            return self.wrapper.predict_with_rules(data, timer=timer)
+        result = self.strategy_batcher.submit(data)
+        timer.lap("micro_batch")
+        return result
+
+    def predict_strategies(self, applicants: list) -> list:
+        self.load()
+        return self.wrapper.predict_many_with_rules(applicants)
+
+    def predict_full(self, data: dict, timer=NULL_TIMER) -> tuple:
+        """
+        (approval result, strategy result) for one applicant.
+
+        Each model gets its own enrich_features view: the two differ in which
+        derived columns they fill (the strategy model's age_plus_amort is 0 on
+        /predict/strategy), so a merged dict would change strategy predictions.
+        """
+        self.load()
+        if self.approval_batcher is not None and self.strategy_batcher is not None:
+            # Both queues at once, so the two model calls overlap.
+            approval_future = self.approval_batcher.submit_async(data)
+            strategy_future = self.strategy_batcher.submit_async(data)
+            results = approval_future.result(), strategy_future.result()
+            timer.lap("micro_batch")
+            return results
+        approval_case = self._approval.enrich_features(data)
+        strategy_case = self._strategy.enrich_features(data)
+        timer.lap("enrich_features")
+        return (
+            self._approval.predict_enriched(approval_case, self.approval_pipeline, timer),
+            self.wrapper.predict_enriched(strategy_case, timer),
+        )
+
+    def explainer(self, name: str):
+        """
+        TreeExplainer for "approval" or "strategy", built on first use.
+        """
+        self.load()
+        with self._lock:
+            if name not in self._explainers:
+                try:
+                    from .explain import TreeExplainer
+                except ImportError:
+                    from explain import TreeExplainer
+                pipeline = {"approval": self.approval_pipeline, "strategy": self.strategy_pipeline}[name]
+                self._explainers[name] = TreeExplainer(pipeline)
+            return self._explainers[name]
+
+    def explain_approvals(self, applicants: list, top_k: int = 5) -> list:
+        cases = [self._approval.enrich_features(a) for a in applicants]
+        return self.explainer("approval").explain_many(cases, top_k)
+
+    def explain_strategies(self, applicants: list, top_k: int = 5) -> list:
+        cases = [self._strategy.enrich_features(a) for a in applicants]
+        return self.explainer("strategy").explain_many(cases, top_k)
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "loaded": self.loaded,
+            "warmed": self.warmed,
+            "model_version": self.version if self.loaded else None,
+            "error": self.error,
+            "timings_seconds": dict(self.timings),
+        }
+
+
+def _safe_classes_from_pipeline(pipeline):
+    try:
+        for _, step in reversed(pipeline.named_steps.items()):
+            if hasattr(step, "classes_"):
+                return list(step.classes_)
+    except Exception:
+        pass
+    return getattr(pipeline, "classes_", None)
+
+
+def _safe_feature_names_from_pipeline(pipeline):
+    names = getattr(pipeline, "feature_names_in_", None)
+    if names is not None:
+        return list(names)
+    try:
+        return list(pipeline.named_steps["preprocess"].get_feature_names_out())
+    except Exception:
+        return None
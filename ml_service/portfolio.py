@@ -0,0 +1,276 @@
+"""
+Score a whole mortgage book offline, without going through the HTTP API.
+
+    python -m ml_service.portfolio book.csv scored/ --chunk-size 50000 --workers 4
+    python -m ml_service.portfolio book.parquet scored/ --format parquet --keep loan_id
+
+The input (CSV or Parquet) is read in chunks of --chunk-size rows. A process pool runs
+the approval and strategy models on each chunk, and each worker writes its own part file
+to the output directory (part-000000.csv, ...). At most 2 x workers chunks are in flight,
+so memory stays flat however large the input is.
+
+Part files are written under a temporary name and renamed when complete. Re-running the
+same command skips the chunks that are already written and continues where it stopped.
+--restart discards earlier output.
+"""
+from __future__ import annotations
+import argparse
+import glob
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+MANIFEST = "_manifest.json"
+FORMATS = ("csv", "parquet")
+TEXT_COLUMNS = ("approval_decision", "rate_type", "approval_reasons", "strategy", "strategy_reasons", "error")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise SystemExit("Parquet input/output needs pyarrow: pip install pyarrow")
+
+
+def detect_format(path: str, explicit: str | None = None) -> str:
+    if explicit:
+        return explicit
+    return "parquet" if path.lower().endswith((".parquet", ".pq")) else "csv"
+
+
+# Input
+def iter_chunks(path: str, chunk_size: int, fmt: str):
+    """
+    DataFrames of at most chunk_size rows, in file order.
+    """
+    if fmt == "parquet":
+        _require_pyarrow()
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        import pandas as pd
+
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def _records(frame) -> list:
+    # Missing cells become missing keys, so validation reports them (or applies defaults).
+    return [
+        {k: v for k, v in row.items() if not (isinstance(v, float) and math.isnan(v))}
+        for row in frame.to_dict("records")
+    ]
+
+
+# Worker
+_worker = {}
+
+
+def _init_worker(nthread: int, approval_path: str | None = None, strategy_path: str | None = None):
+    try:
+        from .app import APPROVAL_PATH, STRATEGY_PATH, Applicant
+        from .models import ModelBundle
+        from .serve import limit_threads
+    except ImportError:
+        from app import APPROVAL_PATH, STRATEGY_PATH, Applicant
+        from models import ModelBundle
+        from serve import limit_threads
+
+    models = ModelBundle(approval_path or APPROVAL_PATH, strategy_path or STRATEGY_PATH).load()
+    for pipeline in (models.approval_pipeline, models.strategy_pipeline):
+        limit_threads(pipeline, nthread)
+    _worker.update(models=models, schema=Applicant)
+
+
+def score_records(records: list, models, schema) -> list:
+    """
+    One output row per input record: approval and strategy results, or an error.
+    """
+    from pydantic import ValidationError
+
+    rows = [None] * len(records)
+    valid_index, valid = [], []
+    for i, record in enumerate(records):
+        try:
+            valid.append(schema(**record).model_dump())
+            valid_index.append(i)
+        except ValidationError as e:
+            fields = sorted({".".join(map(str, err["loc"])) for err in e.errors(include_url=False)})
+            rows[i] = {"error": f"invalid applicant: {', '.join(fields)}"}
+
+    if valid:
+        approvals = models.predict_approvals(valid)
+        strategies = models.wrapper.predict_many_with_rules(valid)
+        classes = models.wrapper.classes
+        for i, a, s in zip(valid_index, approvals, strategies):
+            row = {
+                "approval_decision": a["decision"],
+                "approval_probability": a["approval_probability"],
+                "rate_type": a["rate_type"],
+                "approval_reasons": "; ".join(a["approval_reasons"]),
+                "strategy": s["strategy"],
+                "strategy_reasons": "; ".join(s["reasons"].values()),
+                "error": None,
+            }
+            for cls in classes:
+                row[f"strategy_prob_{cls}"] = s["adjusted_probabilities"][cls]
+            rows[i] = row
+    return rows
+
+
+def part_path(out_dir: str, index: int, fmt: str) -> str:
+    return os.path.join(out_dir, f"part-{index:06d}.{fmt}")
+
+
+def _score_chunk(index: int, first_row: int, records: list, kept: dict, out_dir: str, fmt: str):
+    import pandas as pd
+
+    started = time.perf_counter()
+    # Fixed columns and dtypes, so every part has the same schema even if all its rows failed.
+    classes = _worker["models"].wrapper.classes
+    columns = list(TEXT_COLUMNS) + ["approval_probability"] + [f"strategy_prob_{c}" for c in classes]
+    frame = pd.DataFrame(score_records(records, _worker["models"], _worker["schema"]), columns=columns)
+    frame = frame.astype({c: "string" for c in TEXT_COLUMNS} | {c: "float64" for c in columns[len(TEXT_COLUMNS):]})
+    frame.insert(0, "row", range(first_row, first_row + len(records)))
+    for position, (name, values) in enumerate(kept.items(), start=1):
+        frame.insert(position, name, values)
+
+    final = part_path(out_dir, index, fmt)
+    tmp = final + ".tmp"
+    if fmt == "parquet":
+        frame.to_parquet(tmp, index=False)
+    else:
+        frame.to_csv(tmp, index=False)
+    os.replace(tmp, final)
+    return index, len(frame), int(frame["error"].notna().sum()), time.perf_counter() - started
+
+
+# Driver
+def _manifest(input_path, fmt_in, fmt_out, chunk_size, keep, model_version) -> dict:
+    stat = os.stat(input_path)
+    return {
+        "input": os.path.abspath(input_path),
+        "input_size": stat.st_size,
+        "input_mtime": stat.st_mtime,
+        "input_format": fmt_in,
+        "output_format": fmt_out,
+        "chunk_size": chunk_size,
+        "keep": list(keep),
+        "model_version": model_version,
+    }
+
+
+def _prepare_output(out_dir: str, manifest: dict, restart: bool) -> set:
+    """
+    Create or validate the output directory; return the chunk indexes already written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    for leftover in glob.glob(os.path.join(out_dir, "part-*.tmp")):
+        os.remove(leftover)
+    if restart:
+        for part in glob.glob(os.path.join(out_dir, "part-*")):
+            os.remove(part)
+    elif os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            previous = json.load(f)
+        if previous != manifest:
+            changed = sorted(k for k in manifest if previous.get(k) != manifest[k])
+            raise SystemExit(
+                f"{out_dir} holds output from a different run ({', '.join(changed)} changed); "
+                "use --restart to discard it"
+            )
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    suffix = "." + manifest["output_format"]
+    return {
+        int(os.path.basename(p)[len("part-"):-len(suffix)])
+        for p in glob.glob(os.path.join(out_dir, "part-*" + suffix))
+    }
+
+
+def score_file(input_path: str, out_dir: str, chunk_size: int = 50_000, workers: int | None = None,
+               input_format: str | None = None, output_format: str = "csv", keep=(),
+               restart: bool = False, progress=print) -> dict:
+    try:
+        from .app import APPROVAL_PATH, STRATEGY_PATH
+        from .cache import artifact_version
+    except ImportError:
+        from app import APPROVAL_PATH, STRATEGY_PATH
+        from cache import artifact_version
+
+    fmt_in = detect_format(input_path, input_format)
+    if "parquet" in (fmt_in, output_format):
+        _require_pyarrow()
+    workers = workers or os.cpu_count() or 1
+    manifest = _manifest(input_path, fmt_in, output_format, chunk_size, keep,
+                         artifact_version(APPROVAL_PATH, STRATEGY_PATH))
+    done = _prepare_output(out_dir, manifest, restart)
+
+    totals = {"chunks": 0, "skipped_chunks": 0, "rows": 0, "errors": 0}
+    started = time.perf_counter()
+
+    def collect(futures):
+        for future in futures:
+            index, rows, errors, seconds = future.result()
+            totals["chunks"] += 1
+            totals["rows"] += rows
+            totals["errors"] += errors
+            if progress:
+                elapsed = time.perf_counter() - started
+                progress(f"chunk {index}: {rows} rows in {seconds:.2f}s "
+                         f"({totals['rows']} rows, {totals['rows'] / elapsed:.0f} rows/s)")
+
+    # One XGBoost thread per worker; the pool provides the parallelism.
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(1,)) as pool:
+        pending = set()
+        first_row = 0
+        for index, chunk in enumerate(iter_chunks(input_path, chunk_size, fmt_in)):
+            n = len(chunk)
+            if index in done:
+                totals["skipped_chunks"] += 1
+            else:
+                missing = [c for c in keep if c not in chunk.columns]
+                if missing:
+                    raise SystemExit(f"--keep column(s) not in the input: {', '.join(missing)}")
+                kept = {c: chunk[c].tolist() for c in keep}
+                pending.add(pool.submit(_score_chunk, index, first_row, _records(chunk), kept,
+                                        out_dir, output_format))
+            first_row += n
+            del chunk
+            if len(pending) >= 2 * workers:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(finished)
+        collect(wait(pending).done)
+
+    totals["seconds"] = round(time.perf_counter() - started, 3)
+    return totals
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Score a mortgage book with the approval and strategy models.")
+    parser.add_argument("input", help="CSV or Parquet file, one applicant per row")
+    parser.add_argument("output", help="directory for part files (created if needed)")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=None, help="default: CPU count")
+    parser.add_argument("--input-format", choices=FORMATS, help="default: from the file extension")
+    parser.add_argument("--format", dest="output_format", choices=FORMATS, default="csv")
+    parser.add_argument("--keep", action="append", default=[], help="input column to copy to the output (repeatable)")
+    parser.add_argument("--restart", action="store_true", help="discard existing output instead of resuming")
+    args = parser.parse_args(argv)
+
+    totals = score_file(args.input, args.output, args.chunk_size, args.workers, args.input_format,
+                        args.output_format, args.keep, args.restart)
+    print(f"scored {totals['rows']} rows in {totals['chunks']} chunks "
+          f"({totals['skipped_chunks']} already done, {totals['errors']} rows with errors) "
+          f"in {totals['seconds']}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
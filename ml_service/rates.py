@@ -0,0 +1,185 @@
+"""
+Monte Carlo rate paths for the Fixed vs Variable question.
+
+The variable rate follows a Vasicek (mean-reverting) model in annual percent,
+stepped monthly with its exact Gaussian transition:
+
+    r[t+1] = theta + (r[t] - theta) * exp(-kappa / 12) + sigma * sqrt((1 - exp(-kappa / 6)) / (2 * kappa)) * z
+
+A variable-rate payment is reset every month to amortize the remaining balance at
+that month's rate over the remaining term; the fixed payment is level for the
+whole term. All paths are advanced together, so the only Python loop is over the
+term's months (60 for a 5-year term) when stepping the rate itself.
+"""
+from __future__ import annotations
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from .amortization import loan_costs, payment
+    from .timing import NULL_TIMER
+except ImportError:
+    from amortization import loan_costs, payment
+    from timing import NULL_TIMER
+
+
+# Model Defaults
+KAPPA = 0.3           # mean-reversion speed, per year
+THETA = 4.5           # long-run variable rate, %
+SIGMA = 1.0           # rate volatility, % per sqrt(year)
+RATE_FLOOR = 0.0
+FIXED_PREMIUM = 0.5   # fixed over variable at origination when no fixed rate is quoted, % points
+TERM_YEARS = 5
+PATHS = 10_000
+PERCENTILES = (5, 25, 50, 75, 95)
+# Qualifying rate for the default stress threshold: contract rate + 2 points, at least 5.25%.
+STRESS_ADD_ON = 2.0
+STRESS_MIN_RATE = 5.25
+# simulate_many only starts a process pool above this many paths in total.
+POOL_MIN_PATHS = 500_000
+
+
+def simulate_paths(r0: float, months: int, n_paths: int = PATHS, kappa: float = KAPPA, theta: float = THETA,
+                   sigma: float = SIGMA, seed=0, floor: float = RATE_FLOOR) -> np.ndarray:
+    """
+    (months, n_paths) variable rates in %, for months 1..months after r0.
+    `seed` is an int or np.random.SeedSequence; equal seeds give equal paths.
+    """
+    rng = np.random.default_rng(seed)
+    decay = math.exp(-kappa / 12.0)
+    step_sd = sigma * math.sqrt((1.0 - decay ** 2) / (2.0 * kappa)) if kappa > 0 else sigma / math.sqrt(12.0)
+    # Month-major, so each step works on one contiguous row of paths. Antithetic
+    # pairs (z, -z) halve the draws, which dominate the cost, and reduce variance.
+    half = (n_paths + 1) // 2
+    shocks = rng.standard_normal((months, half))
+    shocks *= step_sd
+    paths = np.concatenate([shocks, -shocks[:, :n_paths - half]], axis=1)
+    gap = np.full(n_paths, float(r0) - theta)
+    for t in range(months):
+        gap = gap * decay + paths[t]
+        paths[t] = gap
+    paths += theta
+    return np.maximum(paths, floor, out=paths)
+
+
+def variable_payments(balance: float, years: float, paths: np.ndarray) -> tuple:
+    """
+    (payments, interest) per month and path for a variable-payment mortgage, and
+    the balance left at the end of the paths.
+
+    Each month's payment is a fixed share of the balance (the annuity factor for
+    that month's rate and the months left), so the balance is a cumulative product
+    and no loop over months is needed.
+    """
+    months = paths.shape[0]
+    total_months = max(years, 1.0 / 12.0) * 12.0
+    left = np.maximum(total_months - np.arange(months), 1.0)[:, None]
+    rate = paths / 1200.0
+
+    # annuity_factor(paths, left / 12), in place: r / (1 - (1 + r) ** -left), or 1 / left at r = 0.
+    discount = np.log1p(rate)
+    discount *= -left
+    np.exp(discount, out=discount)
+    np.subtract(1.0, discount, out=discount)
+    factor = np.empty_like(rate)
+    factor[:] = 1.0 / left
+    np.divide(rate, discount, out=factor, where=rate > 0)
+
+    # Share of the balance left after each month; cumulative product = balance path.
+    remaining = 1.0 + rate
+    remaining -= factor
+    np.maximum(remaining, 0.0, out=remaining)
+    np.cumprod(remaining, axis=0, out=remaining)
+    remaining *= float(balance)
+    opening = np.empty_like(remaining)
+    opening[0] = float(balance)
+    opening[1:] = remaining[:-1]
+    factor *= opening
+    rate *= opening
+    return factor, rate, remaining[-1]
+
+
+def _percentiles(values: np.ndarray) -> dict:
+    return {f"p{q}": round(float(v), 2) for q, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))}
+
+
+def term_months(case: dict, term_years: float = TERM_YEARS) -> int:
+    """
+    Months simulated for a case: the term, or the remaining amortization if shorter.
+    """
+    years = max(float(case.get("amortization_remaining", 20)), 1.0)
+    return int(min(term_years, years) * 12)
+
+
+def rate_risk(case: dict, fixed_rate: float | None = None, term_years: int = TERM_YEARS, n_paths: int = PATHS,
+              kappa: float = KAPPA, theta: float = THETA, sigma: float = SIGMA, seed=0,
+              stress_payment: float | None = None, timer=NULL_TIMER) -> dict:
+    """
+    Payment and cost distribution over one term, variable vs fixed, for one applicant.
+
+    The variable rate starts at interest_rate_current; fixed_rate defaults to that
+    plus FIXED_PREMIUM. stress_payment defaults to the payment at the qualifying rate.
+    """
+    balance = float(case.get("mortgage_balance", 0.0))
+    r0 = float(case.get("interest_rate_current", 0.0))
+    years = max(float(case.get("amortization_remaining", 20)), 1.0)
+    months = term_months(case, term_years)
+    fixed_rate = r0 + FIXED_PREMIUM if fixed_rate is None else float(fixed_rate)
+    if stress_payment is None:
+        stress_payment = float(payment(balance, max(r0 + STRESS_ADD_ON, STRESS_MIN_RATE), years))
+
+    paths = simulate_paths(r0, months, n_paths, kappa, theta, sigma, seed)
+    timer.lap("simulate_paths")
+    payments, interest, remaining = variable_payments(balance, years, paths)
+    timer.lap("variable_payments")
+
+    fixed = loan_costs(balance, fixed_rate, years, horizon_years=months / 12.0)
+    fixed_interest = float(fixed["interest_to_horizon"])
+    peak = payments.max(axis=0)
+    term_interest = interest.sum(axis=0)
+    result = {
+        "paths": n_paths,
+        "term_months": months,
+        "model": {"kappa": kappa, "theta": theta, "sigma": sigma, "r0": r0},
+        "fixed": {
+            "rate": fixed_rate,
+            "monthly_payment": round(float(fixed["monthly_payment"]), 2),
+            "term_interest": round(fixed_interest, 2),
+            "balance_at_term": round(float(fixed["balance_at_horizon"]), 2),
+        },
+        "variable": {
+            "rate_at_term": _percentiles(paths[-1]),
+            "monthly_payment": _percentiles(payments.mean(axis=0)),
+            "peak_payment": _percentiles(peak),
+            "term_interest": _percentiles(term_interest),
+            "balance_at_term": _percentiles(remaining),
+        },
+        "stress_payment": round(stress_payment, 2),
+        "prob_payment_exceeds_stress": float((peak > stress_payment).mean()),
+        "prob_variable_costs_more": float((term_interest > fixed_interest).mean()),
+    }
+    timer.lap("summarize")
+    return result
+
+
+def _rate_risk_job(job):
+    case, seed, kwargs = job
+    return rate_risk(case, seed=seed, **kwargs)
+
+
+def simulate_many(cases: list, seed: int = 0, workers: int | None = None, **kwargs) -> list:
+    """
+    rate_risk for each case, in input order. Each case gets its own child seed, so
+    results do not depend on `workers`. A process pool is used when workers > 1
+    and the batch has at least POOL_MIN_PATHS paths in total.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(len(cases))
+    jobs = [(case, child, kwargs) for case, child in zip(cases, seeds)]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(cases) * kwargs.get("n_paths", PATHS) >= POOL_MIN_PATHS:
+        with ProcessPoolExecutor(workers) as pool:
+            return list(pool.map(_rate_risk_job, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+    return [_rate_risk_job(job) for job in jobs]
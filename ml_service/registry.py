@@ -0,0 +1,221 @@
+"""
+Versioned model artifacts with hot-swap.
+
+    models/
+        2026-10-01/approval_pipeline.pkl, strategy_pipeline.pkl
+        2026-10-18/approval_pipeline.pkl, strategy_pipeline.pkl
+        CURRENT        (optional: pins a version by name, e.g. to roll back)
+
+The newest version (by directory name, unless CURRENT names one) is served. A
+watcher thread polls the directory; a new version is loaded and warmed up in the
+background, then swapped in atomically. Requests lease the bundle they start on,
+so a swap never changes models mid-request, and a retired bundle is closed once
+its last lease is returned. Copy new versions in under a dot-prefixed name and
+rename them into place: half-written directories are not picked up.
+"""
+from __future__ import annotations
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    from .logs import logger
+    from .models import ModelBundle
+except ImportError:
+    from logs import logger
+    from models import ModelBundle
+
+APPROVAL_FILE = "approval_pipeline.pkl"
+STRATEGY_FILE = "strategy_pipeline.pkl"
+PIN_FILE = "CURRENT"
+
+
+def list_versions(root: str) -> list:
+    """
+    Version directories under root that hold both artifacts, oldest first.
+    """
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return []
+    return sorted(
+        name for name in names
+        if not name.startswith((".", "_"))
+        and os.path.isfile(os.path.join(root, name, APPROVAL_FILE))
+        and os.path.isfile(os.path.join(root, name, STRATEGY_FILE))
+    )
+
+
+# Model Registry
+class ModelRegistry:
+    """
+    Serves one ModelBundle at a time. Built from a fixed bundle (no swaps), or
+    from a directory of versions with `root`.
+    """
+
+    def __init__(self, bundle: ModelBundle | None = None, root: str | None = None, warmup: int = 0,
+                 poll_seconds: float = 10.0, on_swap=None):
+        if (bundle is None) == (root is None):
+            raise ValueError("pass either bundle or root")
+        self.root = root
+        self.warmup = warmup
+        self.poll_seconds = poll_seconds
+        self.on_swap = on_swap
+        self.swaps = 0
+        self.error = None
+        self._failed_version = None
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._leases = {}
+        self._retired = set()
+        self._stop = threading.Event()
+        self._thread = None
+
+        if bundle is None:
+            version = self.target_version()
+            if version is None:
+                raise FileNotFoundError(f"no model versions in {root}")
+            bundle = self._bundle(version)
+        self._current = bundle
+
+    @property
+    def current(self) -> ModelBundle:
+        return self._current
+
+    def _bundle(self, version: str) -> ModelBundle:
+        path = os.path.join(self.root, version)
+        return ModelBundle(os.path.join(path, APPROVAL_FILE), os.path.join(path, STRATEGY_FILE),
+                           warmup=self.warmup, version=version)
+
+    def target_version(self) -> str | None:
+        """
+        The version that should be served: the pinned one, else the newest.
+        """
+        versions = list_versions(self.root)
+        try:
+            with open(os.path.join(self.root, PIN_FILE)) as f:
+                pinned = f.read().strip()
+        except FileNotFoundError:
+            pinned = None
+        if pinned:
+            return pinned if pinned in versions else None
+        return versions[-1] if versions else None
+
+    # Leases
+    @contextmanager
+    def lease(self):
+        """
+        The current bundle, kept alive until the block exits.
+        """
+        with self._lock:
+            bundle = self._current
+            self._leases[bundle] = self._leases.get(bundle, 0) + 1
+        try:
+            yield bundle
+        finally:
+            self._release(bundle)
+
+    def _release(self, bundle):
+        with self._lock:
+            self._leases[bundle] -= 1
+            drained = self._leases[bundle] == 0
+            if drained:
+                del self._leases[bundle]
+            close = drained and bundle in self._retired
+            if close:
+                self._retired.discard(bundle)
+        if close:
+            bundle.close()
+
+    # Swapping
+    def activate(self, version: str) -> bool:
+        """
+        Load and warm up `version` in the calling thread, then swap it in.
+        Returns False if it is already current. On failure the old bundle
+        keeps serving and the error is kept in status().
+        """
+        with self._swap_lock:
+            if self._current.version == version:
+                return False
+            bundle = self._bundle(version)
+            try:
+                bundle.warm_up()
+            except Exception as e:
+                self.error = f"{version}: {type(e).__name__}: {e}"
+                self._failed_version = version
+                raise
+            with self._lock:
+                old, self._current = self._current, bundle
+                in_use = old in self._leases
+                if in_use:
+                    self._retired.add(old)  # closed by the last _release
+                self.swaps += 1
+                self.error = None
+                self._failed_version = None
+            if not in_use:
+                old.close()
+            if self.on_swap is not None:
+                self.on_swap()
+            return True
+
+    def poll(self) -> bool:
+        """
+        Swap to the target version if it changed. Returns True on a swap.
+        """
+        if self.root is None:
+            return False
+        version = self.target_version()
+        if version is None or version == self._current.version or version == self._failed_version:
+            return False
+        try:
+            return self.activate(version)
+        except Exception:
+            logger.exception("model version failed to load", extra={"fields": {"version": version}})
+            return False
+
+    def start(self) -> threading.Thread | None:
+        """
+        Poll for new versions every poll_seconds on a daemon thread.
+        """
+        if self.root is None or self._thread is not None:
+            return self._thread
+
+        def run():
+            while not self._stop.wait(self.poll_seconds):
+                self.poll()
+
+        self._thread = threading.Thread(target=run, name="model-registry", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "root": self.root,
+                "current": self._current.version,
+                "versions": list_versions(self.root) if self.root else [],
+                "swaps": self.swaps,
+                "in_flight": self._leases.get(self._current, 0),
+                "draining": sorted((b.version, self._leases.get(b, 0)) for b in self._retired),
+                "error": self.error,
+            }
+
+
+class CurrentBundle:
+    """
+    Stand-in for the served ModelBundle: attribute access goes to whichever
+    bundle is current at that moment. Use ModelRegistry.lease() when several
+    calls must hit the same version.
+    """
+
+    def __init__(self, registry: ModelRegistry):
+        self._registry = registry
+
+    def __getattr__(self, name):
+        return getattr(self._registry.current, name)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+# Row Layout
+class RowLayout:
+    """
+    Precomputed column layout for feeding one applicant dict to a fitted pipeline.
+    Numeric columns fill a reusable float64 buffer, categorical columns a small
+    object buffer; missing keys are left at 0 like the old reindex path.
+    """
+
+    def __init__(self, numeric_columns, categorical_columns=()):
+        self.numeric_columns = list(numeric_columns)
+        self.categorical_columns = list(categorical_columns)
+        self.columns = self.numeric_columns + self.categorical_columns
+        self._numeric_index = {c: i for i, c in enumerate(self.numeric_columns)}
+        self._categorical_index = {c: i for i, c in enumerate(self.categorical_columns)}
+        self._local = threading.local()
+
+    @classmethod
+    def from_pipeline(cls, pipeline, columns=None):
+        """
+        Build a layout from the fitted 'preprocess' ColumnTransformer.
+        Returns None when the columns can't be resolved by name.
+        """
+        layout = getattr(pipeline, "layout", None)
+        if isinstance(layout, RowLayout):
+            return layout
+        try:
+            preprocess = pipeline.named_steps["preprocess"]
+            transformers = preprocess.transformers_
+        except (AttributeError, KeyError):
+            return None
+
+        numeric, categorical = [], []
+        for name, transformer, cols in transformers:
+            if name == "remainder" or transformer == "drop":
+                continue
+            cols = [cols] if isinstance(cols, str) else list(cols)
+            if not all(isinstance(c, str) for c in cols):
+                return None
+            target = categorical if hasattr(transformer, "categories_") else numeric
+            target.extend(c for c in cols if c not in target)
+
+        if columns is not None:
+            known = set(columns)
+            if not set(numeric + categorical) <= known:
+                return None
+        return cls(numeric, categorical)
+
+    def _buffers(self):
+        local = self._local
+        if not hasattr(local, "numeric"):
+            local.numeric = np.zeros((1, len(self.numeric_columns)), dtype=float)
+            local.categorical = np.zeros((1, len(self.categorical_columns)), dtype=object)
+        return local.numeric, local.categorical
+
+    def fill(self, applicant: dict):
+        """
+        Write one applicant into this thread's buffers and return them.
+        The buffers are overwritten by the next call on the same thread.
+        """
+        numeric, categorical = self._buffers()
+        numeric.fill(0.0)
+        categorical.fill(0)
+        numeric_index, categorical_index = self._numeric_index, self._categorical_index
+        for key, value in applicant.items():
+            i = numeric_index.get(key)
+            if i is not None:
+                numeric[0, i] = value
+                continue
+            i = categorical_index.get(key)
+            if i is not None:
+                categorical[0, i] = value
+        return numeric, categorical
+
+    def fill_many(self, applicants):
+        """
+        Fresh (N, n_numeric) / (N, n_categorical) arrays for a batch of applicants.
+        """
+        numeric = np.zeros((len(applicants), len(self.numeric_columns)), dtype=float)
+        categorical = np.zeros((len(applicants), len(self.categorical_columns)), dtype=object)
+        for row, applicant in enumerate(applicants):
+            for key, value in applicant.items():
+                i = self._numeric_index.get(key)
+                if i is not None:
+                    numeric[row, i] = value
+                    continue
+                i = self._categorical_index.get(key)
+                if i is not None:
+                    categorical[row, i] = value
+        return numeric, categorical
+
+    def fill_columns(self, columns, n: int):
+        """
+        fill_many for column-oriented input: a DataFrame or a dict of (N,) arrays.
+        Missing columns are left at 0.
+        """
+        numeric = np.zeros((n, len(self.numeric_columns)), dtype=float)
+        categorical = np.zeros((n, len(self.categorical_columns)), dtype=object)
+        for i, col in enumerate(self.numeric_columns):
+            if col in columns:
+                numeric[:, i] = columns[col]
+        for i, col in enumerate(self.categorical_columns):
+            if col in columns:
+                categorical[:, i] = columns[col]
+        return numeric, categorical
+
+    def frame(self, applicant: dict) -> pd.DataFrame:
+        """
+        One-row DataFrame for transformers that select columns by name.
+        """
+        numeric, categorical = self.fill(applicant)
+        return self.to_frame(numeric.copy(), categorical.copy())
+
+    def to_frame(self, numeric, categorical) -> pd.DataFrame:
+        rows = pd.DataFrame(numeric, columns=self.numeric_columns)
+        if not self.categorical_columns:
+            return rows
+        return pd.concat([rows, pd.DataFrame(categorical, columns=self.categorical_columns)], axis=1)
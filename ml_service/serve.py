@@ -0,0 +1,153 @@
+"""
+Production entry point: load the models once, then fork workers that share them.
+
+    python -m ml_service.serve --workers 4 --port 8001
+
+Every worker inherits the parent's pipelines copy-on-write and accepts on the
+same listening socket. Unlike `uvicorn --workers`, which re-imports the app in
+every worker, the models are only loaded once.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+try:
+    from .logs import logger
+except ImportError:
+    from logs import logger
+
+
+def _default_workers() -> int:
+    return int(os.getenv("ML_WORKERS", str(os.cpu_count() or 1)))
+
+
+def _default_nthread(workers: int) -> int:
+    # Workers x threads per prediction shouldn't exceed the cores we have.
+    return int(os.getenv("ML_XGB_NTHREAD", str(max(1, (os.cpu_count() or 1) // workers))))
+
+
+def limit_threads(pipeline, nthread: int):
+    """
+    Cap XGBoost's prediction threads for a (possibly compiled) pipeline.
+    """
+    booster = getattr(pipeline, "booster", None)
+    if booster is not None:
+        booster.set_param({"nthread": nthread})
+    try:
+        pipeline.steps[-1][1].set_params(n_jobs=nthread)
+    except (AttributeError, IndexError, ValueError):
+        pass
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock, log_level):
+    import uvicorn
+
+    config = uvicorn.Config(app, log_level=log_level, access_log=False)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _spawn(app, sock, log_level) -> int:
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        code = 0
+        try:
+            _run_worker(app, sock, log_level)
+        except BaseException:
+            logger.exception("worker failed", extra={"fields": {"pid": os.getpid()}})
+            code = 1
+        # os._exit skips atexit; flush the log queue first.
+        logging.shutdown()
+        os._exit(code)
+    return pid
+
+
+def serve(host: str = "0.0.0.0", port: int = 8001, workers: int | None = None,
+          nthread: int | None = None, log_level: str = "info"):
+    workers = workers or _default_workers()
+    nthread = nthread or _default_nthread(workers)
+    # Must be set before xgboost's OpenMP runtime starts.
+    os.environ.setdefault("OMP_NUM_THREADS", str(nthread))
+
+    started = time.perf_counter()
+    try:
+        from . import app as app_module
+    except ImportError:
+        import app as app_module
+    models = app_module.models.load()
+    for pipeline in (models.approval_pipeline, models.strategy_pipeline):
+        limit_threads(pipeline, nthread)
+    # No predictions (or warm-up) in the parent: libgomp's thread pool doesn't
+    # survive fork(). Each worker warms up from the app's startup hook.
+
+    # Keep the cyclic GC from writing to inherited objects (and un-sharing their pages).
+    gc.collect()
+    gc.freeze()
+    logger.info("models loaded; starting workers", extra={"fields": {
+        "seconds": round(time.perf_counter() - started, 2), "workers": workers,
+        "xgb_nthread": nthread, "host": host, "port": port,
+    }})
+
+    sock = bind_socket(host, port)
+    children = {_spawn(app_module.app, sock, log_level) for _ in range(workers)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            logger.warning("worker exited; restarting", extra={"fields": {
+                "pid": pid, "exit_code": os.waitstatus_to_exitcode(status),
+            }})
+            children.add(_spawn(app_module.app, sock, log_level))
+    sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the ML service with pre-forked workers.")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8001")))
+    parser.add_argument("--workers", type=int, default=None, help="default: ML_WORKERS or CPU count")
+    parser.add_argument("--nthread", type=int, default=None,
+                        help="XGBoost threads per worker (default: ML_XGB_NTHREAD or cpus // workers)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+    if not hasattr(os, "fork"):
+        sys.exit("ml_service.serve needs fork(); use `uvicorn ml_service.app:app` on this platform")
+    serve(args.host, args.port, args.workers, args.nthread, args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+from __future__ import annotations
+import math
+
+import numpy as np
+
+try:
+    from . import approval
+    from .amortization import payment, principal_for_payment
+    from .timing import NULL_TIMER
+except ImportError:
+    import approval
+    from amortization import payment, principal_for_payment
+    from timing import NULL_TIMER
+
+
+def rule_limits(applicant: dict, rates, years):
+    """
+    Closed-form balance ceiling from the hard-fail rules for every
+    (rate, years) pair, and the name of the binding rule.
+    """
+    rates, years = np.broadcast_arrays(np.asarray(rates, dtype=float), np.asarray(years, dtype=float))
+    income = max(applicant["income_monthly"], 1)
+    limits = {
+        "loan_to_value": np.full(rates.shape, approval.MAX_LOAN_TO_VALUE * max(applicant["property_value"], 1)),
+        "gds_ratio": principal_for_payment(approval.MAX_GDS_RATIO * income, rates, years),
+        "tds_ratio": principal_for_payment(
+            approval.MAX_TDS_RATIO * income - applicant["debt_payments_monthly"], rates, years
+        ),
+    }
+    names = np.array(list(limits), dtype=object)
+    stacked = np.stack(list(limits.values()))
+    ceiling = stacked.min(axis=0)
+    binding = names[stacked.argmin(axis=0)]
+
+    # Rules that fail whatever the balance, in rule_based_predict's order; the first one wins.
+    unbound = np.ones(rates.shape, dtype=bool)
+    for failed, name in (
+        (applicant["credit_score"] < approval.MIN_CREDIT_SCORE, "credit_score"),
+        (applicant["age"] + years > approval.MAX_AGE_PLUS_AMORT, "age_plus_amort"),
+        (applicant["income_monthly"] <= 0, "income_monthly"),
+    ):
+        failed = unbound & np.broadcast_to(failed, rates.shape)
+        ceiling = np.where(failed, 0.0, ceiling)
+        binding = np.where(failed, name, binding)
+        unbound &= ~failed
+    # A negative TDS ceiling means debt payments alone break the rule.
+    ceiling = np.maximum(ceiling, 0.0)
+    return ceiling, binding
+
+
+def max_mortgage(models, applicant: dict, rates, years, probability_cutoff: float = 0.5,
+                 tolerance: float = 100.0, scan_points: int = 24, timer=NULL_TIMER) -> dict:
+    """
+    Largest mortgage_balance approved at each (rate, amortization) cell.
+
+    The hard-fail rules give a closed-form ceiling per cell. The model's approval
+    probability is not monotone in balance (it is low for balances far below the
+    ones it was trained on), so each cell is first scanned at `scan_points`
+    evenly spaced balances up to its ceiling. All cells are then bisected together
+    between their highest approved sample and the next one, to within `tolerance`
+    dollars. Each step is one batched predict_approvals call. Approved ranges
+    narrower than ceiling / scan_points can be missed.
+    """
+    rate_grid, year_grid = np.meshgrid(np.asarray(rates, dtype=float), np.asarray(years, dtype=float),
+                                       indexing="ij")
+    ceiling, binding = rule_limits(applicant, rate_grid, year_grid)
+    ceiling = np.floor(ceiling * (1 - 1e-9))
+    timer.lap("rule_limits")
+
+    flat_rates, flat_years = rate_grid.ravel(), year_grid.ravel()
+
+    def approved(balances, cells):
+        payments = payment(balances, flat_rates[cells], flat_years[cells])
+        points = [
+            {**applicant,
+             "mortgage_balance": float(b),
+             "monthly_payment_current": float(p),
+             "interest_rate_current": float(flat_rates[c]),
+             "amortization_remaining": int(flat_years[c])}
+            for b, p, c in zip(balances, payments, cells)
+        ]
+        results = models.predict_approvals(points)
+        return np.array([
+            r["decision"] == "PASS" and r["approval_probability"] >= probability_cutoff for r in results
+        ], dtype=bool)
+
+    cells = np.flatnonzero(ceiling.ravel() > 0)
+    lo = np.zeros(ceiling.size)
+    hi = np.zeros(ceiling.size)
+    flat_binding = binding.ravel().copy()
+    steps = 0
+
+    # Coarse scan: every cell's samples in one call.
+    fractions = np.arange(1, scan_points + 1) / scan_points
+    samples = ceiling.ravel()[cells, None] * fractions
+    ok = approved(samples.ravel(), np.repeat(cells, scan_points)).reshape(samples.shape)
+    any_ok = ok.any(axis=1)
+    last_ok = scan_points - 1 - ok[:, ::-1].argmax(axis=1)
+    rule_bound = any_ok & (last_ok == scan_points - 1)
+
+    flat_binding[cells[~rule_bound]] = "model_probability"
+    bracketed = any_ok & ~rule_bound
+    rows = np.flatnonzero(bracketed)
+    lo[cells[rule_bound]] = samples[rule_bound, -1]
+    lo[cells[rows]] = samples[rows, last_ok[rows]]
+    hi[cells[rows]] = samples[rows, last_ok[rows] + 1]
+    active = cells[rows]
+    timer.lap("scan")
+
+    max_steps = math.ceil(math.log2(max((hi - lo).max(initial=0.0), tolerance) / tolerance)) + 1
+    while active.size and steps < max_steps:
+        mid = (lo[active] + hi[active]) / 2.0
+        ok = approved(mid, active)
+        lo[active] = np.where(ok, mid, lo[active])
+        hi[active] = np.where(ok, hi[active], mid)
+        active = active[(hi[active] - lo[active]) > tolerance]
+        steps += 1
+    timer.lap("bisection")
+
+    balance = np.floor(lo).reshape(ceiling.shape)
+    return {
+        "rates": [float(r) for r in np.asarray(rates, dtype=float)],
+        "amortizations": [int(y) for y in np.asarray(years)],
+        "max_balance": balance.tolist(),
+        "monthly_payment": np.round(payment(balance, rate_grid, year_grid), 2).tolist(),
+        "binding": flat_binding.reshape(ceiling.shape).tolist(),
+        "probability_cutoff": probability_cutoff,
+        "scan_points": scan_points,
+        "bisection_steps": steps,
+    }
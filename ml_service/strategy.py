@@ -2,6 +2,15 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
+try:
+    from .amortization import strategy_costs
+    from .rows import RowLayout
+    from .timing import NULL_TIMER
+except ImportError:
+    from amortization import strategy_costs
+    from rows import RowLayout
+    from timing import NULL_TIMER
+
 
 #Feasibility Checks 
 def check_feasibility(case: dict) -> dict:
@@ -360,6 +369,8 @@ def recommend_strategy(case: dict, model_probs, classes, pref_threshold: float =
             scores[s] = base + 0.1 * prob
         else:
             scores[s] = pref + 0.1 * prob + 0.05
+        # Optional cost features (see cost_features); absent means no effect.
+        scores[s] += COST_WEIGHT * float(case.get(f"cost_saving_{s}", 0.0))
 
     top_score = max(scores.values())
     tied = [s for s, sc in scores.items() if abs(sc - top_score) < 1e-6]
@@ -494,6 +505,405 @@ def enrich_features(applicant: dict) -> dict:
     return case
 
 
+
+# Columnar Engine
+# Array counterparts of the dict-based functions above for scoring N cases at
+# once. Strategy-aligned arrays use STRATEGIES column order; class-aligned
+# arrays follow `classes`, which must contain every strategy name.
+STRATEGIES = ("baseline", "extend", "lump_sum", "downsize")
+_STRATEGY_RANK = ("downsize", "lump_sum", "extend", "baseline")
+
+
+def _as_frame(cases) -> pd.DataFrame:
+    if isinstance(cases, pd.DataFrame):
+        return cases
+    return pd.DataFrame(cases)
+
+
+def _column(frame: pd.DataFrame, name: str, default: float = 0.0) -> np.ndarray:
+    if name in frame.columns:
+        return frame[name].to_numpy(dtype=float)
+    return np.full(len(frame), default, dtype=float)
+
+
+def _class_index(classes) -> dict:
+    classes_list = [str(c) for c in classes]
+    missing = [s for s in STRATEGIES if s not in classes_list]
+    if missing:
+        raise ValueError(f"classes is missing strategies: {missing}")
+    return {s: classes_list.index(s) for s in STRATEGIES}
+
+
+def _align_to_classes(strategy_matrix: np.ndarray, classes, fill) -> np.ndarray:
+    out = np.full((strategy_matrix.shape[0], len(classes)), fill, dtype=strategy_matrix.dtype)
+    for j, s in enumerate(STRATEGIES):
+        if s in classes:
+            out[:, list(classes).index(s)] = strategy_matrix[:, j]
+    return out
+
+
+def preference_matrix(cases) -> np.ndarray:
+    """
+    (N, 4) preference strength per strategy, same mapping as apply_preferences.
+    """
+    frame = _as_frame(cases)
+    return np.column_stack([
+        _column(frame, "pref_stability"),
+        np.maximum(_column(frame, "pref_low_payment"), _column(frame, "pref_flexibility")),
+        _column(frame, "pref_fast_payoff"),
+        _column(frame, "pref_equity_growth"),
+    ])
+
+
+def enrich_features_frame(cases) -> pd.DataFrame:
+    frame = _as_frame(cases).copy()
+    n = len(frame)
+
+    amort = _column(frame, "amortization_remaining", 20)
+    pv = _column(frame, "property_value")
+    bal = _column(frame, "mortgage_balance")
+    rate = _column(frame, "interest_rate_current")
+    inc = _column(frame, "income_monthly")
+    exp = _column(frame, "expenses_monthly")
+    debt = _column(frame, "debt_payments_monthly")
+    age = _column(frame, "age")
+
+    if "amortization_remaining" not in frame.columns:
+        frame["amortization_remaining"] = np.full(n, 20)
+    frame["equity"] = pv - bal
+    frame["loan_to_value"] = np.where(pv > 0, bal / np.where(pv > 0, pv, 1.0), 1.0)
+
+    est_payment = np.where(rate > 0, (bal * (rate / 100.0)) / 12.0, 1.0)
+
+    frame["disposable_income"] = inc - exp - debt
+    affordability_gap = frame["disposable_income"].to_numpy(dtype=float) - est_payment
+    frame["aff_gap_severe"]   = (affordability_gap < -1000).astype(int)
+    frame["aff_gap_mild"]     = ((affordability_gap >= -1000) & (affordability_gap < 0)).astype(int)
+    frame["aff_gap_positive"] = (affordability_gap >= 0).astype(int)
+
+    dti = (exp + debt) / (inc + 1e-6)
+    frame["dti_high"] = (dti > 0.6).astype(int)
+    frame["dti_low"]  = (dti < 0.4).astype(int)
+
+    frame["retirement_risk"] = ((age + amort) > 75).astype(int)
+    frame["near_retirement"] = (age >= 60).astype(int)
+
+    return frame
+
+
+def check_feasibility_frame(cases) -> np.ndarray:
+    """
+    (N, 4) boolean feasibility mask in STRATEGIES order.
+    """
+    frame = _as_frame(cases)
+    eq      = _column(frame, "equity")
+    bal     = _column(frame, "mortgage_balance")
+    inc     = _column(frame, "income_monthly")
+    age     = _column(frame, "age")
+    savings = _column(frame, "savings_available")
+
+    dti = _column(frame, "debt_payments_monthly") / (inc + 1e-6)
+    aff_gap_severe = _column(frame, "aff_gap_severe") != 0
+    near_ret       = (age >= 65) | (_column(frame, "near_retirement") != 0)
+
+    downsize_valid = (eq >= 50_000) & ((inc < 3000) | ((age > 65) & (dti > 0.45)))
+    lump_sum_valid = (
+        (savings >= 0.02 * bal) | (savings >= 5_000) | (_column(frame, "pref_fast_payoff") >= 0.8)
+    )
+    extend_valid   = (bal > 0) & (age < 67)
+    baseline_valid = (inc > 0) & ~(near_ret & (aff_gap_severe | (dti >= 0.5)))
+
+    feasibility = np.column_stack([baseline_valid, extend_valid, lump_sum_valid, downsize_valid])
+    feasibility[~feasibility.any(axis=1), 3] = True
+    return feasibility
+
+
+def apply_preferences_frame(base_scores, classes, cases, feasibility, pref_threshold: float = 0.5):
+    """
+    Array form of apply_preferences. Returns (adjusted (N, K), prefs (N, 4)).
+    """
+    idx = _class_index(classes)
+    prefs = preference_matrix(cases)
+    adjusted = np.array(base_scores, dtype=float, copy=True)
+
+    for j, strat in enumerate(STRATEGIES):
+        pref_val = prefs[:, j]
+        col = idx[strat]
+        boosted = feasibility[:, j] & (pref_val >= pref_threshold)
+
+        adjusted[:, col] *= np.where(boosted, 1.0 + 2.0 * pref_val, 1.0)
+        penalty = np.where(boosted, 1 - 0.3 * pref_val, 1.0)
+        for other in range(adjusted.shape[1]):
+            if other != col:
+                adjusted[:, other] *= penalty
+
+        strong = feasibility[:, j] & (pref_val >= 0.85)
+        adjusted[:, col] *= np.where(strong, 3.0, 1.0)
+
+    return adjusted, prefs
+
+
+def score_strategies_frame(
+    model_probs, classes, feasibility, cases, pref_threshold: float = 0.5, temperature: float = 1.5
+):
+    """
+    Array form of score_strategies. Returns (adjusted (N, K), decisions (N,)).
+    """
+    frame = _as_frame(cases)
+    classes_list = [str(c) for c in classes]
+    idx = _class_index(classes_list)
+    prefs = preference_matrix(frame)
+    feasible = _align_to_classes(feasibility, classes_list, False)
+
+    adjusted = np.asarray(model_probs, dtype=float) * np.where(feasible, 1.0, 0.05)
+
+    # Preference weighting
+    for j, strat in enumerate(STRATEGIES):
+        pref_val = prefs[:, j]
+        boosted = feasibility[:, j] & (pref_val >= pref_threshold)
+        adjusted[:, idx[strat]] *= np.where(boosted, 1 + 1.5 * pref_val, 1.0)
+
+    # Edge-cases
+    age = _column(frame, "age")
+    inc = _column(frame, "income_monthly")
+    eq  = _column(frame, "equity")
+
+    retiree = feasibility[:, 3] & (age >= 65) & (inc < 3000) & (eq > 80_000)
+    adjusted[:, idx["downsize"]] *= np.where(retiree, 1.5, 1.0)
+    adjusted[:, idx["baseline"]] *= np.where(retiree, 0.7, 1.0)
+    saver = feasibility[:, 2] & (_column(frame, "savings_available") >= 10_000)
+    adjusted[:, idx["lump_sum"]] *= np.where(saver, 1.3, 1.0)
+
+    # Softmax with temperature as one matrix op
+    zero_rows = adjusted.sum(axis=1) == 0
+    scaled = np.exp(np.log(adjusted + 1e-6) / temperature)
+    scaled /= scaled.sum(axis=1, keepdims=True)
+    scaled[zero_rows] = 0.0
+    scaled[zero_rows, idx["baseline"]] = 1.0
+
+    # Decision
+    decision = scaled.argmax(axis=1)
+    fallback = np.where(feasible, scaled, -np.inf).argmax(axis=1)
+    swap = ~feasible[np.arange(len(decision)), decision] & feasible.any(axis=1)
+    decision = np.where(swap, fallback, decision)
+
+    return scaled, np.asarray(classes_list, dtype=object)[decision]
+
+
+def recommend_strategy_frame(cases, model_probs, classes, pref_threshold: float = 0.5) -> dict:
+    """
+    Array form of recommend_strategy. "scores" is (N, K) in class order with NaN
+    where the dict version leaves the key out.
+    """
+    frame = _as_frame(cases)
+    classes_list = [str(c) for c in classes]
+    idx = _class_index(classes_list)
+    probs = np.asarray(model_probs, dtype=float)
+    n, k = probs.shape
+    rows = np.arange(n)
+
+    feasibility = check_feasibility_frame(frame)
+    prefs = preference_matrix(frame)
+    labels = np.asarray(classes_list, dtype=object)
+    model_suggestion = labels[probs.argmax(axis=1)]
+
+    # Weighted scoring
+    bal = _column(frame, "mortgage_balance")
+    savings = _column(frame, "savings_available")
+    savings_ratio = savings / (bal + 1e-6)
+    strategy_probs = probs[:, [idx[s] for s in STRATEGIES]]
+    weighted = prefs + 0.1 * strategy_probs + 0.05
+    lump_base = np.where(
+        (savings_ratio >= 0.05) | (savings >= 10_000),
+        0.6 + prefs[:, 2] + 0.3 * savings_ratio,
+        prefs[:, 2],
+    )
+    weighted[:, 2] = lump_base + 0.1 * strategy_probs[:, 2]
+    weighted += COST_WEIGHT * np.column_stack([_column(frame, f"cost_saving_{s}") for s in STRATEGIES])
+    weighted = np.where(feasibility, weighted, np.nan)
+
+    top_score = np.nanmax(np.where(feasibility, weighted, -np.inf), axis=1)
+    tied = feasibility & (np.abs(weighted - top_score[:, None]) < 1e-6)
+    decision = np.full(n, -1)
+    for s in reversed(_STRATEGY_RANK):
+        decision = np.where(tied[:, STRATEGIES.index(s)], STRATEGIES.index(s), decision)
+    scores = _align_to_classes(weighted, classes_list, np.nan)
+
+    # Baseline safeguard
+    safeguard = feasibility[:, 0] & (prefs[:, 0] >= 0.7)
+    decision = np.where(safeguard, 0, decision)
+
+    # Strong preference override
+    masked_prefs = np.where(feasibility, prefs, -np.inf)
+    top_pref = masked_prefs.argmax(axis=1)
+    override = masked_prefs[rows, top_pref] >= 0.8
+    decision = np.where(override, top_pref, decision)
+
+    one_hot = override | safeguard
+    scores[one_hot] = 0.0
+    scores[rows[one_hot], [idx[STRATEGIES[d]] for d in decision[one_hot]]] = 1.0
+
+    decisions = np.asarray(STRATEGIES, dtype=object)[decision]
+    none_feasible = ~feasibility.any(axis=1)
+    decisions[none_feasible] = "no_valid_strategy"
+    scores[none_feasible] = 0.0
+
+    return {
+        "decision": decisions,
+        "scores": scores,
+        "feasibility": feasibility,
+        "preferences": prefs,
+        "model_suggestion": model_suggestion,
+    }
+
+
+def rule_based_recommend_frame(cases, model_probs, classes, pref_threshold: float = 0.7) -> dict:
+    """
+    Array form of rule_based_recommend. "scores" is (N, K) in class order with
+    NaN for non-candidates.
+    """
+    frame = _as_frame(cases)
+    classes_list = [str(c) for c in classes]
+    idx = _class_index(classes_list)
+    probs = np.asarray(model_probs, dtype=float)
+    n = len(probs)
+
+    feasibility = check_feasibility_frame(frame)
+    prefs = preference_matrix(frame)
+    feasible = _align_to_classes(feasibility, classes_list, False)
+    candidates = feasible.copy()
+    candidates[~feasible.any(axis=1), idx["baseline"]] = True
+    class_prefs = _align_to_classes(prefs, classes_list, 0.0)
+
+    scores = probs * (1.0 + 2.0 * class_prefs)
+    scores = np.where(
+        feasible & (class_prefs >= 0.7),
+        np.maximum(scores, 0.5 + 0.5 * class_prefs),
+        np.where(feasible, scores + 0.2 * class_prefs, 0.0),
+    )
+
+    age = _column(frame, "age")
+    eq  = _column(frame, "equity")
+    bal = _column(frame, "mortgage_balance")
+    savings = _column(frame, "savings_available")
+    dti = _column(frame, "debt_payments_monthly") / (_column(frame, "income_monthly") + 1e-6)
+    aff_gap_severe = _column(frame, "aff_gap_severe") != 0
+
+    # Lump Sum handling
+    lump, pref_lump = idx["lump_sum"], prefs[:, 2]
+    blocked = (savings < 0.02 * bal) & (savings < 5_000) & (pref_lump < 0.85)
+    tier_high = (savings >= 0.25 * bal) | (savings >= 50_000)
+    tier_mid = ~tier_high & ((savings >= 0.05 * bal) | (savings >= 10_000))
+    lump_score = scores[:, lump] * np.where(tier_high, 1.5, np.where(tier_mid, 1.2, 1.0))
+    lump_score *= np.where(pref_lump >= 0.85, 1.5, 1.0)
+    lump_score = np.where(
+        feasible[:, lump] & (savings >= 0.05 * bal), np.maximum(lump_score, 0.6 + pref_lump), lump_score
+    )
+    lump_score = np.where(
+        feasible[:, lump] & (savings >= 0.25 * bal), np.maximum(lump_score, 0.8 + pref_lump), lump_score
+    )
+    lump_score = np.where(blocked, 0.0, lump_score)
+    scores[:, lump] = np.where(candidates[:, lump], lump_score, scores[:, lump])
+
+    # Downsize handling
+    down = idx["downsize"]
+    boost = (age >= 65) & ((dti > 0.5) | (eq >= 200_000))
+    down_score = np.where(boost, scores[:, down] * 1.2, np.where(eq < 50_000, 0.0, scores[:, down]))
+    scores[:, down] = np.where(candidates[:, down], down_score, scores[:, down])
+
+    scores = np.where(candidates, scores, 0.0)
+    all_zero = (scores == 0).all(axis=1)
+    labels = np.asarray(classes_list, dtype=object)
+    decisions = np.where(
+        all_zero, "baseline", labels[np.where(candidates, scores, -np.inf).argmax(axis=1)]
+    ).astype(object)
+
+    # Normalize
+    total = scores.sum(axis=1, keepdims=True) + 1e-6
+    scores = np.where(candidates, scores / total, np.nan)
+
+    # Retiree under stress with equity → forced downsize
+    forced = (age >= 65) & ((dti > 0.5) | aff_gap_severe) & (eq >= 50_000)
+    forced_scores = np.full(len(classes_list), np.nan)
+    for s in STRATEGIES:
+        forced_scores[idx[s]] = 1.0 if s == "downsize" else 0.0
+    scores[forced] = forced_scores
+    decisions[forced] = "downsize"
+
+    return {
+        "decision": decisions,
+        "scores": scores,
+        "feasibility": feasibility,
+        "preferences": prefs,
+        "override": forced,
+    }
+
+# Strategy Costs
+# What each strategy does to the loan over its life and up to a horizon, from
+# amortization.strategy_costs. Reported with every strategy result, for
+# information only: the served decision (_apply_rules) does not look at costs.
+# cost_features turns them into optional inputs for recommend_strategy, which
+# no endpoint calls. lump_sum uses savings_available; with none, it costs the
+# same as baseline.
+COST_METRICS = ("monthly_payment", "total_interest", "interest_to_horizon",
+                "balance_at_horizon", "one_time_cost", "total_cost")
+COST_HORIZON_YEARS = 5
+COST_WEIGHT = 0.1
+
+
+def cost_comparison_frame(cases, horizon_years: float = COST_HORIZON_YEARS, costs: dict | None = None) -> dict:
+    """
+    strategy -> metric -> (N,) array for N cases. `costs` overrides the one-time
+    cost per strategy (dollars, scalar or per case).
+    """
+    frame = _as_frame(cases)
+    return strategy_costs(
+        _column(frame, "mortgage_balance"),
+        _column(frame, "interest_rate_current"),
+        _column(frame, "amortization_remaining", 20),
+        _column(frame, "savings_available"),
+        _column(frame, "property_value"),
+        horizon_years=horizon_years,
+        costs=costs,
+    )
+
+
+def cost_rows(comparison: dict) -> list:
+    """
+    Per-case {strategy: {metric: value}} dicts, rounded to cents.
+    """
+    columns = {s: {m: np.round(np.atleast_1d(comparison[s][m]), 2).tolist() for m in COST_METRICS}
+               for s in STRATEGIES}
+    n = len(columns[STRATEGIES[0]][COST_METRICS[0]])
+    return [{s: {m: columns[s][m][i] for m in COST_METRICS} for s in STRATEGIES} for i in range(n)]
+
+
+def cost_comparison(case: dict, horizon_years: float = COST_HORIZON_YEARS, costs: dict | None = None) -> dict:
+    """
+    {strategy: {metric: value}} for one case.
+    """
+    comparison = strategy_costs(
+        case.get("mortgage_balance", 0.0),
+        case.get("interest_rate_current", 0.0),
+        case.get("amortization_remaining", 20),
+        case.get("savings_available", 0.0),
+        case.get("property_value", 0.0),
+        horizon_years=horizon_years,
+        costs=costs,
+    )
+    return cost_rows(comparison)[0]
+
+
+def cost_features(costs: dict) -> dict:
+    """
+    cost_saving_<strategy>: total cost saved against baseline, as a share of
+    baseline's total cost (negative when the strategy costs more).
+    """
+    base = max(costs["baseline"]["total_cost"], 1.0)
+    return {f"cost_saving_{s}": (costs["baseline"]["total_cost"] - costs[s]["total_cost"]) / base
+            for s in STRATEGIES}
+
+
 #Pipeline Wrapper 
 class StrategyPipelineWrapper:
     def __init__(self, pipeline, classes, X_train_columns, encoders=None, label_encoder=None):
@@ -502,29 +912,118 @@ class StrategyPipelineWrapper:
         self.X_train_columns = X_train_columns
         self.encoders = encoders or {}
         self.label_encoder = label_encoder
+        # Column layout is fixed by the fitted pipeline, so resolve it once.
+        self.layout = RowLayout.from_pipeline(pipeline, X_train_columns)
 
     def prepare_row(self, applicant_raw: dict):
+        if self.layout is not None:
+            return self.layout.frame(applicant_raw)
+
         row = pd.DataFrame([applicant_raw])
         for col in self.X_train_columns:
             if col not in row.columns:
                 row[col] = 0
         return row[self.X_train_columns]
 
+    def model_probs(self, applicant_raw: dict, timer=NULL_TIMER):
+        # Compiled pipelines read the row buffers directly; no DataFrame needed.
+        if self.layout is not None and hasattr(self.pipeline, "predict_proba_buffers"):
+            buffers = self.layout.fill(applicant_raw)
+            timer.lap("build_row")
+            probs = self.pipeline.predict_proba_buffers(*buffers)[0]
+        else:
+            row = self.prepare_row(applicant_raw)
+            timer.lap("build_row")
+            probs = self.pipeline.predict_proba(row)[0]
+        timer.lap("predict_proba")
+        return probs
+
+    def model_probs_many(self, applicants_raw):
+        """
+        (N, K) model probabilities from one predict_proba call.
+        """
+        if self.layout is None:
+            return self.pipeline.predict_proba(
+                pd.concat([self.prepare_row(a) for a in applicants_raw], ignore_index=True)
+            )
+        numeric, categorical = self.layout.fill_many(applicants_raw)
+        if hasattr(self.pipeline, "predict_proba_buffers"):
+            return self.pipeline.predict_proba_buffers(numeric, categorical)
+        return self.pipeline.predict_proba(self.layout.to_frame(numeric, categorical))
+
     def predict(self, applicant_raw: dict) -> str:
         row = self.prepare_row(applicant_raw)
         pred = self.pipeline.predict(row)[0]
         return str(self.classes[pred])
 
     def predict_proba(self, applicant_raw: dict) -> dict:
-        row = self.prepare_row(applicant_raw)
-        probs = self.pipeline.predict_proba(row)[0]
+        probs = self.model_probs(applicant_raw)
         return {str(cls): round(float(p), 6) for cls, p in zip(self.classes, probs)}
 
-    def predict_with_rules(self, applicant_raw: dict, pref_threshold: float = 0.7) -> dict:
+    def predict_with_rules(self, applicant_raw: dict, pref_threshold: float = 0.7, timer=NULL_TIMER) -> dict:
         applicant = enrich_features(applicant_raw)
-        row = self.prepare_row(applicant)
-
-        model_probs_arr = self.pipeline.predict_proba(row)[0]
+        timer.lap("enrich_features")
+        return self.predict_enriched(applicant, timer)
+
+    def predict_enriched(self, applicant: dict, timer=NULL_TIMER) -> dict:
+        """
+        predict_with_rules for an applicant that already went through enrich_features.
+        """
+        return self._apply_rules(applicant, self.model_probs(applicant, timer), timer)
+
+    def predict_many_with_rules(self, applicants_raw, pref_threshold: float = 0.7) -> list:
+        """
+        Batch predict_with_rules: one model call, results in input order.
+        """
+        if not applicants_raw:
+            return []
+        applicants = [enrich_features(a) for a in applicants_raw]
+        model_probs = self.model_probs_many(applicants)
+        costs = cost_rows(cost_comparison_frame(applicants))
+        return [self._apply_rules(a, p, costs=c) for a, p, c in zip(applicants, model_probs, costs)]
+
+    def decide_many(self, applicants_raw):
+        """
+        (decisions, (N, K) model probabilities) with the same decision rule as
+        predict_with_rules, but without building reasons. Used for what-if grids,
+        where the reason text is most of the per-row cost.
+        """
+        if not applicants_raw:
+            return [], np.zeros((0, len(self.classes)))
+        applicants = [enrich_features(a) for a in applicants_raw]
+        model_probs = self.model_probs_many(applicants)
+        feasibility = np.array([list(check_feasibility(a).values()) for a in applicants], dtype=bool)
+        prefs = np.array([
+            [a.get("pref_stability", 0.0),
+             max(a.get("pref_low_payment", 0.0), a.get("pref_flexibility", 0.0)),
+             a.get("pref_fast_payoff", 0.0),
+             a.get("pref_equity_growth", 0.0)]
+            for a in applicants
+        ], dtype=float)
+        # Highest preference among feasible strategies; argmax keeps the first on ties, like max().
+        best = np.where(feasibility, prefs, -np.inf).argmax(axis=1)
+        return [STRATEGIES[j] for j in best], model_probs
+
+    def decide_frame(self, cases):
+        """
+        decide_many for column-oriented input (a DataFrame or a dict of (N,)
+        arrays): enrichment, feasibility and the model call all run per column.
+        """
+        frame = enrich_features_frame(cases)
+        if not len(frame):
+            return np.array([], dtype=object), np.zeros((0, len(self.classes)))
+        if self.layout is None:
+            model_probs = self.pipeline.predict_proba(frame.reindex(columns=self.X_train_columns, fill_value=0))
+        else:
+            numeric, categorical = self.layout.fill_columns(frame, len(frame))
+            if hasattr(self.pipeline, "predict_proba_buffers"):
+                model_probs = self.pipeline.predict_proba_buffers(numeric, categorical)
+            else:
+                model_probs = self.pipeline.predict_proba(self.layout.to_frame(numeric, categorical))
+        best = np.where(check_feasibility_frame(frame), preference_matrix(frame), -np.inf).argmax(axis=1)
+        return np.asarray(STRATEGIES, dtype=object)[best], model_probs
+
+    def _apply_rules(self, applicant: dict, model_probs_arr, timer=NULL_TIMER, costs: dict | None = None) -> dict:
         prob_dict = {str(cls): round(float(p), 6) for cls, p in zip(self.classes, model_probs_arr)}
 
         feas = check_feasibility(applicant)
@@ -545,8 +1044,13 @@ class StrategyPipelineWrapper:
         else:
             decision = "baseline"
 
+        timer.lap("rules")
         rate_type, rate_reasons = build_rate_reasons(applicant)
         reasons = build_strategy_reasons(applicant, decision, feas, prefs)
+        timer.lap("reasons")
+        if costs is None:
+            costs = cost_comparison(applicant)
+            timer.lap("costs")
 
         return {
             "strategy": decision,
@@ -556,6 +1060,7 @@ class StrategyPipelineWrapper:
             "preferences": prefs,
             "rate_reasons": rate_reasons,
             "reasons": reasons,
+            "costs": costs,
         }
 
 
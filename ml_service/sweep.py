@@ -0,0 +1,103 @@
+from __future__ import annotations
+import itertools
+import math
+
+try:
+    from .timing import NULL_TIMER
+except ImportError:
+    from timing import NULL_TIMER
+
+
+class SweepError(ValueError):
+    """Raised for an invalid sweep spec (unknown field, empty or oversized grid)."""
+
+
+def axis_values(field: str, spec: dict, integer: bool = False, max_values: int | None = None) -> list:
+    """
+    Values for one axis: spec["values"], or start..stop (inclusive) in steps of spec["step"].
+    A range with more than max_values values is rejected before any are built.
+    """
+    if spec.get("values") is not None:
+        values = list(spec["values"])
+    else:
+        start, stop, step = spec.get("start"), spec.get("stop"), spec.get("step")
+        if start is None or stop is None or not step or step <= 0:
+            raise SweepError(f"{field}: give either values or start, stop and a positive step")
+        steps = (stop - start) / step
+        if not math.isfinite(steps):
+            # A tiny step (or an infinite end) overflows before the count exists.
+            raise SweepError(f"{field}: start, stop and step give too many values")
+        count = max(math.floor(steps + 1e-9) + 1, 0)
+        if integer and step < 1 and count:
+            # Steps under 1 round to every integer between the rounded ends.
+            start, stop = (int(round(round(start + i * step, 10))) for i in (0, count - 1))
+            count, step = stop - start + 1, 1
+        if max_values is not None and count > max_values:
+            raise SweepError(f"{field}: {count} values; the limit is {max_values}")
+        values = [round(start + i * step, 10) for i in range(count)]
+    if integer:
+        values = list(dict.fromkeys(int(round(v)) for v in values))
+    if not values:
+        raise SweepError(f"{field}: no values in range")
+    if max_values is not None and len(values) > max_values:
+        raise SweepError(f"{field}: {len(values)} values; the limit is {max_values}")
+    return values
+
+
+def expand_grid(base: dict, axes: dict, numeric_fields: dict, max_points: int) -> tuple:
+    """
+    (axis values per field, one applicant per grid point in row-major order).
+    numeric_fields maps sweepable field names to True for integer fields.
+    """
+    if not axes:
+        raise SweepError("sweep needs at least one axis")
+    values = {}
+    for field, spec in axes.items():
+        if field not in numeric_fields:
+            raise SweepError(f"{field}: not a numeric applicant field")
+        values[field] = axis_values(field, spec, integer=numeric_fields[field], max_values=max_points)
+
+    size = math.prod(len(v) for v in values.values())
+    if size > max_points:
+        raise SweepError(f"grid has {size} points; the limit is {max_points}")
+    fields = list(values)
+    points = [{**base, **dict(zip(fields, combo))} for combo in itertools.product(*values.values())]
+    return values, points
+
+
+def run_sweep(models, base: dict, axes: dict, numeric_fields: dict, max_points: int,
+              timer=NULL_TIMER) -> dict:
+    """
+    Approval and strategy decisions for every grid point, from one batched
+    call per model. Arrays are nested in axis order (shape = axis lengths).
+    """
+    import numpy as np
+
+    values, points = expand_grid(base, axes, numeric_fields, max_points)
+    shape = [len(v) for v in values.values()]
+    timer.lap("expand_grid")
+
+    approvals = models.predict_approvals(points)
+    timer.lap("approval")
+    decisions, probs = models.wrapper.decide_many(points)
+    timer.lap("strategy")
+
+    def grid(items):
+        return np.array(items, dtype=object).reshape(shape).tolist()
+
+    return {
+        "axes": [{"field": field, "values": v} for field, v in values.items()],
+        "shape": shape,
+        "points": len(points),
+        "approval": {
+            "decision": grid([a["decision"] for a in approvals]),
+            "probability": grid([a["approval_probability"] for a in approvals]),
+            "rate_type": grid([a["rate_type"] for a in approvals]),
+        },
+        "strategy": {
+            "classes": list(models.wrapper.classes),
+            "decision": grid(decisions),
+            # Innermost lists follow "classes", as adjusted_probabilities does on /predict/strategy.
+            "probabilities": np.round(probs, 6).reshape(shape + [len(models.wrapper.classes)]).tolist(),
+        },
+    }
@@ -0,0 +1,66 @@
+from __future__ import annotations
+import random
+
+
+EMPLOYMENT_TYPES = ("full_time", "contract", "self_employed", "unemployed")
+EMPLOYMENT_WEIGHTS = (0.7, 0.15, 0.12, 0.03)
+PREFERENCES = (
+    "pref_low_payment",
+    "pref_flexibility",
+    "pref_stability",
+    "pref_fast_payoff",
+    "pref_equity_growth",
+    "pref_risk_tolerance",
+)
+
+
+def monthly_payment(balance: float, annual_rate_pct: float, years: int) -> float:
+    """
+    Level payment on a balance, compounded monthly.
+    """
+    months = max(int(years), 1) * 12
+    r = annual_rate_pct / 100.0 / 12.0
+    if r == 0:
+        return balance / months
+    return balance * r / (1.0 - (1.0 + r) ** -months)
+
+
+def generate_applicant(rng: random.Random) -> dict:
+    """
+    One plausible applicant: payment follows from balance, rate and
+    amortization, and expenses and debt scale with income.
+    """
+    employment_type = rng.choices(EMPLOYMENT_TYPES, EMPLOYMENT_WEIGHTS)[0]
+    income = max(rng.lognormvariate(8.7, 0.45), 0.0) if employment_type != "unemployed" else rng.uniform(0, 1500)
+    property_value = rng.lognormvariate(13.2, 0.45)
+    balance = property_value * rng.betavariate(2.5, 2.0)
+    amortization = int(rng.triangular(3, 30, 22))
+    rate = round(rng.uniform(1.5, 7.5), 2)
+
+    applicant = {
+        "age": int(rng.triangular(21, 75, 38)),
+        "employment_type": employment_type,
+        "employment_years": rng.randint(0, 35),
+        "income_monthly": round(income, 2),
+        "credit_score": int(min(max(rng.gauss(700, 70), 450), 850)),
+        "property_value": round(property_value, 2),
+        "mortgage_balance": round(balance, 2),
+        "amortization_remaining": amortization,
+        "monthly_payment_current": round(monthly_payment(balance, rate, amortization), 2),
+        "expenses_monthly": round(income * rng.uniform(0.15, 0.45) + 400, 2),
+        "debt_payments_monthly": round(income * rng.uniform(0.0, 0.2), 2),
+        "interest_rate_current": rate,
+        "rate_type": rng.choice(("fixed", "variable")),
+    }
+    for pref in PREFERENCES:
+        applicant[pref] = round(rng.random(), 3)
+    applicant["steady_payment"] = int(rng.random() < 0.8)
+    return applicant
+
+
+def generate_applicants(n: int, seed: int = 0) -> list:
+    """
+    n applicants from a seeded generator: the same seed gives the same list.
+    """
+    rng = random.Random(seed)
+    return [generate_applicant(rng) for _ in range(n)]
@@ -0,0 +1,195 @@
+"""
+Per-tenant model variants (regional or lender-specific pipelines) in one process.
+
+    tenants/
+        ca-on/approval_pipeline.pkl, strategy_pipeline.pkl
+        lender-42/approval_pipeline.pkl, strategy_pipeline.pkl
+
+A request picks a variant by key. Variants load on first use and stay in an LRU
+bounded by a total memory budget. Memory is measured as the artifacts' size on
+disk, or as the process RSS growth while the variant loaded ("rss"; loads are
+serialized so the delta is attributable). The least recently used variants are
+evicted to make room. One still serving requests keeps serving them and is
+closed when its last lease is returned.
+"""
+from __future__ import annotations
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+try:
+    from .metrics import MODEL_LOAD_LATENCY, TENANT_EVICTIONS, TENANT_LOOKUPS
+    from .models import ModelBundle
+    from .registry import APPROVAL_FILE, STRATEGY_FILE
+except ImportError:
+    from metrics import MODEL_LOAD_LATENCY, TENANT_EVICTIONS, TENANT_LOOKUPS
+    from models import ModelBundle
+    from registry import APPROVAL_FILE, STRATEGY_FILE
+
+MEASURES = ("artifact", "rss")
+_KEY = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+
+class UnknownTenantError(KeyError):
+    """Raised for a model key with no variant directory."""
+
+
+def _rss_bytes() -> int | None:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+# Tenant Router
+class TenantRouter:
+    def __init__(self, root: str, budget_bytes: int, measure: str = "artifact", warmup: int = 0):
+        if measure not in MEASURES:
+            raise ValueError(f"measure must be one of {MEASURES}, got {measure!r}")
+        self.root = root
+        self.budget_bytes = budget_bytes
+        self.measure = measure
+        self.warmup = warmup
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (bundle, size in bytes)
+        self._loading = {}
+        self._leases = {}
+        self._retired = set()
+
+    def paths(self, key: str) -> tuple:
+        if not _KEY.match(key or ""):
+            raise UnknownTenantError(key)
+        path = os.path.join(self.root, key)
+        approval_path, strategy_path = os.path.join(path, APPROVAL_FILE), os.path.join(path, STRATEGY_FILE)
+        if not (os.path.isfile(approval_path) and os.path.isfile(strategy_path)):
+            raise UnknownTenantError(key)
+        return approval_path, strategy_path
+
+    def keys(self) -> list:
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return []
+        available = []
+        for name in sorted(names):
+            try:
+                self.paths(name)
+                available.append(name)
+            except UnknownTenantError:
+                pass
+        return available
+
+    # Leases
+    @contextmanager
+    def lease(self, key: str):
+        """
+        The variant for `key`, loaded if needed and kept alive until the block exits.
+        Raises UnknownTenantError for keys without a variant directory.
+        """
+        bundle = self._acquire(key)
+        try:
+            yield bundle
+        finally:
+            self._release(bundle)
+
+    def _acquire(self, key: str) -> ModelBundle:
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self._leases[entry[0]] = self._leases.get(entry[0], 0) + 1
+                    self.hits += 1
+                    TENANT_LOOKUPS.inc("hit")
+                    return entry[0]
+                pending = self._loading.get(key)
+                owner = pending is None
+                if owner:
+                    pending = self._loading[key] = Future()
+                    self.misses += 1
+                    TENANT_LOOKUPS.inc("miss")
+            if not owner:
+                # Another request is loading it; take a lease once it is in (or retry if
+                # it was evicted again before we got there).
+                pending.result()
+                continue
+            try:
+                bundle, size = self._load(key)
+            except BaseException as e:
+                with self._lock:
+                    self._loading.pop(key, None)
+                pending.set_exception(e)
+                raise
+            with self._lock:
+                self._loading.pop(key, None)
+                self._entries[key] = (bundle, size)
+                self._leases[bundle] = self._leases.get(bundle, 0) + 1
+                evicted = self._evict_over_budget()
+            pending.set_result(bundle)
+            for old in evicted:
+                old.close()
+            return bundle
+
+    def _load(self, key: str) -> tuple:
+        approval_path, strategy_path = self.paths(key)
+        with self._load_lock:
+            started = time.perf_counter()
+            before = _rss_bytes() if self.measure == "rss" else None
+            bundle = ModelBundle(approval_path, strategy_path, warmup=self.warmup)
+            bundle.warm_up()
+            after = _rss_bytes() if before is not None else None
+            MODEL_LOAD_LATENCY.observe(time.perf_counter() - started, "tenant")
+        if before is not None and after is not None:
+            size = max(after - before, 0)
+        else:
+            size = os.path.getsize(approval_path) + os.path.getsize(strategy_path)
+        return bundle, size
+
+    def _evict_over_budget(self) -> list:
+        # Caller holds self._lock. The newest entry always stays, even if it alone
+        # is over budget. Returns bundles to close now (those without leases).
+        close = []
+        while len(self._entries) > 1 and sum(size for _, size in self._entries.values()) > self.budget_bytes:
+            _, (bundle, _) = self._entries.popitem(last=False)
+            self.evictions += 1
+            TENANT_EVICTIONS.inc()
+            if bundle in self._leases:
+                self._retired.add(bundle)
+            else:
+                close.append(bundle)
+        return close
+
+    def _release(self, bundle):
+        with self._lock:
+            self._leases[bundle] -= 1
+            drained = self._leases[bundle] == 0
+            if drained:
+                del self._leases[bundle]
+            close = drained and bundle in self._retired
+            if close:
+                self._retired.discard(bundle)
+        if close:
+            bundle.close()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "root": self.root,
+                "measure": self.measure,
+                "budget_bytes": self.budget_bytes,
+                "resident": {key: size for key, (_, size) in self._entries.items()},
+                "resident_bytes": sum(size for _, size in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "draining": len(self._retired),
+            }
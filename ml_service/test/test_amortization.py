@@ -0,0 +1,58 @@
+import numpy as np
+
+from ml_service.amortization import balance_after, loan_costs, payment, schedule, strategy_costs
+from ml_service.strategy import STRATEGIES, cost_comparison, cost_comparison_frame, cost_rows
+
+
+def _loop_schedule(principal, rate, years):
+    r, level, balance = rate / 1200.0, float(payment(principal, rate, years)), principal
+    interest, balances = [], []
+    for _ in range(years * 12):
+        interest.append(balance * r)
+        balance -= level - balance * r
+        balances.append(balance)
+    return np.array(interest), np.array(balances)
+
+
+def test_schedule_matches_month_by_month_loop():
+    for rate in (0.0, 4.2, 8.5):
+        interest, balances = _loop_schedule(250_000.0, rate, 20)
+        result = schedule(250_000.0, rate, 20)
+        assert np.allclose(result["interest"], interest, atol=1e-6)
+        assert np.allclose(result["balance"], np.maximum(balances, 0), atol=1e-5)
+        costs = loan_costs(250_000.0, rate, 20, horizon_years=5)
+        assert np.isclose(costs["interest_to_horizon"], interest[:60].sum())
+        assert np.isclose(costs["balance_at_horizon"], balances[59])
+        assert np.isclose(costs["total_interest"], interest.sum())
+
+
+def test_schedule_pads_shorter_loans_with_zeros():
+    result = schedule([100_000.0, 100_000.0], [5.0, 5.0], [10, 25])
+    assert result["balance"].shape == (2, 300)
+    assert (result["payment"][0, 120:] == 0).all() and result["payment"][1, -1] > 0
+    assert balance_after(100_000.0, 5.0, 10, 500) == 0.0
+
+
+def test_strategy_costs_batch_matches_single_cases():
+    rng = np.random.default_rng(3)
+    n = 300
+    args = (rng.uniform(0, 900_000, n), rng.choice([0.0, 3.0, 6.5], n), rng.integers(1, 31, n),
+            rng.uniform(0, 100_000, n), rng.uniform(0, 1_500_000, n))
+    batch = strategy_costs(*args, costs={"downsize": 20_000.0})
+    for i in range(0, n, 17):
+        single = strategy_costs(*(a[i] for a in args), costs={"downsize": 20_000.0})
+        for s in STRATEGIES:
+            for metric, values in single[s].items():
+                assert np.isclose(batch[s][metric][i], values)
+    assert (batch["downsize"]["one_time_cost"] == 20_000.0).all()
+    assert (batch["lump_sum"]["total_interest"] <= batch["baseline"]["total_interest"] + 1e-6).all()
+
+
+def test_cost_comparison_frame_matches_scalar():
+    cases = [
+        {"mortgage_balance": 400_000.0, "interest_rate_current": 5.0, "amortization_remaining": 20,
+         "savings_available": 30_000.0, "property_value": 700_000.0},
+        {"mortgage_balance": 0.0, "interest_rate_current": 0.0, "amortization_remaining": 1,
+         "savings_available": 0.0, "property_value": 0.0},
+    ]
+    assert cost_rows(cost_comparison_frame(cases)) == [cost_comparison(c) for c in cases]
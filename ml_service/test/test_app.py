@@ -1,5 +1,10 @@
+import subprocess
+import sys
+
+import pandas as pd
 from fastapi.testclient import TestClient
-from ml_service.app import app
+from ml_service.app import app, models, wrapper
+from ml_service.strategy import enrich_features
 
 client = TestClient(app)
 
@@ -115,6 +120,252 @@ def test_strategy_high_risk_pref():
     data = response.json()
     assert "strategy" in data
 
+def test_strategy_costs_use_savings_available():
+    costs = client.post("/predict/strategy", json=valid_applicant).json()["costs"]
+    assert costs["lump_sum"] == costs["baseline"]
+    with_savings = client.post("/predict/strategy", json={**valid_applicant, "savings_available": 40_000}).json()
+    assert with_savings["costs"]["lump_sum"]["total_interest"] < costs["baseline"]["total_interest"]
+    assert with_savings["feasibility"]["lump_sum"]
+
 def test_strategy_invalid_payload():
     response = client.post("/predict/strategy", json={"age": "not_a_number"})
     assert response.status_code in [400, 422]
+
+def test_strategy_prepare_row_matches_reindex_path():
+    applicant = enrich_features(valid_applicant)
+    row = pd.DataFrame([applicant])
+    for col in wrapper.X_train_columns:
+        if col not in row.columns:
+            row[col] = 0
+    expected = wrapper.pipeline.predict_proba(row[wrapper.X_train_columns])
+    assert (wrapper.pipeline.predict_proba(wrapper.prepare_row(applicant)) == expected).all()
+
+# ============================================================
+# /predict/approval/batch tests
+# ============================================================
+
+def test_approval_batch_matches_single():
+    low_credit = {**valid_applicant, "credit_score": 500}
+    high_gds = {**valid_applicant, "income_monthly": 2000, "monthly_payment_current": 1800}
+    variable = {**valid_applicant, "pref_flexibility": 0.9, "pref_stability": 0.1}
+    applicants = [valid_applicant, low_credit, high_gds, variable]
+
+    response = client.post("/predict/approval/batch", json={"applicants": applicants})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == len(applicants)
+    for applicant, result in zip(applicants, results):
+        assert result == client.post("/predict/approval", json=applicant).json()
+
+def test_approval_batch_per_item_errors():
+    bad = valid_applicant.copy()
+    bad.pop("income_monthly")
+    response = client.post(
+        "/predict/approval/batch", json={"applicants": [bad, valid_applicant]}
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["error"] == "Invalid applicant"
+    assert results[1]["decision"] in ["FAIL", "PASS"]
+
+    response = client.post(
+        "/predict/approval/batch", json={"applicants": ["x", valid_applicant, 3, None]}
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r.get("error") for r in results] == ["Invalid applicant", None, "Invalid applicant", "Invalid applicant"]
+    assert results[1] == client.post("/predict/approval", json=valid_applicant).json()
+
+def test_approval_batch_empty():
+    response = client.post("/predict/approval/batch", json={"applicants": []})
+    assert response.status_code == 200
+    assert response.json() == {"results": []}
+
+# ============================================================
+# prediction cache tests
+# ============================================================
+
+def test_repeated_strategy_request_is_served_from_cache():
+    applicant = {**valid_applicant, "age": 41}
+    before = client.get("/cache/stats").json()
+    first = client.post("/predict/strategy", json=applicant).json()
+    second = client.post("/predict/strategy", json=applicant).json()
+    after = client.get("/cache/stats").json()
+    assert first == second
+    assert after["hits"] == before["hits"] + 1
+    assert after["model_version"]
+
+def test_strategy_batch_matches_single():
+    applicants = [
+        valid_applicant,
+        {**valid_applicant, "income_monthly": 1500},
+        {**valid_applicant, "pref_fast_payoff": 0.95, "mortgage_balance": 90000},
+        {**valid_applicant, "debt_payments_monthly": 3000, "employment_type": "seasonal"},
+        {**valid_applicant, "age": 66, "amortization_remaining": 25},
+    ]
+    batched = wrapper.predict_many_with_rules(applicants)
+    for applicant, result in zip(applicants, batched):
+        single = wrapper.predict_with_rules(applicant)
+        for key in ("strategy", "rate_type", "feasibility", "preferences", "reasons"):
+            assert result[key] == single[key]
+        for cls, p in single["adjusted_probabilities"].items():
+            assert abs(result["adjusted_probabilities"][cls] - p) <= 2e-6
+
+# ============================================================
+# combined endpoint tests
+# ============================================================
+
+def test_full_matches_separate_endpoints():
+    for applicant in (valid_applicant, {**valid_applicant, "credit_score": 550, "age": 62}):
+        full = client.post("/predict/full", json=applicant)
+        assert full.status_code == 200
+        body = full.json()
+        assert body["approval"] == client.post("/predict/approval", json=applicant).json()
+        assert body["strategy"] == client.post("/predict/strategy", json=applicant).json()
+
+def test_full_invalid_payload():
+    response = client.post("/predict/full", json={"age": 40})
+    assert response.status_code == 422
+
+# ============================================================
+# lazy loading / readiness tests
+# ============================================================
+
+def test_ready_after_warm_up():
+    models.warm_up(8)
+    response = client.get("/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] and body["model_version"]
+    assert {"import_app", "load_approval_pipeline", "warmup"} <= set(body["timings_seconds"])
+
+def test_importing_app_does_not_load_models():
+    code = (
+        "import sys, ml_service.app as a; "
+        "assert not a.models.loaded; "
+        "assert 'xgboost' not in sys.modules and 'pandas' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+# ============================================================
+# what-if sweep tests
+# ============================================================
+
+def test_sweep_matches_single_predictions():
+    response = client.post("/predict/sweep", json={
+        "applicant": valid_applicant,
+        "sweep": {
+            "pref_stability": {"start": 0, "stop": 1, "step": 0.25},
+            "interest_rate_current": {"values": [3, 7]},
+            "credit_score": {"values": [560, 720.4]},
+        },
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["shape"] == [5, 2, 2] and body["points"] == 20
+    assert body["axes"][0]["values"] == [0, 0.25, 0.5, 0.75, 1.0]
+    assert body["axes"][2]["values"] == [560, 720]
+
+    i, j, k = 3, 1, 0
+    point = {**valid_applicant, "pref_stability": 0.75, "interest_rate_current": 7, "credit_score": 560}
+    approval = client.post("/predict/approval", json=point).json()
+    strategy = client.post("/predict/strategy", json=point).json()
+    assert body["approval"]["decision"][i][j][k] == approval["decision"]
+    assert body["approval"]["probability"][i][j][k] == approval["approval_probability"]
+    assert body["strategy"]["decision"][i][j][k] == strategy["strategy"]
+    probs = dict(zip(body["strategy"]["classes"], body["strategy"]["probabilities"][i][j][k]))
+    for cls, p in strategy["adjusted_probabilities"].items():
+        assert abs(probs[cls] - p) <= 2e-6
+
+def test_sweep_rejects_bad_axes():
+    def sweep(axes):
+        return client.post("/predict/sweep", json={"applicant": valid_applicant, "sweep": axes})
+
+    assert sweep({"employment_type": {"values": [1]}}).status_code == 422
+    assert sweep({"age": {"start": 30, "stop": 40}}).status_code == 422
+    assert sweep({}).status_code == 422
+    assert sweep({"age": {"start": 0, "stop": 10_000, "step": 1}}).status_code == 422
+    # Rejected from the count alone, without building a billion values first.
+    response = sweep({"income_monthly": {"start": 0, "stop": 1, "step": 1e-9}})
+    assert response.status_code == 422 and "1000000000 values" in response.json()["detail"]
+    # A step so small the count overflows is a bad axis, not a failed prediction.
+    assert sweep({"income_monthly": {"start": 0, "stop": 1, "step": 1e-320}}).status_code == 422
+
+def test_max_mortgage_endpoint():
+    response = client.post("/predict/max-mortgage", json={
+        "applicant": valid_applicant,
+        "rates": {"start": 4, "stop": 6, "step": 1},
+        "amortizations": {"values": [20, 25]},
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["rates"] == [4, 5, 6] and body["amortizations"] == [20, 25]
+    assert len(body["max_balance"]) == 3 and len(body["max_balance"][0]) == 2
+    assert all(p > 0 for row in body["monthly_payment"] for p in row)
+    assert {c for row in body["binding"] for c in row} <= {"loan_to_value", "gds_ratio", "tds_ratio", "model_probability"}
+
+    bad = client.post("/predict/max-mortgage", json={
+        "applicant": valid_applicant, "rates": {"values": []}, "amortizations": {"values": [25]},
+    })
+    assert bad.status_code == 422
+    huge = client.post("/predict/max-mortgage", json={
+        "applicant": valid_applicant, "rates": {"start": 0, "stop": 1, "step": 1e-9},
+        "amortizations": {"values": [25]},
+    })
+    assert huge.status_code == 422
+    tiny = client.post("/predict/max-mortgage", json={
+        "applicant": valid_applicant, "rates": {"start": 0, "stop": 1, "step": 1e-320},
+        "amortizations": {"values": [25]},
+    })
+    assert tiny.status_code == 422
+    for field, value in [("rates", {"values": [-1, 5]}), ("amortizations", {"values": [0, 25]}),
+                         ("amortizations", {"values": [-5]}), ("probability_cutoff", 1.5),
+                         ("probability_cutoff", -0.1)]:
+        response = client.post("/predict/max-mortgage", json={
+            "applicant": valid_applicant, "rates": {"values": [5]}, "amortizations": {"values": [25]},
+            field: value,
+        })
+        assert response.status_code == 422 and field in response.json()["detail"], (field, value)
+
+
+def test_rate_risk_endpoint():
+    request = {"applicant": valid_applicant, "paths": 2000, "seed": 4}
+    response = client.post("/predict/rate-risk", json=request)
+    assert response.status_code == 200
+    body = response.json()
+    assert body == client.post("/predict/rate-risk", json=request).json()
+    assert body["paths"] == 2000 and body["term_months"] == 60
+    assert body["fixed"]["rate"] == valid_applicant["interest_rate_current"] + 0.5
+    peak = body["variable"]["peak_payment"]
+    assert peak["p5"] <= peak["p50"] <= peak["p95"]
+    assert 0.0 <= body["prob_payment_exceeds_stress"] <= 1.0
+
+    assert client.post("/predict/rate-risk", json={**request, "paths": 10**7}).status_code == 422
+    assert client.post("/predict/rate-risk", json={**request, "term_years": 1000}).status_code == 422
+    long_amortization = {**valid_applicant, "amortization_remaining": 1000}
+    response = client.post("/predict/rate-risk", json={
+        **request, "applicant": long_amortization, "paths": 100_000, "term_years": 40,
+    })
+    assert response.status_code == 422 and "48000000" in response.json()["detail"]
+    for field in ("fixed_rate", "kappa", "theta", "sigma", "stress_payment"):
+        response = client.post("/predict/rate-risk", json={**request, field: -1})
+        assert response.status_code == 422 and field in response.json()["detail"]
+
+
+def test_explain_option_adds_top_drivers():
+    plain = client.post("/predict/approval", json=valid_applicant).json()
+    explained = client.post("/predict/approval?explain=true&top_k=3", json=valid_applicant).json()
+    assert "explanation" not in plain
+    assert {k: v for k, v in explained.items() if k != "explanation"} == plain
+    assert len(explained["explanation"]["top_features"]) == 3
+
+    strategy = client.post("/predict/strategy?explain=true", json=valid_applicant).json()
+    assert len(strategy["explanation"]["top_features"]) == 5
+
+    batch = client.post("/predict/approval/batch?explain=true&top_k=2",
+                        json={"applicants": [valid_applicant, {"age": 1}]}).json()["results"]
+    assert batch[0]["explanation"] == explained["explanation"] | {
+        "top_features": explained["explanation"]["top_features"][:2]
+    }
+    assert "error" in batch[1]
+    assert client.post("/predict/approval?explain=true&top_k=0", json=valid_applicant).status_code == 422
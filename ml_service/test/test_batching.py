@@ -0,0 +1,120 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from ml_service.batching import BatcherClosedError, MicroBatcher, QueueFullError
+
+
+def test_concurrent_submissions_share_a_batch():
+    calls = []
+
+    def batch_fn(items):
+        calls.append(list(items))
+        return [x * 2 for x in items]
+
+    batcher = MicroBatcher(batch_fn, window_ms=50, max_batch=8)
+    results = {}
+    threads = [threading.Thread(target=lambda i=i: results.update({i: batcher.submit(i)}))
+               for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    batcher.close()
+
+    assert results == {i: i * 2 for i in range(8)}
+    assert sum(len(c) for c in calls) == 8
+    assert len(calls) < 8
+    stats = batcher.stats()
+    assert stats["items"] == 8 and stats["batches"] == len(calls)
+    assert sum(stats["batch_size_histogram"].values()) == len(calls)
+
+
+def test_batches_close_at_max_batch():
+    sizes = []
+    release = threading.Event()
+
+    def batch_fn(items):
+        release.wait(5)
+        sizes.append(len(items))
+        return items
+
+    batcher = MicroBatcher(batch_fn, window_ms=1000, max_batch=3)
+    futures = [batcher.submit_async(i) for i in range(7)]
+    release.set()
+    assert [f.result(5) for f in futures] == list(range(7))
+    batcher.close()
+    assert max(sizes) <= 3
+
+
+def test_failing_item_does_not_fail_its_batch():
+    def batch_fn(items):
+        if "bad" in items:
+            raise ValueError("bad item")
+        return [x.upper() for x in items]
+
+    batcher = MicroBatcher(batch_fn, window_ms=50, max_batch=4)
+    futures = [batcher.submit_async(x) for x in ("a", "bad", "c")]
+    assert futures[0].result(5) == "A"
+    with pytest.raises(ValueError):
+        futures[1].result(5)
+    assert futures[2].result(5) == "C"
+    batcher.close()
+    assert batcher.stats()["failures"] == 1
+
+
+def test_full_queue_rejects():
+    release = threading.Event()
+    started = threading.Event()
+
+    def batch_fn(items):
+        started.set()
+        release.wait(5)
+        return items
+
+    batcher = MicroBatcher(batch_fn, window_ms=0, max_batch=1, max_queue=2)
+    first = batcher.submit_async(0)
+    started.wait(5)
+    queued = [batcher.submit_async(i) for i in (1, 2)]
+    with pytest.raises(QueueFullError):
+        batcher.submit_async(3)
+    release.set()
+    assert [f.result(5) for f in [first] + queued] == [0, 1, 2]
+    batcher.close()
+    assert batcher.stats()["rejected"] == 1
+
+
+def test_close_with_a_full_queue_does_not_hang():
+    release = threading.Event()
+    started = threading.Event()
+
+    def batch_fn(items):
+        started.set()
+        release.wait(5)
+        return items
+
+    batcher = MicroBatcher(batch_fn, window_ms=0, max_batch=1, max_queue=2)
+    first = batcher.submit_async(0)
+    started.wait(5)
+    queued = [batcher.submit_async(i) for i in (1, 2)]
+    closer = threading.Thread(target=batcher.close, kwargs={"timeout": 0.2})
+    closer.start()
+    closer.join(1)
+    assert not closer.is_alive()
+    with pytest.raises(BatcherClosedError):
+        batcher.submit(3, timeout=1)
+
+    release.set()
+    # Items queued before close still run.
+    assert [f.result(5) for f in [first] + queued] == [0, 1, 2]
+
+
+def test_close_fails_items_left_without_a_worker():
+    # A batcher inherited across a fork: items in its queue, no worker thread.
+    batcher = MicroBatcher(lambda items: items)
+    stranded = Future()
+    batcher._queue.put_nowait(("x", stranded))
+    batcher.close()
+    with pytest.raises(BatcherClosedError):
+        stranded.result(1)
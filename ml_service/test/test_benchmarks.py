@@ -0,0 +1,50 @@
+import json
+import os
+
+from ml_service import app as app_module
+from ml_service import benchmarks
+from ml_service.synthetic import generate_applicants
+
+
+def test_synthetic_applicants_are_seeded():
+    assert generate_applicants(5, seed=3) == generate_applicants(5, seed=3)
+    assert generate_applicants(5, seed=3) != generate_applicants(5, seed=4)
+
+
+def test_suite_runs_and_reports_per_item_times():
+    cache = app_module.prediction_cache
+    entries, hits = cache.max_entries, cache.hits
+    environ = {k: v for k, v in os.environ.items() if k.startswith("ML_")}
+    report = benchmarks.run_suite(
+        sizes=(1, 4), only=["approval.enrich", "predict_many", "http.predict"],
+        repeats=2, min_time=0,
+    )
+    # The HTTP benchmarks repeat the same applicants; none of them may be cache hits.
+    assert cache.hits == hits
+    assert cache.max_entries == entries
+    assert {k: v for k, v in os.environ.items() if k.startswith("ML_")} == environ
+    keys = set(report["results"])
+    assert {"approval.enrich_features@4", "strategy.predict_many_with_rules@1",
+            "http.predict_approval_batch@4"} <= keys
+    result = report["results"]["approval.enrich_features@4"]
+    assert result["per_item_us"] > 0 and result["size"] == 4
+    json.dumps(report)
+
+
+def test_compare_flags_slowdowns_over_threshold():
+    def run(us):
+        return {"results": {"a@1": {"per_item_us": us}}}
+
+    assert not benchmarks.compare(run(12.0), run(10.0), max_slowdown=0.25)[0][4]
+    assert benchmarks.compare(run(13.0), run(10.0), max_slowdown=0.25)[0][4]
+    assert benchmarks.compare({"results": {"b@1": {"per_item_us": 1.0}}}, run(10.0), 0.25) == []
+
+
+def test_main_exits_nonzero_on_regression(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({"results": {"approval.enrich_features@1": {"per_item_us": 1e-6}}}))
+    code = benchmarks.main([
+        "--sizes", "1", "--only", "approval.enrich", "--repeats", "1", "--min-time", "0",
+        "--out", str(tmp_path / "out.json"), "--baseline", str(baseline),
+    ])
+    assert code == 1
@@ -0,0 +1,86 @@
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+
+from ml_service import app as app_module
+from ml_service import bulk, portfolio
+from ml_service.app import Applicant, app, models
+from ml_service.synthetic import generate_applicants
+
+client = TestClient(app)
+
+
+def test_score_table_matches_score_records():
+    records = generate_applicants(40, seed=3)
+    records[0].update(pref_stability=0.9)
+    records[1].update(pref_flexibility=0.8, steady_payment=1, employment_type="Permanent")
+    records[2].update(credit_score=550)
+    table = pa.Table.from_pylist(records)
+    table = table.add_column(0, "loan_id", pa.array([f"L{i}" for i in range(len(records))]))
+    credit = table.column("credit_score").to_pylist()
+    credit[5] = None
+    table = table.set_column(table.column_names.index("credit_score"), "credit_score", pa.array(credit))
+
+    scored = bulk.score_table(table, models.load(), Applicant).to_pylist()
+    expected = portfolio.score_records(records, models.load(), Applicant)
+    for i, (row, want) in enumerate(zip(scored, expected)):
+        assert row["loan_id"] == f"L{i}"
+        if i == 5:
+            assert row["error"] == "invalid applicant: credit_score" and row["strategy"] is None
+            continue
+        for key in ("approval_decision", "approval_probability", "rate_type", "strategy", "strategy_prob_0"):
+            assert row[key] == want[key], (i, key)
+        assert row["error"] is None
+
+
+def test_schema_is_checked_per_column():
+    records = generate_applicants(3, seed=1)
+    table = pa.Table.from_pylist(records)
+
+    with pytest.raises(bulk.BulkError, match="age: missing column"):
+        bulk.validate_columns(table.drop_columns(["age"]), Applicant)
+    wrong = table.set_column(table.column_names.index("employment_type"), "employment_type", pa.array([1, 2, 3]))
+    with pytest.raises(bulk.BulkError, match="employment_type: expected string"):
+        bulk.validate_columns(wrong, Applicant)
+    fractional = table.set_column(table.column_names.index("age"), "age", pa.array([30.0, 40.5, 50.0]))
+    with pytest.raises(bulk.BulkError, match="age: expected integer"):
+        bulk.validate_columns(fractional, Applicant)
+
+    columns, invalid = bulk.validate_columns(table.drop_columns(["steady_payment"]), Applicant)
+    assert invalid == {} and columns["steady_payment"].tolist() == [1.0, 1.0, 1.0]
+
+
+@pytest.mark.parametrize("fmt", ["arrow", "parquet"])
+def test_bulk_endpoint_round_trips_the_format(fmt):
+    table = pa.Table.from_pylist(generate_applicants(10, seed=4))
+    response = client.post(
+        "/predict/bulk", content=bulk.write_table(table, fmt),
+        headers={"Content-Type": bulk.RESPONSE_TYPES[fmt]},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == bulk.RESPONSE_TYPES[fmt]
+    if fmt == "parquet":
+        scored = pq.read_table(io.BytesIO(response.content))
+    else:
+        scored = pa.ipc.open_stream(response.content).read_all()
+    assert scored.num_rows == 10
+    assert {"approval_decision", "strategy", "error"} <= set(scored.column_names)
+
+    assert client.post("/predict/bulk", content=b"{}", headers={"Content-Type": "application/json"}).status_code == 415
+    response = client.post("/predict/bulk", content=bulk.write_table(table.drop_columns(["age"]), fmt))
+    assert response.status_code == 422 and "age" in response.json()["detail"]
+
+
+def test_oversized_uploads_are_rejected_before_reading(monkeypatch):
+    body = bulk.write_table(pa.Table.from_pylist(generate_applicants(10, seed=4)), "arrow")
+    monkeypatch.setattr(app_module, "BULK_MAX_BYTES", len(body) - 1)
+    response = client.post("/predict/bulk", content=body, headers={"Content-Type": bulk.ARROW_STREAM})
+    assert response.status_code == 413 and str(len(body)) in response.json()["detail"]
+
+    # Without a Content-Length, the limit applies while reading.
+    chunked = client.post("/predict/bulk", content=iter([body[:100], body[100:]]),
+                          headers={"Content-Type": bulk.ARROW_STREAM})
+    assert chunked.status_code == 413
@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+from ml_service.cache import PredictionCache, canonical_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_canonical_key_ignores_key_order():
+    a = canonical_key("approval", "v1", {"age": 35, "income_monthly": 7000.0})
+    b = canonical_key("approval", "v1", {"income_monthly": 7000.0, "age": 35})
+    assert a == b
+    assert a != canonical_key("approval", "v2", {"age": 35, "income_monthly": 7000.0})
+    assert a != canonical_key("strategy", "v1", {"age": 35, "income_monthly": 7000.0})
+
+
+def test_hits_misses_and_lru_eviction():
+    cache = PredictionCache(max_entries=2, ttl_seconds=60)
+    calls = []
+
+    def compute(key):
+        return lambda: calls.append(key) or key.upper()
+
+    assert cache.get_or_compute("a", compute("a")) == "A"
+    assert cache.get_or_compute("b", compute("b")) == "B"
+    assert cache.get_or_compute("a", compute("a")) == "A"  # hit, "a" becomes most recent
+    cache.get_or_compute("c", compute("c"))  # evicts "b"
+    cache.get_or_compute("b", compute("b"))
+
+    assert calls == ["a", "b", "c", "b"]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (1, 4, 2, 2)
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = PredictionCache(max_entries=10, ttl_seconds=5, clock=clock)
+    cache.get_or_compute("a", lambda: 1)
+    clock.now = 4.9
+    assert cache.get_or_compute("a", lambda: 2) == 1
+    clock.now = 5.0
+    assert cache.get_or_compute("a", lambda: 3) == 3
+    assert cache.stats()["expirations"] == 1
+
+
+def test_invalidate_drops_entries():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    cache.get_or_compute("a", lambda: 1)
+    cache.invalidate()
+    assert cache.get_or_compute("a", lambda: 2) == 2
+
+
+def test_concurrent_identical_requests_share_one_computation():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "done"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", slow)))
+               for _ in range(5)]
+    threads[0].start()
+    started.wait(5)
+    for t in threads[1:]:
+        t.start()
+    while cache.stats()["shared"] < 4:
+        pass
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert calls == [1]
+    assert results == ["done"] * 5
+
+
+def test_errors_are_not_cached():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+
+    def boom():
+        raise RuntimeError("model failed")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute("a", boom)
+    assert cache.get_or_compute("a", lambda: 1) == 1
+
+
+def test_disabled_cache_always_computes():
+    cache = PredictionCache(max_entries=0)
+    assert cache.get_or_compute("a", lambda: 1) == 1
+    assert cache.get_or_compute("a", lambda: 2) == 2
@@ -0,0 +1,129 @@
+import os
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_service import approval, strategy
+from ml_service.compiled import CompiledPipeline, compile_pipeline
+from ml_service.trees import FlatTreeEnsemble
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _load(name):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return joblib.load(os.path.join(BASE_DIR, name))
+
+
+def _random_applicants(n, seed=0):
+    rng = np.random.default_rng(seed)
+    prefs = {
+        k: rng.uniform(0, 1, size=n)
+        for k in ["pref_low_payment", "pref_flexibility", "pref_stability",
+                  "pref_fast_payoff", "pref_equity_growth", "pref_risk_tolerance"]
+    }
+    return pd.DataFrame({
+        "age": rng.integers(20, 80, size=n),
+        # "seasonal" is not a category the encoder saw during fit.
+        "employment_type": rng.choice(["full_time", "contract", "self_employed", "seasonal"], size=n),
+        "employment_years": rng.integers(0, 30, size=n),
+        "income_monthly": rng.uniform(0, 15000, size=n),
+        "credit_score": rng.integers(450, 850, size=n),
+        "property_value": rng.uniform(100_000, 1_500_000, size=n),
+        "mortgage_balance": rng.uniform(0, 1_200_000, size=n),
+        "amortization_remaining": rng.integers(1, 31, size=n),
+        "monthly_payment_current": rng.uniform(300, 6000, size=n),
+        "expenses_monthly": rng.uniform(500, 6000, size=n),
+        "debt_payments_monthly": rng.uniform(0, 3000, size=n),
+        "interest_rate_current": rng.uniform(0, 8, size=n),
+        "rate_type": rng.choice(["fixed", "variable"], size=n),
+        **prefs,
+        "steady_payment": rng.integers(0, 2, size=n),
+    })
+
+
+@pytest.fixture(scope="module")
+def cases():
+    raw = _random_applicants(500)
+    approval_rows = approval.enrich_features_frame(raw)
+    strategy_rows = strategy.enrich_features_frame(raw)
+    strategy_pipeline = _load("strategy_pipeline.pkl")
+    # Same zero-fill StrategyPipelineWrapper.prepare_row applies.
+    for col in strategy_pipeline.feature_names_in_:
+        if col not in strategy_rows.columns:
+            strategy_rows[col] = 0
+    return [
+        (_load("approval_pipeline.pkl"), approval_rows),
+        (strategy_pipeline, strategy_rows),
+    ]
+
+
+def test_compiled_matches_sklearn_bit_for_bit(cases):
+    for pipeline, rows in cases:
+        compiled = CompiledPipeline(pipeline)
+        np.testing.assert_array_equal(compiled.predict_proba(rows), pipeline.predict_proba(rows))
+
+
+def test_compiled_row_buffers_match_sklearn(cases):
+    for pipeline, rows in cases:
+        compiled = CompiledPipeline(pipeline, flat_max_batch=0)
+        for record in rows.head(25).to_dict("records"):
+            expected = pipeline.predict_proba(pd.DataFrame([record]))
+            np.testing.assert_array_equal(
+                compiled.predict_proba_buffers(*compiled.layout.fill(record)), expected
+            )
+
+
+def test_batch_predict_matches_single_path(cases):
+    pipeline, _ = cases[0]
+    compiled = CompiledPipeline(pipeline, flat_max_batch=0)
+    records = _random_applicants(40, seed=3).to_dict("records")
+    assert approval.predict_applicants(records, compiled) == [
+        approval.predict_applicant(r, compiled) for r in records
+    ]
+
+
+def test_flat_trees_match_booster(cases, tmp_path):
+    for pipeline, rows in cases:
+        compiled = CompiledPipeline(pipeline)
+        X = compiled.transform(rows).astype(np.float32)
+        X[::5, 1] = np.nan
+        booster = compiled.booster
+
+        flat = FlatTreeEnsemble.from_booster(booster)
+        flat.save(tmp_path / "trees.npz")
+        flat = FlatTreeEnsemble.load(tmp_path / "trees.npz")
+
+        margin = booster.inplace_predict(X, predict_type="margin").reshape(len(X), -1)
+        np.testing.assert_array_equal(flat.predict_margin(X), margin)
+        np.testing.assert_allclose(flat.predict(X), booster.inplace_predict(X), rtol=0, atol=1e-6)
+
+
+def test_small_batches_use_flat_trees(cases):
+    for pipeline, rows in cases:
+        compiled = CompiledPipeline(pipeline, flat_max_batch=4)
+        assert compiled.flat is not None
+        np.testing.assert_allclose(
+            compiled.predict_proba(rows.head(3)), pipeline.predict_proba(rows.head(3)), rtol=0, atol=1e-6
+        )
+
+
+def test_verify_mode_counts_no_mismatches(cases):
+    for pipeline, rows in cases:
+        compiled = CompiledPipeline(pipeline, mode="verify")
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", RuntimeWarning)
+            compiled.predict_proba(rows)
+        assert compiled.mismatches == 0
+
+
+def test_compile_pipeline_falls_back_for_unsupported_pipelines():
+    class NoPreprocess:
+        pass
+
+    pipeline = NoPreprocess()
+    assert compile_pipeline(pipeline) is pipeline
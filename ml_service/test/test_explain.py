@@ -0,0 +1,37 @@
+import numpy as np
+import xgboost
+
+from ml_service import approval
+from ml_service.app import models
+from ml_service.explain import TreeExplainer, feature_groups
+from ml_service.synthetic import generate_applicants
+
+
+def test_feature_groups_fold_one_hot_columns_into_their_field():
+    preprocess = models.load().approval_pipeline.named_steps["preprocess"]
+    features, index = feature_groups(preprocess)
+    names_out = list(preprocess.get_feature_names_out())
+    assert len(index) == len(names_out) and features.count("employment_type") == 1
+    onehot = [n for n, i in zip(names_out, index) if features[i] == "employment_type"]
+    assert onehot and all(n.startswith("cat__employment_type_") for n in onehot)
+
+
+def test_attributions_add_up_to_the_booster_margin():
+    pipeline = models.load().approval_pipeline
+    explainer = TreeExplainer(pipeline, cache_entries=0)
+    cases = [approval.enrich_features(a) for a in generate_applicants(40, seed=8)]
+    margins = pipeline.booster.predict(xgboost.DMatrix(explainer.matrix(cases)), output_margin=True,
+                                       validate_features=False)
+    attributions = explainer.attributions(cases)
+    assert np.allclose([base + c.sum() for _, base, _, c in attributions], margins, atol=1e-4)
+
+
+def test_batch_matches_single_and_hits_the_cache():
+    explainer = TreeExplainer(models.load().strategy_pipeline)
+    applicants = generate_applicants(10, seed=4)
+    cases = [models._strategy.enrich_features(a) for a in applicants]
+    batch = explainer.explain_many(cases, top_k=3)
+    assert explainer.stats()["misses"] == 10
+    assert [explainer.explain_many([c], top_k=3)[0] for c in cases] == batch
+    assert explainer.stats()["hits"] == 10
+    assert all(len(b["top_features"]) == 3 and b["class"] in explainer.classes for b in batch)
@@ -0,0 +1,196 @@
+import logging
+import multiprocessing
+import time
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+from ml_service import app as app_module
+from ml_service import portfolio
+from ml_service.app import Applicant, models
+from ml_service.jobs import INLINE, JobError, JobRunner, JobStore
+from ml_service.logs import logger
+from ml_service.synthetic import generate_applicants
+
+client = TestClient(app_module.app)
+
+
+def _runner(tmp_path, **kwargs):
+    kwargs.setdefault("workers", 0)
+    return JobRunner(JobStore(str(tmp_path / "jobs.db")), lambda: models, Applicant,
+                     poll_seconds=0.05, **kwargs)
+
+
+def _wait(store, job_id, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while store.status(job_id) in ("queued", "running"):
+        assert time.monotonic() < deadline, store.get(job_id)
+        time.sleep(0.05)
+    return store.get(job_id)
+
+
+def test_jobs_run_by_priority_and_match_score_records(tmp_path):
+    runner = _runner(tmp_path, chunk_size=4)
+    records = generate_applicants(10, seed=6) + [{"age": 40}]
+    low = runner.submit(records[:3], priority=0)
+    high = runner.submit(records, priority=5)
+    assert runner.store.claim_next()["id"] == high["id"]
+    runner.store.requeue_running()
+
+    runner.start()
+    try:
+        job = _wait(runner.store, high["id"])
+        _wait(runner.store, low["id"])
+    finally:
+        runner.stop()
+    assert runner.store.get(low["id"])["started"] > job["started"]
+    assert (job["status"], job["done"], job["total"], job["errors"], job["progress"]) == ("done", 11, 11, 1, 1.0)
+
+    expected = portfolio.score_records(records, models.load(), Applicant)
+    rows = runner.store.results(high["id"])
+    assert [r["row"] for r in rows] == list(range(11))
+    assert [{k: v for k, v in r.items() if k != "row"} for r in rows] == expected
+    assert not rows[0]["strategy_reasons"].startswith("Reason ")
+    assert [r["row"] for r in runner.store.results(high["id"], offset=3, limit=5)] == [3, 4, 5, 6, 7]
+
+
+def test_cancel_and_resume_after_restart(tmp_path, monkeypatch):
+    runner = _runner(tmp_path, chunk_size=2)
+    records = generate_applicants(6, seed=7)
+    cancelled = runner.submit(records)
+    assert runner.cancel(cancelled["id"]) and not runner.cancel(cancelled["id"])
+
+    # A job that was running when the process died, with its first chunk saved.
+    job = runner.submit(records)
+    runner.store.claim_next()
+    runner.store.save_chunk(job["id"], 0, [{"row": 0, "error": None}, {"row": 1, "error": None}])
+    scored = []
+    score_records = portfolio.score_records
+    monkeypatch.setattr(portfolio, "score_records", lambda rs, m, s: scored.append(len(rs)) or score_records(rs, m, s))
+
+    runner.start()
+    try:
+        job = _wait(runner.store, job["id"])
+    finally:
+        runner.stop()
+    assert (job["status"], job["done"]) == ("done", 6)
+    assert scored == [2, 2]
+    assert runner.store.get(cancelled["id"])["status"] == "cancelled"
+    assert runner.store.results(cancelled["id"]) == []
+
+
+def test_file_jobs_in_worker_processes(tmp_path):
+    root = tmp_path / "books"
+    root.mkdir()
+    frame = pd.DataFrame(generate_applicants(30, seed=9))
+    frame.to_parquet(root / "book.parquet", index=False)
+    runner = _runner(tmp_path, workers=1, chunk_size=16, file_root=str(root))
+
+    with pytest.raises(JobError, match="outside"):
+        runner.submit(file="../jobs.db")
+    with pytest.raises(JobError):
+        runner.submit(applicants=[], file=None)
+
+    job = runner.submit(file="book.parquet")
+    assert job["total"] == 30
+    runner.start()
+    try:
+        job = _wait(runner.store, job["id"])
+    finally:
+        runner.stop()
+    assert (job["status"], job["done"], job["errors"]) == ("done", 30, 0)
+    expected = portfolio.score_records(portfolio._records(frame), models.load(), Applicant)
+    rows = runner.store.results(job["id"])
+    assert [r["strategy"] for r in rows] == [r["strategy"] for r in expected]
+
+
+def test_job_endpoints(tmp_path, monkeypatch):
+    assert client.post("/jobs", json={"applicants": []}).status_code == 404
+
+    runner = _runner(tmp_path, chunk_size=5)
+    monkeypatch.setattr(app_module, "job_runner", runner)
+    runner.start()
+    try:
+        response = client.post("/jobs", json={"applicants": generate_applicants(12, seed=2), "priority": 1})
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+        _wait(runner.store, job_id)
+        status = client.get(f"/jobs/{job_id}").json()
+        assert (status["status"], status["done"], status["total"]) == ("done", 12, 12)
+
+        results = client.get(f"/jobs/{job_id}/results", params={"offset": 10, "limit": 5}).json()
+        assert [r["row"] for r in results["rows"]] == [10, 11]
+        assert client.post(f"/jobs/{job_id}/cancel").status_code == 409
+        assert client.post("/jobs", json={"file": "x.csv"}).status_code == 422
+        assert client.get("/jobs").json()["jobs"]["done"] == 1
+        assert client.delete(f"/jobs/{job_id}").json() == {"id": job_id, "deleted": True}
+        assert client.get(f"/jobs/{job_id}").status_code == 404
+    finally:
+        runner.stop()
+
+
+def test_failed_jobs_are_logged(tmp_path, monkeypatch):
+    runner = _runner(tmp_path)
+    job = runner.submit(generate_applicants(2, seed=1))
+
+    def broken(records, models, schema):
+        raise RuntimeError("model exploded")
+
+    monkeypatch.setattr(portfolio, "score_records", broken)
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.addHandler(handler)
+    runner.start()
+    try:
+        job = _wait(runner.store, job["id"])
+    finally:
+        runner.stop()
+        logger.removeHandler(handler)
+    assert (job["status"], job["error"]) == ("failed", "RuntimeError: model exploded")
+    assert [(r.getMessage(), r.fields["job_id"]) for r in records] == [("job failed", job["id"])]
+    assert records[0].exc_info
+
+
+def test_one_dispatcher_per_database(tmp_path):
+    # Two processes' runners on one database, as under the pre-fork server.
+    first, second = _runner(tmp_path, chunk_size=3), _runner(tmp_path, chunk_size=3)
+    first.start()
+    try:
+        deadline = time.monotonic() + 10
+        while not first.status()["dispatcher"]:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        second.start()
+        job = second.submit(generate_applicants(7, seed=3))
+        job = _wait(second.store, job["id"])
+        assert (job["status"], job["done"]) == ("done", 7)
+        assert not second.status()["dispatcher"]
+    finally:
+        first.stop()
+
+    # The other runner takes over once the first one has stopped.
+    try:
+        job = _wait(second.store, first.submit(generate_applicants(4, seed=5))["id"])
+        assert (job["status"], job["done"]) == ("done", 4)
+        assert second.status()["dispatcher"]
+    finally:
+        second.stop()
+
+
+@pytest.mark.filterwarnings("ignore:This process .* is multi-threaded")
+def test_store_opens_its_own_connection_after_fork(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.db"))
+    parent_job = store.create(INLINE, 10, total=1, chunks=[[{}]])
+
+    def child():
+        store.create(INLINE, 10, priority=store.get(parent_job)["priority"] + 1, total=1, chunks=[[{}]])
+
+    process = multiprocessing.get_context("fork").Process(target=child)
+    process.start()
+    process.join(30)
+    assert process.exitcode == 0
+    assert store.counts()["queued"] == 2
+    assert store.claim_next()["priority"] == 1 and store.claim_next()["id"] == parent_job
+    assert store.claim_next() is None
@@ -0,0 +1,43 @@
+import asyncio
+
+import httpx
+import pytest
+
+from ml_service import loadtest
+from ml_service.app import app
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 1001))
+    assert loadtest.percentile(values, 0.5) == 500
+    assert loadtest.percentile(values, 0.999) == 999
+    assert loadtest.percentile([7], 0.99) == 7
+
+
+def test_plan_follows_mix_and_repeats():
+    mix = loadtest.parse_mix("approval=3,strategy=1")
+    plan = loadtest.build_plan(2000, mix, repeat=0.5, seed=1)
+    approvals = sum(path == "/predict/approval" for path, _ in plan)
+    assert 1350 < approvals < 1650
+    assert 800 < len({body for _, body in plan}) < 1200
+    with pytest.raises(ValueError):
+        loadtest.parse_mix("refinance=1")
+
+
+def test_poisson_arrivals_keep_the_mean_rate():
+    offsets = loadtest.arrival_offsets(5000, rate=100, poisson=True)
+    assert offsets == sorted(offsets)
+    assert 45 < offsets[-1] < 55
+
+
+def test_sweep_reports_latency_and_errors():
+    summaries = asyncio.run(loadtest.sweep(
+        "http://test", rates=[40], duration=0.5, mix=loadtest.parse_mix("approval=1,strategy=1"),
+        pause=0, transport=httpx.ASGITransport(app=app),
+    ))
+    (summary,) = summaries
+    assert summary["requests"] == 20
+    assert summary["errors"] == 0 and summary["statuses"] == {"200": 20}
+    assert 0 < summary["p50_ms"] <= summary["p99_ms"] <= summary["max_ms"]
+    assert set(summary["routes"]) == {"/predict/approval", "/predict/strategy"}
+    assert loadtest.max_sustainable_rate(summaries, slo_ms=1e9) == 40
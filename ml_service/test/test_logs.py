@@ -0,0 +1,110 @@
+import io
+import json
+import logging
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from ml_service import logs
+from ml_service.app import app
+from ml_service.compiled import compile_pipeline
+from ml_service.models import ModelBundle
+from ml_service.test.test_app import valid_applicant
+
+
+class Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def _collect(logger):
+    handler = Collect()
+    logger.addHandler(handler)
+    return handler
+
+
+def test_request_log_has_id_version_and_stages(monkeypatch):
+    handler = _collect(logs.request_logger)
+    try:
+        for middleware in app.user_middleware:
+            if middleware.cls is logs.RequestLoggingMiddleware:
+                monkeypatch.setitem(middleware.kwargs, "sample_rate", 1.0)
+        app.middleware_stack = None  # rebuild with the patched sample rate
+        client = TestClient(app)
+        response = client.post("/predict/strategy", json={**valid_applicant, "age": 52},
+                               headers={"X-Request-ID": "req-42"})
+    finally:
+        logs.request_logger.removeHandler(handler)
+        app.middleware_stack = None
+
+    assert response.headers["x-request-id"] == "req-42"
+    fields = [r.fields for r in handler.records if r.fields["request_id"] == "req-42"][0]
+    assert fields["status"] == 200 and fields["model_version"]
+    assert {"validate", "enrich_features", "predict_proba", "reasons", "serialize"} <= set(fields["stages_ms"])
+    assert "payload" not in fields
+
+
+def test_payloads_are_only_logged_at_debug():
+    handler = _collect(logs.logger)
+    level = logs.logger.level
+    try:
+        logs.log_payload("/predict/approval", {"age": 30}, {"decision": "PASS"})
+        assert handler.records == []
+        logs.logger.setLevel(logging.DEBUG)
+        logs.log_payload("/predict/approval", {"age": 30}, {"decision": "PASS"})
+    finally:
+        logs.logger.setLevel(level)
+        logs.logger.removeHandler(handler)
+    assert handler.records[0].fields["payload"] == {"age": 30}
+
+
+def test_queue_handler_writes_json_off_thread_and_drops_when_full():
+    stream = io.StringIO()
+    target = logging.StreamHandler(stream)
+    target.setFormatter(logs.JsonFormatter())
+    handler = logs.NonBlockingQueueHandler(target, max_queue=1)
+    logger = logging.getLogger("ml_service.test_queue")
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.warning("hello %s", "world", extra={"fields": {"request_id": "r1"}})
+    finally:
+        handler.close()
+        logger.removeHandler(handler)
+    line = json.loads(stream.getvalue().splitlines()[0])
+    assert line["msg"] == "hello world" and line["request_id"] == "r1"
+
+    release = threading.Event()
+
+    class Stuck(logging.Handler):
+        def emit(self, record):
+            release.wait(5)
+
+    handler = logs.NonBlockingQueueHandler(Stuck(), max_queue=1)
+    handler.handle(logging.makeLogRecord({"msg": "first", "levelno": logging.INFO}))
+    while handler.queue.qsize():  # the listener is now blocked on "first"
+        time.sleep(0.001)
+    for _ in range(3):
+        handler.handle(logging.makeLogRecord({"msg": "x", "levelno": logging.INFO}))
+    release.set()
+    handler.close()
+    assert handler.dropped == 2
+
+
+def test_load_failures_and_fallbacks_go_through_the_logger(tmp_path):
+    handler = _collect(logs.logger)
+    try:
+        ModelBundle(str(tmp_path / "missing.pkl"), str(tmp_path / "missing.pkl")).load_in_background().join(30)
+        compile_pipeline(object())
+    finally:
+        logs.logger.removeHandler(handler)
+
+    failed, fallback = handler.records
+    assert failed.getMessage() == "model load failed" and failed.exc_info
+    assert failed.fields["approval_path"].endswith("missing.pkl")
+    assert fallback.levelno == logging.WARNING and fallback.getMessage() == "using sklearn preprocess path"
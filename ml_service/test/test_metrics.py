@@ -0,0 +1,48 @@
+from fastapi.testclient import TestClient
+
+from ml_service.app import app
+from ml_service.metrics import Registry
+from ml_service.test.test_app import valid_applicant
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    hist = registry.histogram("demo_seconds", "Demo.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        hist.observe(value, '/a"b')
+    text = registry.render()
+    assert 'demo_seconds_bucket{route="/a\\"b",le="0.1"} 2' in text
+    assert 'demo_seconds_bucket{route="/a\\"b",le="1.0"} 3' in text
+    assert 'demo_seconds_bucket{route="/a\\"b",le="+Inf"} 4' in text
+    assert 'demo_seconds_count{route="/a\\"b"} 4' in text
+    assert 'demo_seconds_sum{route="/a\\"b"} 3.65' in text
+
+
+def test_counter_and_collectors():
+    registry = Registry()
+    requests = registry.counter("demo_total", "Demo.", ("status",))
+    requests.inc("200")
+    requests.inc("200")
+    registry.add_collector(lambda: [("demo_gauge", "gauge", "Gauge.", [({}, 7)])])
+    text = registry.render()
+    assert 'demo_total{status="200"} 2' in text
+    assert "# TYPE demo_gauge gauge\ndemo_gauge 7" in text
+
+
+def test_metrics_endpoint_reports_stage_latencies():
+    client.post("/predict/strategy", json={**valid_applicant, "age": 47})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    for stage in ("validate", "enrich_features", "build_row", "predict_proba", "rules", "reasons", "serialize"):
+        assert f'ml_stage_duration_seconds_count{{route="/predict/strategy",stage="{stage}"}}' in text
+    assert 'ml_requests_total{route="/predict/strategy",status="200"}' in text
+    assert "ml_cache_misses_total" in text
+
+
+def test_batch_endpoint_records_batch_size():
+    client.post("/predict/approval/batch", json={"applicants": [valid_applicant] * 3})
+    assert 'ml_batch_size_bucket{source="approval-batch-endpoint",le="4"}' in client.get("/metrics").text
@@ -0,0 +1,60 @@
+import os
+
+import pandas as pd
+import pytest
+
+from ml_service import portfolio
+from ml_service.app import Applicant, models
+from ml_service.synthetic import generate_applicants
+
+
+@pytest.fixture
+def book(tmp_path):
+    frame = pd.DataFrame(generate_applicants(25, seed=5))
+    frame.insert(0, "loan_id", [f"L{i}" for i in range(len(frame))])
+    frame.loc[3, "credit_score"] = None
+    path = tmp_path / "book.csv"
+    frame.to_csv(path, index=False)
+    return path
+
+
+def test_score_records_matches_the_api_paths():
+    records = generate_applicants(6, seed=2)
+    rows = portfolio.score_records(records + [{"age": 40}], models.load(), Applicant)
+
+    for record, row in zip(records, rows):
+        approval = models.predict_approval(record)
+        strategy = models.predict_strategy(record)
+        assert row["approval_decision"] == approval["decision"]
+        assert row["approval_probability"] == approval["approval_probability"]
+        assert row["strategy"] == strategy["strategy"]
+        assert row["strategy_prob_0"] == strategy["adjusted_probabilities"]["0"]
+        assert row["strategy_reasons"] == "; ".join(strategy["reasons"].values())
+        assert row["approval_reasons"] == "; ".join(approval["approval_reasons"])
+    assert rows[-1]["error"].startswith("invalid applicant:") and "credit_score" in rows[-1]["error"]
+
+
+def test_scores_in_chunks_and_resumes(book, tmp_path):
+    out = tmp_path / "out"
+    totals = portfolio.score_file(str(book), str(out), chunk_size=10, workers=1, keep=["loan_id"], progress=None)
+    assert totals == {**totals, "chunks": 3, "rows": 25, "errors": 1}
+
+    scored = pd.concat(pd.read_csv(out / f"part-00000{i}.csv") for i in range(3))
+    assert scored["row"].tolist() == list(range(25))
+    assert scored["loan_id"].tolist() == [f"L{i}" for i in range(25)]
+    assert scored["error"].notna().tolist() == [i == 3 for i in range(25)]
+
+    os.remove(out / "part-000001.csv")
+    totals = portfolio.score_file(str(book), str(out), chunk_size=10, workers=1, keep=["loan_id"], progress=None)
+    assert (totals["chunks"], totals["skipped_chunks"], totals["rows"]) == (1, 2, 10)
+    assert pd.read_csv(out / "part-000001.csv")["row"].tolist() == list(range(10, 20))
+
+
+def test_refuses_to_resume_a_different_run(book, tmp_path):
+    out = tmp_path / "out"
+    portfolio.score_file(str(book), str(out), chunk_size=10, workers=1, progress=None)
+    with pytest.raises(SystemExit):
+        portfolio.score_file(str(book), str(out), chunk_size=5, workers=1, progress=None)
+    totals = portfolio.score_file(str(book), str(out), chunk_size=5, workers=1, restart=True, progress=None)
+    assert totals["chunks"] == 5
+    assert not (out / "part-000000.csv.tmp").exists()
@@ -0,0 +1,45 @@
+import math
+
+import numpy as np
+
+from ml_service.amortization import loan_costs
+from ml_service.rates import rate_risk, simulate_many, simulate_paths, variable_payments
+
+CASE = {"mortgage_balance": 400_000.0, "interest_rate_current": 5.0, "amortization_remaining": 25}
+
+
+def test_paths_follow_the_vasicek_mean_and_variance():
+    kappa, theta, sigma = 0.5, 4.0, 1.2
+    paths = simulate_paths(6.0, 60, n_paths=20_000, kappa=kappa, theta=theta, sigma=sigma, seed=1, floor=-np.inf)
+    years = 5.0
+    mean = theta + (6.0 - theta) * math.exp(-kappa * years)
+    sd = sigma * math.sqrt((1 - math.exp(-2 * kappa * years)) / (2 * kappa))
+    assert abs(paths[-1].mean() - mean) < 0.02
+    assert abs(paths[-1].std() - sd) < 0.03
+    assert np.array_equal(paths, simulate_paths(6.0, 60, n_paths=20_000, kappa=kappa, theta=theta,
+                                                sigma=sigma, seed=1, floor=-np.inf))
+
+
+def test_constant_rate_matches_fixed_amortization():
+    paths = np.full((60, 3), 5.0)
+    paths[:, 2] = 0.0
+    payments, interest, remaining = variable_payments(400_000.0, 25, paths)
+    fixed = loan_costs(400_000.0, [5.0, 5.0, 0.0], 25, horizon_years=5)
+    assert np.allclose(payments, fixed["monthly_payment"])
+    assert np.allclose(interest.sum(axis=0), fixed["interest_to_horizon"])
+    assert np.allclose(remaining, fixed["balance_at_horizon"])
+
+
+def test_rate_risk_without_volatility_matches_fixed():
+    result = rate_risk(CASE, fixed_rate=5.0, n_paths=100, kappa=0.3, theta=5.0, sigma=0.0)
+    for stat in ("peak_payment", "monthly_payment"):
+        assert set(result["variable"][stat].values()) == {result["fixed"]["monthly_payment"]}
+    assert result["prob_variable_costs_more"] == 0.0
+    assert result["prob_payment_exceeds_stress"] == 0.0
+
+
+def test_simulate_many_uses_one_child_seed_per_case():
+    cases = [CASE, {**CASE, "interest_rate_current": 3.0}]
+    results = simulate_many(cases, seed=9, workers=1, n_paths=500)
+    seeds = np.random.SeedSequence(9).spawn(2)
+    assert results == [rate_risk(c, n_paths=500, seed=s) for c, s in zip(cases, seeds)]
@@ -0,0 +1,84 @@
+import logging
+import os
+import shutil
+
+import pytest
+
+from ml_service.app import APPROVAL_PATH, STRATEGY_PATH
+from ml_service.logs import logger
+from ml_service.registry import PIN_FILE, ModelRegistry, list_versions
+from ml_service.test.test_app import client, valid_applicant
+
+
+def _publish(root, version):
+    # Copy under a dot name, then rename into place, as a deploy would.
+    staging = root / f".{version}"
+    staging.mkdir()
+    shutil.copy(APPROVAL_PATH, staging)
+    shutil.copy(STRATEGY_PATH, staging)
+    os.rename(staging, root / version)
+
+
+@pytest.fixture
+def root(tmp_path):
+    _publish(tmp_path, "v1")
+    (tmp_path / ".v9-partial").mkdir()
+    return tmp_path
+
+
+def test_swaps_after_in_flight_requests_drain(root):
+    swaps = []
+    registry = ModelRegistry(root=str(root), on_swap=lambda: swaps.append(1))
+    closed = []
+
+    with registry.lease() as old:
+        old.close = lambda: closed.append(old.version)
+        assert old.predict_approval(valid_applicant)["decision"] in ("PASS", "FAIL")
+        assert not registry.poll()
+
+        _publish(root, "v2")
+        assert list_versions(str(root)) == ["v1", "v2"]
+        assert registry.poll() and swaps == [1]
+        assert registry.current.version == "v2" and registry.current.ready
+        # The lease still holds v1, which keeps serving until it is returned.
+        assert old.version == "v1" and old.predict_approval(valid_applicant)
+        assert registry.status()["draining"] == [("v1", 1)] and closed == []
+
+    assert closed == ["v1"] and registry.status()["draining"] == []
+    with registry.lease() as bundle:
+        assert bundle.version == "v2"
+
+
+def test_pin_file_selects_a_version_and_bad_versions_are_not_retried(root):
+    _publish(root, "v2")
+    (root / PIN_FILE).write_text("v1\n")
+    registry = ModelRegistry(root=str(root))
+    assert registry.current.version == "v1"
+
+    (root / "v3").mkdir()
+    (root / "v3" / "approval_pipeline.pkl").write_bytes(b"not a pickle")
+    (root / "v3" / "strategy_pipeline.pkl").write_bytes(b"not a pickle")
+    (root / PIN_FILE).write_text("v3")
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger.addHandler(handler)
+    try:
+        assert not registry.poll()
+    finally:
+        logger.removeHandler(handler)
+    assert registry.current.version == "v1" and registry.status()["error"].startswith("v3:")
+    assert [(r.getMessage(), r.fields["version"]) for r in records] == [("model version failed to load", "v3")]
+    assert records[0].exc_info
+    assert not registry.poll()
+
+    (root / PIN_FILE).unlink()
+    _publish(root, "v4")
+    assert registry.poll() and registry.current.version == "v4" and registry.status()["error"] is None
+
+
+def test_responses_report_the_model_version():
+    response = client.post("/predict/approval", json=valid_applicant)
+    models = client.get("/models").json()
+    assert response.headers["x-model-version"] == models["current"]
+    assert client.get("/").headers["x-model-version"] == models["current"]
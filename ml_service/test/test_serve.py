@@ -0,0 +1,53 @@
+import json
+import logging
+import os
+import warnings
+
+import joblib
+
+from ml_service import serve
+from ml_service.compiled import compile_pipeline
+from ml_service.logs import logger
+from ml_service.serve import bind_socket, limit_threads
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_limit_threads_caps_booster_and_estimator():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        pipeline = compile_pipeline(joblib.load(os.path.join(BASE_DIR, "approval_pipeline.pkl")))
+    limit_threads(pipeline, 2)
+    config = json.loads(pipeline.booster.save_config())
+    assert config["learner"]["generic_param"]["nthread"] == "2"
+    assert pipeline.steps[-1][1].get_params()["n_jobs"] == 2
+
+
+def test_bind_socket_is_inheritable():
+    sock = bind_socket("127.0.0.1", 0)
+    try:
+        assert sock.get_inheritable()
+        assert sock.getsockname()[1] > 0
+    finally:
+        sock.close()
+
+
+def test_failed_worker_is_logged(tmp_path, monkeypatch):
+    def broken(app, sock, log_level):
+        raise RuntimeError("no socket")
+
+    monkeypatch.setattr(serve, "_run_worker", broken)
+    handler = logging.FileHandler(tmp_path / "worker.log")
+    handler.setFormatter(logging.Formatter("%(message)s|%(exc_info)s"))
+    logger.addHandler(handler)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)  # fork() in a threaded test process
+            pid = serve._spawn(None, None, "info")
+        _, status = os.waitpid(pid, 0)
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+    assert os.waitstatus_to_exitcode(status) == 1
+    assert (tmp_path / "worker.log").read_text().startswith("worker failed|")
+    assert "no socket" in (tmp_path / "worker.log").read_text()
@@ -0,0 +1,61 @@
+import numpy as np
+
+from ml_service import approval
+from ml_service.amortization import payment, principal_for_payment
+from ml_service.app import models
+from ml_service.solver import max_mortgage, rule_limits
+from ml_service.test.test_app import valid_applicant
+
+
+def _approved(applicant, balance, rate, years, cutoff=0.5):
+    point = {
+        **applicant,
+        "mortgage_balance": balance,
+        "monthly_payment_current": float(payment(balance, rate, years)),
+        "interest_rate_current": rate,
+        "amortization_remaining": years,
+    }
+    result = models.predict_approval(point)
+    return result["decision"] == "PASS" and result["approval_probability"] >= cutoff
+
+
+def test_payment_round_trips():
+    rates = np.array([0.0, 2.5, 5.0, 9.0])
+    assert np.allclose(principal_for_payment(payment(300_000, rates, 25), rates, 25), 300_000)
+    assert payment(120_000, 0.0, 10) == 1000.0
+
+
+def test_rule_limits_match_hard_fail_thresholds():
+    ceiling, binding = rule_limits(valid_applicant, np.array([3.0, 9.0]), np.array([25, 25]))
+    assert ceiling[0] == approval.MAX_LOAN_TO_VALUE * valid_applicant["property_value"]
+    assert binding.tolist() == ["loan_to_value", "gds_ratio"]
+    assert np.isclose(payment(ceiling[1], 9.0, 25), approval.MAX_GDS_RATIO * valid_applicant["income_monthly"])
+
+    ceiling, binding = rule_limits({**valid_applicant, "age": 60}, np.array([5.0, 5.0]), np.array([20, 25]))
+    assert ceiling[1] == 0 and binding.tolist()[1] == "age_plus_amort"
+    ceiling, binding = rule_limits({**valid_applicant, "credit_score": 550}, np.array([5.0]), np.array([25]))
+    assert ceiling[0] == 0 and binding[0] == "credit_score"
+
+
+def test_rule_limits_report_the_rule_the_rules_engine_fails_on():
+    rates, years = np.array([5.0, 5.0]), np.array([5, 25])
+    for overrides, expected, reason in (
+        ({"age": 70, "income_monthly": 0}, ["income_monthly", "age_plus_amort"], "Age plus amortization exceeds 80"),
+        ({"age": 70, "income_monthly": 0, "credit_score": 550}, ["credit_score"] * 2, "Credit score below 600"),
+    ):
+        applicant = {**valid_applicant, **overrides}
+        assert rule_limits(applicant, rates, years)[1].tolist() == expected
+        case = {**applicant, "mortgage_balance": 0, "monthly_payment_current": 0, "amortization_remaining": 25}
+        assert approval.rule_based_predict(approval.enrich_features(case))[2] == [reason]
+
+
+def test_max_balance_sits_on_the_approval_boundary():
+    result = max_mortgage(models.load(), valid_applicant, [3.0, 6.0], [15, 25], tolerance=100.0)
+    for i, rate in enumerate(result["rates"]):
+        for j, years in enumerate(result["amortizations"]):
+            balance = result["max_balance"][i][j]
+            assert balance > 0 and _approved(valid_applicant, balance, rate, years)
+            assert not _approved(valid_applicant, balance + 250, rate, years)
+    # Borrowing capacity falls with the rate and grows with the amortization.
+    grid = np.array(result["max_balance"])
+    assert (grid[0] >= grid[1]).all() and (grid[:, 1] >= grid[:, 0]).all()
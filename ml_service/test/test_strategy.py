@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ml_service.strategy import (
+    STRATEGIES,
+    apply_preferences,
+    apply_preferences_frame,
+    check_feasibility,
+    check_feasibility_frame,
+    cost_comparison_frame,
+    cost_features,
+    cost_rows,
+    enrich_features,
+    enrich_features_frame,
+    recommend_strategy,
+    recommend_strategy_frame,
+    rule_based_recommend,
+    rule_based_recommend_frame,
+    score_strategies,
+    score_strategies_frame,
+)
+
+N_CASES = 2000
+
+
+def _random_cases(n, seed=7):
+    rng = np.random.default_rng(seed)
+    prefs = rng.uniform(0, 1, size=(n, 6))
+    # Push some preferences over the 0.7 / 0.8 / 0.85 thresholds more often.
+    prefs[rng.uniform(size=(n, 6)) < 0.15] = rng.uniform(0.85, 1.0)
+    savings = rng.choice([0.0, 3_000.0, 8_000.0, 25_000.0, 120_000.0], size=n)
+    raw = pd.DataFrame({
+        "age": rng.integers(22, 80, size=n),
+        "employment_type": rng.choice(["full_time", "contract", "retired"], size=n),
+        "income_monthly": rng.choice([0.0, 1500.0, 2800.0, 6000.0, 12000.0], size=n)
+        + rng.uniform(0, 500, size=n),
+        "property_value": rng.uniform(0, 1_200_000, size=n),
+        "mortgage_balance": rng.uniform(0, 900_000, size=n),
+        "amortization_remaining": rng.integers(1, 31, size=n),
+        "expenses_monthly": rng.uniform(0, 6000, size=n),
+        "debt_payments_monthly": rng.uniform(0, 4000, size=n),
+        "interest_rate_current": rng.choice([0.0, 2.5, 5.0, 7.5], size=n),
+        "savings_available": savings,
+        "pref_low_payment": prefs[:, 0],
+        "pref_flexibility": prefs[:, 1],
+        "pref_stability": prefs[:, 2],
+        "pref_fast_payoff": prefs[:, 3],
+        "pref_equity_growth": prefs[:, 4],
+        "pref_risk_tolerance": prefs[:, 5],
+    })
+    model_probs = rng.dirichlet(np.ones(len(STRATEGIES)), size=n)
+    return raw, model_probs
+
+
+@pytest.fixture(scope="module")
+def cases():
+    raw, model_probs = _random_cases(N_CASES)
+    enriched = enrich_features_frame(raw)
+    records = enriched.to_dict("records")
+    return raw, enriched, records, model_probs
+
+
+def _as_class_matrix(dicts, classes):
+    return np.array([[d.get(c, np.nan) for c in classes] for d in dicts], dtype=float)
+
+
+def test_enrich_features_frame_matches_scalar(cases):
+    raw, enriched, _, _ = cases
+    expected = pd.DataFrame([enrich_features(r) for r in raw.to_dict("records")])
+    pd.testing.assert_frame_equal(enriched, expected[enriched.columns], check_dtype=False)
+
+
+def test_check_feasibility_frame_matches_scalar(cases):
+    _, enriched, records, _ = cases
+    expected = np.array([[check_feasibility(r)[s] for s in STRATEGIES] for r in records])
+    np.testing.assert_array_equal(check_feasibility_frame(enriched), expected)
+
+
+def test_apply_preferences_frame_matches_scalar(cases):
+    _, enriched, records, model_probs = cases
+    classes = list(STRATEGIES)
+    feasibility = check_feasibility_frame(enriched)
+    adjusted, _ = apply_preferences_frame(model_probs, classes, enriched, feasibility)
+
+    expected = []
+    for r, probs, feas in zip(records, model_probs, feasibility):
+        base = {c: float(p) for c, p in zip(classes, probs)}
+        out, _ = apply_preferences(base, r, dict(zip(STRATEGIES, feas)))
+        expected.append(out)
+    np.testing.assert_allclose(adjusted, _as_class_matrix(expected, classes))
+
+
+@pytest.mark.parametrize("classes", [list(STRATEGIES), ["lump_sum", "baseline", "downsize", "extend"]])
+def test_score_strategies_frame_matches_scalar(cases, classes):
+    _, enriched, records, model_probs = cases
+    feasibility = check_feasibility_frame(enriched)
+    adjusted, decisions = score_strategies_frame(model_probs, classes, feasibility, enriched)
+
+    expected, expected_decisions = [], []
+    for r, probs, feas in zip(records, model_probs, feasibility):
+        out, decision = score_strategies(probs, classes, dict(zip(STRATEGIES, feas)), r)
+        expected.append(out)
+        expected_decisions.append(decision)
+    np.testing.assert_allclose(adjusted, _as_class_matrix(expected, classes), rtol=1e-12)
+    assert decisions.tolist() == expected_decisions
+
+
+@pytest.mark.parametrize("classes", [list(STRATEGIES), ["downsize", "extend", "baseline", "lump_sum"]])
+def test_recommend_strategy_frame_matches_scalar(cases, classes):
+    _, enriched, records, model_probs = cases
+    result = recommend_strategy_frame(enriched, model_probs, classes)
+
+    expected = [recommend_strategy(r, probs, classes) for r, probs in zip(records, model_probs)]
+    assert result["decision"].tolist() == [e["decision"] for e in expected]
+    assert result["model_suggestion"].tolist() == [e["model_suggestion"] for e in expected]
+    np.testing.assert_allclose(result["scores"], _as_class_matrix([e["scores"] for e in expected], classes))
+
+
+def test_recommend_strategy_frame_matches_scalar_with_cost_features(cases):
+    _, enriched, records, model_probs = cases
+    savings = [cost_features(c) for c in cost_rows(cost_comparison_frame(enriched))]
+    with_costs = enriched.assign(**pd.DataFrame(savings))
+    records = [{**r, **f} for r, f in zip(records, savings)]
+    classes = list(STRATEGIES)
+    result = recommend_strategy_frame(with_costs, model_probs, classes)
+
+    expected = [recommend_strategy(r, probs, classes) for r, probs in zip(records, model_probs)]
+    assert result["decision"].tolist() == [e["decision"] for e in expected]
+    np.testing.assert_allclose(result["scores"], _as_class_matrix([e["scores"] for e in expected], classes))
+
+
+@pytest.mark.parametrize("classes", [list(STRATEGIES), ["extend", "downsize", "lump_sum", "baseline"]])
+def test_rule_based_recommend_frame_matches_scalar(cases, classes):
+    _, enriched, records, model_probs = cases
+    result = rule_based_recommend_frame(enriched, model_probs, classes)
+
+    expected = [rule_based_recommend(r, probs, classes) for r, probs in zip(records, model_probs)]
+    assert result["decision"].tolist() == [e["decision"] for e in expected]
+    assert result["override"].tolist() == ["override" in e for e in expected]
+    np.testing.assert_allclose(result["scores"], _as_class_matrix([e["scores"] for e in expected], classes))
+
+
+def test_frame_functions_accept_structured_arrays(cases):
+    _, enriched, _, _ = cases
+    numeric = enriched.select_dtypes("number").head(50)
+    structured = numeric.to_records(index=False)
+    np.testing.assert_array_equal(check_feasibility_frame(structured), check_feasibility_frame(numeric))
+
+
+def test_decide_many_matches_predict_many_with_rules():
+    from ml_service.app import models
+    from ml_service.synthetic import generate_applicants
+
+    wrapper = models.load().wrapper
+    applicants = generate_applicants(500, seed=11)
+    for a in applicants[::7]:
+        a["pref_stability"] = a["pref_fast_payoff"]  # ties between feasible strategies
+    decisions, probs = wrapper.decide_many(applicants)
+    full = wrapper.predict_many_with_rules(applicants)
+    assert decisions == [r["strategy"] for r in full]
+    expected = [[r["adjusted_probabilities"][c] for c in wrapper.classes] for r in full]
+    assert np.allclose(probs, expected, atol=2e-6)
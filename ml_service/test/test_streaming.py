@@ -0,0 +1,64 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from ml_service import app as app_module
+from ml_service.streaming import StreamError, ndjson_chunks
+from ml_service.synthetic import generate_applicants
+
+client = TestClient(app_module.app)
+
+
+def _chunks(pieces, **kwargs):
+    async def body():
+        for piece in pieces:
+            yield piece
+
+    async def collect():
+        return [batch async for batch in ndjson_chunks(body(), **kwargs)]
+
+    return asyncio.run(collect())
+
+
+def test_ndjson_chunks_split_lines_across_pieces():
+    lines = [f'{{"n": {i}}}'.encode() for i in range(12)]
+    body = b"\n".join(lines[:5]) + b"\n\n  \n" + b"\n".join(lines[5:])  # blank lines, no final newline
+    pieces = [body[i:i + 7] for i in range(0, len(body), 7)]
+
+    batches = _chunks(pieces, chunk_size=4, first_chunk=1)
+    assert [len(b) for b in batches] == [1, 2, 4, 4, 1]
+    assert [line for b in batches for line in b] == lines
+
+    with pytest.raises(StreamError):
+        _chunks([b"x" * 50, b"y" * 50], max_line_bytes=64)
+
+
+def test_stream_endpoint_scores_each_line_and_holds_the_lease(monkeypatch):
+    records = generate_applicants(5, seed=8)
+    lines = [json.dumps(r) for r in records[:3]] + ["{not json", json.dumps({"age": 40})] + [json.dumps(records[3])]
+
+    in_flight = []
+    score_lines = app_module._score_lines
+
+    def recording(chunk, m):
+        in_flight.append(app_module.model_registry.status()["in_flight"])
+        return score_lines(chunk, m)
+
+    monkeypatch.setattr(app_module, "_score_lines", recording)
+    monkeypatch.setattr(app_module, "STREAM_FIRST_CHUNK", 2)
+    response = client.post("/predict/stream", content="\n".join(lines).encode(),
+                           headers={"Content-Type": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert len(results) == len(lines)
+    for i, record in zip([0, 1, 2, 5], records[:3] + [records[3]]):
+        assert results[i] == client.post("/predict/full", json=record).json()
+    assert results[3]["error"] == "Invalid JSON"
+    assert results[4]["error"] == "Invalid applicant"
+
+    assert len(in_flight) > 1 and min(in_flight) >= 1
+    assert app_module.model_registry.status()["in_flight"] == 0
@@ -0,0 +1,75 @@
+import os
+import shutil
+
+import pytest
+
+from ml_service.app import APPROVAL_PATH, STRATEGY_PATH
+from ml_service.metrics import TENANT_LOOKUPS
+from ml_service.tenants import TenantRouter, UnknownTenantError
+from ml_service.test.test_app import valid_applicant
+
+ARTIFACT_BYTES = os.path.getsize(APPROVAL_PATH) + os.path.getsize(STRATEGY_PATH)
+
+
+@pytest.fixture
+def root(tmp_path):
+    for key in ("ca-on", "ca-bc", "lender-42"):
+        (tmp_path / key).mkdir()
+        shutil.copy(APPROVAL_PATH, tmp_path / key)
+        shutil.copy(STRATEGY_PATH, tmp_path / key)
+    return tmp_path
+
+
+def test_loads_on_demand_and_evicts_least_recently_used(root):
+    router = TenantRouter(str(root), budget_bytes=2 * ARTIFACT_BYTES)
+    assert router.keys() == ["ca-bc", "ca-on", "lender-42"]
+    hits_before = TENANT_LOOKUPS.value("hit")
+
+    for key in ("ca-on", "ca-bc", "ca-on", "lender-42"):
+        with router.lease(key) as bundle:
+            assert bundle.predict_approval(valid_applicant)["decision"] in ("PASS", "FAIL")
+
+    status = router.status()
+    assert list(status["resident"]) == ["ca-on", "lender-42"]
+    assert (status["hits"], status["misses"], status["evictions"]) == (1, 3, 1)
+    assert status["resident_bytes"] <= router.budget_bytes
+    assert TENANT_LOOKUPS.value("hit") == hits_before + 1
+
+
+def test_evicted_variant_finishes_its_requests_first(root):
+    router = TenantRouter(str(root), budget_bytes=ARTIFACT_BYTES)
+    closed = []
+    with router.lease("ca-on") as held:
+        held.close = lambda: closed.append("ca-on")
+        with router.lease("ca-bc"):
+            pass
+        assert list(router.status()["resident"]) == ["ca-bc"] and router.status()["draining"] == 1
+        assert held.predict_strategy(valid_applicant)["strategy"] and closed == []
+    assert closed == ["ca-on"] and router.status()["draining"] == 0
+
+
+def test_unknown_keys_are_rejected(root):
+    router = TenantRouter(str(root), budget_bytes=ARTIFACT_BYTES)
+    for key in ("nope", "../ca-on", ""):
+        with pytest.raises(UnknownTenantError):
+            with router.lease(key):
+                pass
+
+
+def test_requests_select_a_variant_by_header_or_query(root, monkeypatch):
+    from ml_service import app as app_module
+    from ml_service.test.test_app import client
+
+    assert client.post("/predict/approval", json=valid_applicant,
+                       headers={"X-Model-Key": "ca-on"}).status_code == 404
+
+    router = TenantRouter(str(root), budget_bytes=ARTIFACT_BYTES)
+    monkeypatch.setattr(app_module, "tenant_router", router)
+    default = client.post("/predict/approval", json=valid_applicant).json()
+    by_header = client.post("/predict/approval", json=valid_applicant, headers={"X-Model-Key": "ca-on"})
+    by_query = client.post("/predict/strategy?model_key=ca-bc", json=valid_applicant)
+    assert by_header.status_code == by_query.status_code == 200
+    assert by_header.json() == default
+    assert list(router.status()["resident"]) == ["ca-bc"]
+    assert client.post("/predict/approval?model_key=nope", json=valid_applicant).status_code == 404
+    assert client.get("/models").json()["tenants"]["misses"] == 2
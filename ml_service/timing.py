@@ -0,0 +1,45 @@
+from __future__ import annotations
+import time
+
+
+# Stage Timer
+class StageTimer:
+    """
+    Lap timer for one request: lap(name) charges the time since the previous
+    lap (or construction) to `name`. Repeated stages accumulate.
+    """
+
+    __slots__ = ("started", "stages", "_last")
+
+    def __init__(self):
+        self.started = self._last = time.perf_counter()
+        self.stages = {}
+
+    def lap(self, name: str):
+        now = time.perf_counter()
+        self.stages[name] = self.stages.get(name, 0.0) + (now - self._last)
+        self._last = now
+
+    def reset_lap(self):
+        """Start the next lap now without charging the gap to any stage."""
+        self._last = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_ms(self) -> dict:
+        return {name: round(seconds * 1000.0, 3) for name, seconds in self.stages.items()}
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def lap(self, name):
+        pass
+
+    def reset_lap(self):
+        pass
+
+
+NULL_TIMER = _NullTimer()
@@ -0,0 +1,197 @@
+from __future__ import annotations
+import json
+import sys
+
+import numpy as np
+
+
+SUPPORTED_OBJECTIVES = ("binary:logistic", "multi:softprob")
+
+
+# Flat Tree Ensemble
+class FlatTreeEnsemble:
+    """
+    XGBoost gbtree model exported to struct-of-arrays node tables (float32
+    thresholds/leaf values, int32 indices) and traversed with NumPy.
+
+    Margins are bit-identical to the booster: leaves are summed sequentially in
+    float32, in tree order, starting from the base margin. Probabilities match
+    too, except for rare 1-ulp differences where libm's expf isn't correctly
+    rounded.
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left, value,
+                 roots, depth, base_margin, objective):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.base_margin = base_margin
+        self.objective = objective
+        self.n_groups = len(base_margin)
+        self.max_depth = int(depth.max(initial=0))
+
+        # Walk deep trees first: at level d only the first _active[d] trees move.
+        self._walk = np.argsort(-depth, kind="stable")
+        self._unwalk = np.argsort(self._walk)
+        self._walk_roots = roots[self._walk]
+        self._active = [int((depth > d).sum()) for d in range(self.max_depth)]
+        internal = left != np.arange(len(left))
+        self._adjacent = bool(np.all(right[internal] == left[internal] + 1))
+
+    @classmethod
+    def from_booster(cls, booster, iteration_range=(0, 0)):
+        model = json.loads(booster.save_raw("json"))["learner"]
+        gbm = model["gradient_booster"]
+        objective = model["objective"]["name"]
+        if gbm["name"] != "gbtree":
+            raise ValueError(f"only gbtree boosters can be flattened, got {gbm['name']!r}")
+        if objective not in SUPPORTED_OBJECTIVES:
+            raise ValueError(f"unsupported objective {objective!r}")
+
+        trees = gbm["model"]["trees"]
+        tree_info = gbm["model"]["tree_info"]
+        begin, end = iteration_range
+        if end > 0:
+            indptr = gbm["model"]["iteration_indptr"]
+            trees, tree_info = trees[indptr[begin]:indptr[end]], tree_info[indptr[begin]:indptr[end]]
+
+        base_margin = np.asarray(
+            json.loads(model["learner_model_param"]["base_score"]), dtype=np.float32
+        ).reshape(-1)
+        if objective == "binary:logistic":
+            base_margin = np.log(base_margin / (np.float32(1) - base_margin)).astype(np.float32)
+        n_groups = len(base_margin)
+
+        # Group trees by output class (stable), so each class sums a contiguous block.
+        order = sorted(range(len(trees)), key=lambda i: tree_info[i])
+        counts = np.bincount(np.asarray(tree_info, dtype=int), minlength=n_groups)
+        if len(set(counts.tolist())) != 1:
+            raise ValueError("every output group must have the same number of trees")
+
+        columns = {k: [] for k in ("feature", "threshold", "left", "right", "default_left", "value")}
+        roots, depths, offset = [], [], 0
+        for i in order:
+            tree = trees[i]
+            if any(tree["split_type"]) or tree["categories"]:
+                raise ValueError("categorical splits are not supported")
+            left = np.asarray(tree["left_children"], dtype=np.int32)
+            right = np.asarray(tree["right_children"], dtype=np.int32)
+            cond = np.asarray(tree["split_conditions"], dtype=np.float32)
+            leaf = left == -1
+            own = np.arange(len(left), dtype=np.int32) + offset
+
+            # Leaves point at themselves so every row can take max_depth steps.
+            columns["feature"].append(np.where(leaf, 0, tree["split_indices"]).astype(np.int32))
+            columns["threshold"].append(cond)
+            columns["left"].append(np.where(leaf, own, left + offset))
+            columns["right"].append(np.where(leaf, own, right + offset))
+            columns["default_left"].append(np.asarray(tree["default_left"], dtype=bool) | leaf)
+            columns["value"].append(np.where(leaf, cond, np.float32(0)).astype(np.float32))
+            roots.append(offset)
+            depths.append(_tree_depth(left, right))
+            offset += len(left)
+
+        tables = {k: np.concatenate(v) for k, v in columns.items()}
+        return cls(
+            roots=np.asarray(roots, dtype=np.int32),
+            depth=np.asarray(depths, dtype=np.int32),
+            base_margin=base_margin,
+            objective=objective,
+            **tables,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.feature, self.threshold, self.left, self.right,
+                  self.default_left, self.value, self.roots, self.depth, self.base_margin)
+        return sum(a.nbytes for a in arrays)
+
+    def save(self, path):
+        np.savez(
+            path,
+            feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+            default_left=self.default_left, value=self.value, roots=self.roots,
+            depth=self.depth, base_margin=self.base_margin, objective=np.array(self.objective),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            tables = {k: data[k] for k in data.files}
+        tables["objective"] = str(tables["objective"])
+        return cls(**tables)
+
+    def predict_margin(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float32)
+        n = X.shape[0]
+        node = np.broadcast_to(self._walk_roots, (n, len(self.roots))).copy()
+        rows = np.arange(n)[:, None]
+        has_missing = bool(np.isnan(X).any())
+
+        for active in self._active:
+            current = node[:, :active]
+            x = X[rows, self.feature[current]]
+            go_left = x < self.threshold[current]
+            if has_missing:
+                go_left |= np.isnan(x) & self.default_left[current]
+            if self._adjacent:
+                # Right child is left + 1; leaves point at themselves via `left`.
+                step = self.left[current]
+                node[:, :active] = np.where(step == current, step, step + ~go_left)
+            else:
+                node[:, :active] = np.where(go_left, self.left[current], self.right[current])
+
+        leaves = self.value[node[:, self._unwalk]].reshape(n, self.n_groups, -1)
+        seq = np.concatenate(
+            [np.broadcast_to(self.base_margin[None, :, None], (n, self.n_groups, 1)), leaves], axis=2
+        )
+        return np.cumsum(seq, axis=2, dtype=np.float32)[:, :, -1]
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Same output as booster.inplace_predict: (N,) for binary, (N, K) for multiclass.
+        """
+        margin = self.predict_margin(X)
+        if self.objective == "binary:logistic":
+            return np.float32(1) / (_expf(-margin[:, 0]) + np.float32(1))
+        # XGBoost's softmax accumulates the denominator in double.
+        exp = _expf(margin - margin.max(axis=1, keepdims=True))
+        return exp / exp.sum(axis=1, dtype=np.float64, keepdims=True).astype(np.float32)
+
+
+def _expf(x):
+    # Correctly rounded float32 exp; matches libm expf far more often than NumPy's.
+    return np.exp(x.astype(np.float64)).astype(np.float32)
+
+
+def _tree_depth(left, right) -> int:
+    depth, frontier = 0, [0]
+    while True:
+        frontier = [c for i in frontier if left[i] != -1 for c in (left[i], right[i])]
+        if not frontier:
+            return depth
+        depth += 1
+
+
+def export_pipeline_trees(pipeline_path, out_path):
+    """
+    Dump the booster inside a pickled pipeline to an .npz of node tables.
+    """
+    import joblib
+
+    pipeline = joblib.load(pipeline_path)
+    flat = FlatTreeEnsemble.from_booster(pipeline.steps[-1][1].get_booster())
+    flat.save(out_path)
+    return flat
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m ml_service.trees <pipeline.pkl> <out.npz>")
+    flat = export_pipeline_trees(sys.argv[1], sys.argv[2])
+    print(f"{len(flat.roots)} trees, {len(flat.value)} nodes, {flat.nbytes / 1024:.1f} KiB")